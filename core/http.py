@@ -0,0 +1,192 @@
+"""
+Provider HTTP Client Module
+
+This module is the single place the service talks to upstream HTTP providers (Google Maps
+Geocoding / Directions, ...). Every provider gets one shared client with:
+
+- a pooled `requests.Session` (per-host keep-alive, bounded connection pool),
+- connect/read timeouts so a stalled upstream cannot block a worker indefinitely,
+- exponential-backoff retries on connection errors, 429 and 5xx responses,
+- a token-bucket rate limiter shared by all threads in the process.
+
+Clients expose a sync interface (`get_json`) and an asyncio interface (`aget_json`, `agather`)
+for ASGI deployments that want to fan out many lookups concurrently. The async interface runs the
+pooled session in worker threads, bounded by a semaphore, so both share one connection pool.
+
+Classes:
+- TokenBucket: Thread-safe token-bucket rate limiter.
+- ProviderClient: Pooled, rate-limited JSON client for one provider.
+- ProviderError: Raised when a provider cannot be reached or returns an unusable response.
+
+Functions:
+- get_client(name): Returns the shared client configured in `settings.PROVIDERS[name]`.
+- reset_clients(): Closes and forgets all clients (used when settings change, e.g. in tests).
+
+Usage Example:
+    client = get_client("google_maps")
+    data = client.get_json("/maps/api/geocode/json", params={"address": "..."})
+
+    results = await client.agather(
+        [("/maps/api/geocode/json", {"address": a}) for a in addresses], concurrency=20
+    )
+"""
+
+import asyncio
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.metrics import record_upstream
+
+
+class ProviderError(Exception):
+    """An upstream provider could not be reached or returned an unusable response."""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second, bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take one token; return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class ProviderClient:
+    """Pooled, rate-limited JSON client for a single upstream provider."""
+
+    def __init__(
+        self,
+        name,
+        base_url,
+        timeout=(3.05, 10),
+        max_retries=3,
+        backoff_factor=0.5,
+        rate_limit=None,
+        pool_size=20,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        self.pool_size = pool_size
+        self.limiter = TokenBucket(rate_limit) if rate_limit else None
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def get_json(self, path, params=None):
+        """GET `path` and decode the JSON body; raises ProviderError on network or HTTP failure."""
+        if self.limiter:
+            self.limiter.acquire()
+        return self._request(path, params)
+
+    async def aget_json(self, path, params=None):
+        """Async variant of `get_json`; the request runs on a worker thread using the shared pool."""
+        if self.limiter:
+            await self.limiter.aacquire()
+        return await asyncio.to_thread(self._request, path, params)
+
+    def _request(self, path, params):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self.session.get(self.url(path), params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            outcome = "ok"
+            return data
+        except (requests.exceptions.RequestException, ValueError) as exc:
+            raise ProviderError(f"{self.name}: {exc}") from exc
+        finally:
+            record_upstream(self.name, time.perf_counter() - started, outcome)
+
+    async def agather(self, calls, concurrency=None):
+        """
+        Run many `(path, params)` calls concurrently, at most `concurrency` at a time.
+        Results come back in input order; failed calls yield their ProviderError instance.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.pool_size)
+
+        async def run(path, params):
+            async with semaphore:
+                try:
+                    return await self.aget_json(path, params)
+                except ProviderError as exc:
+                    return exc
+
+        return await asyncio.gather(*(run(path, params) for path, params in calls))
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """Return the process-wide client for provider `name` as configured in `settings.PROVIDERS`."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                try:
+                    config = settings.PROVIDERS[name]
+                except KeyError:
+                    raise ProviderError(f"Unknown provider '{name}'.")
+                client = ProviderClient(name, **config)
+                _clients[name] = client
+    return client
+
+
+def reset_clients():
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
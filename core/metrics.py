@@ -0,0 +1,285 @@
+"""
+Request Metrics Module
+
+This module keeps in-process performance metrics and serves them in the Prometheus text format
+at `/metrics`:
+
+- `http_request_duration_seconds{view,method,status}`: latency histogram per view.
+- `http_request_db_queries{view}`: queries per request. `http_request_phase_seconds_total{view,phase}`
+  splits request time into db, upstream and auth; the rest is view code and serialization.
+- `upstream_request_duration_seconds{provider,outcome}`: outbound HTTP time per provider
+  (recorded by core/http.py).
+- Cache hit/miss counters (`cache_hits_total`, `cache_misses_total`) and ratios (JWT, geocoding,
+  route, reverse geocoding), read from the existing stats helpers at scrape time, plus queue
+  depths. The depths need database queries, so they are refreshed at most every
+  `METRICS_DB_GAUGE_TTL` seconds rather than on every scrape.
+
+Per-request numbers are collected in a context variable. It follows the request into
+`sync_to_async` threads, so the async views' ORM queries are attributed to them. Queries are
+counted by a wrapper installed on every new database connection.
+
+Metrics are per process. Under several gunicorn workers, each scrape sees the worker that served
+it, so scrape each worker (or run one) when exact totals matter.
+
+Classes:
+- Counter / Histogram: Thread-safe labelled metrics.
+- RequestStats: Per-request DB, upstream and auth totals.
+
+Functions:
+- start_request() / finish_request(stats, token, view, method, status, seconds): Used by the middleware.
+- timed(phase): Context manager adding elapsed time to the current request's `phase`.
+- record_upstream(provider, seconds, outcome): Outbound HTTP call timing.
+- render(): All metrics in Prometheus text format.
+- metrics_view(request): The `/metrics` endpoint. Requires `METRICS_TOKEN` unless DEBUG is on.
+"""
+
+import contextvars
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+from location.utils.cache import MISSING, TTLCache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+PHASES = ("db", "upstream", "auth")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help_text, self.label_names = name, help_text, tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        with self.lock:
+            values = sorted(self.values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.label_names, labels)} {_number(value)}" for labels, value in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.label_names = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self.lock:
+            values = sorted((labels, (list(series[0]), series[1], series[2])) for labels, series in self.values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        names = (*self.label_names, "le")
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(names, (*labels, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Request latency per view.", ("view", "method", "status")
+)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "Database queries per request.", ("view",), QUERY_BUCKETS)
+REQUEST_PHASE_SECONDS = Counter(
+    "http_request_phase_seconds_total", "Request time spent in db, upstream and auth.", ("view", "phase")
+)
+UPSTREAM_DURATION = Histogram(
+    "upstream_request_duration_seconds", "Outbound provider HTTP call latency.", ("provider", "outcome")
+)
+METRICS = [REQUEST_DURATION, REQUEST_QUERIES, REQUEST_PHASE_SECONDS, UPSTREAM_DURATION]
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db", "upstream", "auth")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db = self.upstream = self.auth = 0.0
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish_request(stats, token, view, method, status, seconds):
+    _current.reset(token)
+    REQUEST_DURATION.observe(seconds, (view, method, str(status)))
+    REQUEST_QUERIES.observe(stats.db_queries, (view,))
+    for phase in PHASES:
+        REQUEST_PHASE_SECONDS.inc((view, phase), getattr(stats, phase))
+
+
+@contextmanager
+def timed(phase):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            setattr(stats, phase, getattr(stats, phase) + time.perf_counter() - started)
+
+
+def record_upstream(provider, seconds, outcome):
+    UPSTREAM_DURATION.observe(seconds, (provider, outcome))
+    stats = _current.get()
+    if stats is not None:
+        stats.upstream += seconds
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db += time.perf_counter() - started
+        stats.db_queries += 1
+
+
+def _instrument_connection(sender, connection, **kwargs):
+    # First in the list: `connection.execute_wrapper()` removes the last entry on exit, and this
+    # may run inside such a block when the connection opens lazily.
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+connection_created.connect(_instrument_connection, dispatch_uid="core.metrics.instrument_connection")
+for _connection in connections.all(initialized_only=True):
+    _instrument_connection(None, _connection)
+
+
+def _family(metric_type, name, help_text, label, values):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines += [f'{name}{{{label}="{_escape(key)}"}} {_number(value)}' for key, value in values.items()]
+    return lines
+
+
+def _gauge(name, help_text, label, values):
+    return _family("gauge", name, help_text, label, values)
+
+
+def _counter(name, help_text, label, values):
+    return _family("counter", name, help_text, label, values)
+
+
+_db_gauges = TTLCache(max_entries=1)
+
+
+def _queue_metrics():
+    """Queue and outbox depth gauges; cached so frequent scrapes don't each count the tables."""
+    from location.utils.change_stream import relay_metrics
+    from location.utils.geocode_queue import queue_metrics
+
+    lines = _db_gauges.get("queues")
+    if lines is MISSING:
+        lines = _gauge("geocode_queue_depth", "GeocodeJob rows per status.", "status", queue_metrics()["depth"])
+        lines += [
+            "# HELP change_outbox_depth ChangeEvent rows waiting for the relay.",
+            "# TYPE change_outbox_depth gauge",
+            f"change_outbox_depth {relay_metrics()['outbox']}",
+        ]
+        _db_gauges.set("queues", lines, ttl=settings.METRICS_DB_GAUGE_TTL)
+    return lines
+
+
+def _application_metrics():
+    """Cache counters and gauges, and queue gauges, read from the stats helpers of each app."""
+    from location.authentication import jwt_cache_stats
+    from location.utils.address_validation import geocode_cache_stats
+    from location.utils.reverse_geocode import reverse_geocode_stats
+    from routing.cache import route_cache_stats
+
+    caches = {}
+    jwt = jwt_cache_stats()
+    caches["jwt"] = (jwt["hits"], jwt["misses"], jwt["size"])
+    for name, stats in (("geocode", geocode_cache_stats()), ("route", route_cache_stats())):
+        caches[name] = (stats["memory_hits"] + stats["db_hits"], stats["misses"], stats["memory_size"])
+    reverse = reverse_geocode_stats()
+    caches["reverse_geocode"] = (reverse["hits"], reverse["misses"], reverse["size"])
+
+    lines = []
+    lines += _counter(
+        "cache_hits_total", "Cache hits since process start.", "cache", {k: v[0] for k, v in caches.items()}
+    )
+    lines += _counter(
+        "cache_misses_total", "Cache misses since process start.", "cache", {k: v[1] for k, v in caches.items()}
+    )
+    lines += _gauge(
+        "cache_hit_ratio",
+        "Hits / lookups since process start.",
+        "cache",
+        {k: (v[0] / (v[0] + v[1]) if v[0] + v[1] else 0.0) for k, v in caches.items()},
+    )
+    lines += _gauge(
+        "cache_entries", "Entries in the in-process cache tier.", "cache", {k: v[2] for k, v in caches.items()}
+    )
+    lines += _queue_metrics()
+    return lines
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines += metric.render()
+    lines += _application_metrics()
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        # Not exposed until a scrape token is configured
+        return HttpResponse(status=404)
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
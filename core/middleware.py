@@ -0,0 +1,110 @@
+"""
+Request Instrumentation Middleware
+
+`MetricsMiddleware` records every request in core/metrics.py: latency per view, DB queries and
+time, upstream and auth time.
+
+It also has an opt-in sampled profiling mode. With `PROFILE_SAMPLE_RATE` > 0, that fraction of
+requests runs under cProfile. Samples slower than `PROFILE_THRESHOLD_MS` are written to
+`PROFILE_DIR` as pstats files named `<unix time>-<view>-<ms>.pstats`; read them with
+`python -m pstats` or snakeviz. Only one request per process is profiled at a time. For async
+views the profile also contains whatever else ran on the event loop meanwhile.
+"""
+
+import cProfile
+import logging
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_profiling = threading.Lock()
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profiler = self.start_profile()
+        stats, token = metrics.start_request()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self.finish(request, stats, token, status, started, profiler)
+
+    async def __acall__(self, request):
+        profiler = self.start_profile()
+        stats, token = metrics.start_request()
+        started = time.perf_counter()
+        status = 500
+        try:
+            response = await self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            self.finish(request, stats, token, status, started, profiler)
+
+    def finish(self, request, stats, token, status, started, profiler):
+        elapsed = time.perf_counter() - started
+        view = view_label(request)
+        metrics.finish_request(stats, token, view, request.method, status, elapsed)
+        if profiler is not None:
+            self.stop_profile(profiler, view, elapsed)
+
+    @staticmethod
+    def start_profile():
+        rate = settings.PROFILE_SAMPLE_RATE
+        if rate <= 0 or random.random() >= rate or not _profiling.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is active in this thread.
+            _profiling.release()
+            return None
+        return profiler
+
+    @staticmethod
+    def stop_profile(profiler, view, elapsed):
+        try:
+            profiler.disable()
+            milliseconds = elapsed * 1000
+            if milliseconds < settings.PROFILE_THRESHOLD_MS:
+                return
+            directory = Path(settings.PROFILE_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            name = re.sub(r"[^\w.-]+", "_", view)
+            path = directory / f"{int(time.time())}-{name}-{int(milliseconds)}.pstats"
+            profiler.dump_stats(path)
+            logger.info("Profiled slow request %s (%.0f ms): %s", view, milliseconds, path)
+        finally:
+            _profiling.release()
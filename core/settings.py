@@ -12,6 +12,73 @@ GOOGLE_MAPS_API_SECRET = env.str("GOOGLE_MAPS_DIRECTIONS_SECRET")
 
 ZIPCODE_API_KEY = env.str("GOOGLE_MAPS_DIRECTIONS_SECRET")
 
+# Upstream HTTP providers (see core/http.py); timeouts are (connect, read) seconds
+PROVIDERS = {
+    "google_maps": {
+        "base_url": env.str("GOOGLE_MAPS_BASE_URL", default="https://maps.googleapis.com"),
+        "timeout": (env.float("PROVIDER_CONNECT_TIMEOUT", default=3.05), env.float("PROVIDER_READ_TIMEOUT", default=10.0)),
+        "max_retries": env.int("PROVIDER_MAX_RETRIES", default=3),
+        "backoff_factor": env.float("PROVIDER_BACKOFF_FACTOR", default=0.5),
+        "rate_limit": env.float("GOOGLE_MAPS_RATE_LIMIT", default=50.0),
+        "pool_size": env.int("PROVIDER_POOL_SIZE", default=20),
+    },
+}
+
+# Route optimization: "google" (Directions API) or "local" (routing/optimizer.py); overridable per request
+ROUTE_OPTIMIZER = env.str("ROUTE_OPTIMIZER", default="google")
+ROUTE_OPTIMIZER_SPEED_KMH = env.float("ROUTE_OPTIMIZER_SPEED_KMH", default=40.0)
+ROUTE_OPTIMIZER_TIME_LIMIT = env.float("ROUTE_OPTIMIZER_TIME_LIMIT", default=5.0)
+# Time budget (seconds) for repairing a stored route after stops are added or removed
+ROUTE_REOPTIMIZE_TIME_LIMIT = env.float("ROUTE_REOPTIMIZE_TIME_LIMIT", default=0.05)
+# Background route jobs streamed over WebSockets: worker threads, seconds between progress
+# messages, and how long finished jobs can still be subscribed to
+ROUTE_JOB_WORKERS = env.int("ROUTE_JOB_WORKERS", default=4)
+ROUTE_JOB_PROGRESS_INTERVAL = env.float("ROUTE_JOB_PROGRESS_INTERVAL", default=0.1)
+ROUTE_JOB_RETENTION = env.int("ROUTE_JOB_RETENTION", default=60 * 60)
+
+# Worker processes for multi-vehicle plans (0 = one per CPU core)
+ROUTE_PLAN_WORKERS = env.int("ROUTE_PLAN_WORKERS", default=0)
+ROUTE_MATRIX_MAX_CELLS = env.int("ROUTE_MATRIX_MAX_CELLS", default=4_000_000)
+
+# Route optimization cache; the DB tier shares results across workers
+ROUTE_CACHE_TTL = env.int("ROUTE_CACHE_TTL", default=60 * 60 * 24)
+ROUTE_CACHE_MAX_ENTRIES = env.int("ROUTE_CACHE_MAX_ENTRIES", default=2000)
+ROUTE_CACHE_DB_ENABLED = env.bool("ROUTE_CACHE_DB_ENABLED", default=False)
+
+# Geocoding cache (seconds); negative results (ZERO_RESULTS) expire sooner
+GEOCODE_CACHE_TTL = env.int("GEOCODE_CACHE_TTL", default=60 * 60 * 24 * 30)
+GEOCODE_CACHE_NEGATIVE_TTL = env.int("GEOCODE_CACHE_NEGATIVE_TTL", default=60 * 60)
+GEOCODE_CACHE_MAX_ENTRIES = env.int("GEOCODE_CACHE_MAX_ENTRIES", default=10000)
+
+# Batch validation: concurrent upstream lookups per request, and items accepted per request
+GEOCODE_BATCH_CONCURRENCY = env.int("GEOCODE_BATCH_CONCURRENCY", default=10)
+GEOCODE_BATCH_MAX_ITEMS = env.int("GEOCODE_BATCH_MAX_ITEMS", default=10000)
+
+# Reverse geocoding from local boundaries: simplification tolerance (degrees; points closer than
+# this to a border are checked against the exact polygon) and cached lookups per process
+REVERSE_GEOCODE_TOLERANCE = env.float("REVERSE_GEOCODE_TOLERANCE", default=0.0005)
+REVERSE_GEOCODE_CACHE_MAX_ENTRIES = env.int("REVERSE_GEOCODE_CACHE_MAX_ENTRIES", default=50000)
+# Seconds between checks for boundaries changed by other processes (e.g. load_boundaries)
+REVERSE_GEOCODE_CHECK_INTERVAL = env.int("REVERSE_GEOCODE_CHECK_INTERVAL", default=30)
+
+# Autocomplete: seconds an in-memory index lives before it is rebuilt, tenant/user indexes kept
+# per process, and prefix matches ranked per query
+AUTOCOMPLETE_INDEX_TTL = env.int("AUTOCOMPLETE_INDEX_TTL", default=60 * 5)
+AUTOCOMPLETE_MAX_SCOPES = env.int("AUTOCOMPLETE_MAX_SCOPES", default=200)
+AUTOCOMPLETE_SCAN_LIMIT = env.int("AUTOCOMPLETE_SCAN_LIMIT", default=500)
+
+# Request metrics at /metrics (see core/metrics.py); scrapers must send METRICS_TOKEN as a Bearer
+# token. Without a token the endpoint is only served when DEBUG is on.
+METRICS_TOKEN = env.str("METRICS_TOKEN", default="")
+# Seconds the queue and outbox depth gauges (which query the database) are reused between scrapes
+METRICS_DB_GAUGE_TTL = env.float("METRICS_DB_GAUGE_TTL", default=15.0)
+
+# Sampled profiling: this fraction of requests runs under cProfile, and samples slower than the
+# threshold are written to PROFILE_DIR as .pstats files (0 disables)
+PROFILE_SAMPLE_RATE = env.float("PROFILE_SAMPLE_RATE", default=0.0)
+PROFILE_THRESHOLD_MS = env.float("PROFILE_THRESHOLD_MS", default=500.0)
+PROFILE_DIR = env.str("PROFILE_DIR", default="/tmp/profiles")
+
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +101,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "rest_framework",
     "drf_spectacular",
+    "channels",
     # GIS support
     "django.contrib.gis",
     # Custom apps
@@ -43,6 +111,7 @@ INSTALLED_APPS = [
 
 # Middleware
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,6 +124,11 @@ ROOT_URLCONF = "core.urls"
 
 # WSGI application
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
+
+# Channel layer for WebSocket fan-out. Route jobs publish from the process that runs them,
+# so the in-memory layer is enough; use channels_redis to fan out across servers.
+CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
 # REST framework settings
 REST_FRAMEWORK = {
@@ -76,6 +150,36 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Django caches. Point CACHE_BACKEND at a shared backend (e.g. DatabaseCache or FileBasedCache,
+# with CACHE_LOCATION) when running several processes, so invalidations reach all of them. Address
+# responses use their own alias, a file cache shared by the workers on one host by default; point
+# it at Redis, Memcached or the database when several hosts serve the API.
+CACHES = {
+    "default": {
+        "BACKEND": env.str("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": env.str("CACHE_LOCATION", default="location-service"),
+    },
+    "responses": {
+        "BACKEND": env.str(
+            "RESPONSE_CACHE_BACKEND", default="django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": env.str("RESPONSE_CACHE_LOCATION", default="/tmp/location-service-responses"),
+    },
+}
+
+# Serve address list/retrieve/nearby from the async views (location/async_views.py); core/wsgi.py
+# turns this off so a WSGI server runs the sync DRF handlers instead of async_to_sync wrappers
+ASYNC_ADDRESS_READS = env.bool("ASYNC_ADDRESS_READS", default=True)
+
+# Per-user cache of address list/retrieve responses (see location/utils/response_cache.py)
+ADDRESS_CACHE_ALIAS = env.str("ADDRESS_CACHE_ALIAS", default="responses")
+ADDRESS_CACHE_TTL = env.int("ADDRESS_CACHE_TTL", default=60 * 10)
+# Cache responses even when the alias is process-local (LocMemCache); only safe with a single worker process
+ADDRESS_CACHE_ALLOW_LOCAL = env.bool("ADDRESS_CACHE_ALLOW_LOCAL", default=False)
+
+# Validated JWTs cached per process until they expire (see location/authentication.py)
+JWT_CACHE_MAX_ENTRIES = env.int("JWT_CACHE_MAX_ENTRIES", default=10000)
+
 # Database settings
 DATABASES = {
     "default": {
@@ -122,4 +226,13 @@ USE_TZ = True
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 KAFKA_TOPIC = env.str("KAFKA_TOPIC", default="default_topic")
-KAFKA_SERVERS = env.list("KAFKA_SERVERS", default=["kafka:9092"])
\ No newline at end of file
+KAFKA_SERVERS = env.list("KAFKA_SERVERS", default=["kafka:9092"])
+
+# Change stream of Address/Route/RouteStop writes (see location/utils/change_stream.py).
+# Writes only add outbox rows; `manage.py relay_changes` publishes them to KAFKA_TOPIC.
+# CHANGE_STREAM_BROKER is "kafka", or "memory" for tests and local runs without Kafka.
+CHANGE_STREAM_ENABLED = env.bool("CHANGE_STREAM_ENABLED", default=True)
+CHANGE_STREAM_BROKER = env.str("CHANGE_STREAM_BROKER", default="kafka")
+CHANGE_STREAM_BATCH_SIZE = env.int("CHANGE_STREAM_BATCH_SIZE", default=2000)
+CHANGE_STREAM_LINGER_MS = env.int("CHANGE_STREAM_LINGER_MS", default=20)
+CHANGE_STREAM_COMPRESSION = env.str("CHANGE_STREAM_COMPRESSION", default="gzip")
\ No newline at end of file
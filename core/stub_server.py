@@ -0,0 +1,86 @@
+"""
+Stub Provider Server Module
+
+A tiny threaded HTTP server that stands in for upstream providers in tests and benchmarks.
+Routes map a URL path to either a JSON-serializable object or a callable taking the parsed query
+parameters and returning `(status_code, body)`. Every request is recorded.
+
+Usage Example:
+    with StubProviderServer({"/maps/api/geocode/json": geocode_handler}) as stub:
+        with override_settings(PROVIDERS={"google_maps": {"base_url": stub.url}}):
+            reset_clients()
+            validate_address("1 Main St")
+        assert len(stub.requests) == 1
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class StubProviderServer:
+    def __init__(self, routes=None, latency=0.0):
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query))
+                with stub._lock:
+                    stub.requests.append((parts.path, params))
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                route = stub.routes.get(parts.path)
+                if route is None:
+                    status, body = 404, {"error": "not found"}
+                elif callable(route):
+                    status, body = route(params)
+                else:
+                    status, body = 200, route
+
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -1,6 +1,9 @@
 from django.urls import path, include
 
+from core.metrics import metrics_view
+
 urlpatterns = [
+    path("metrics", metrics_view, name="metrics"),
     path("api/routing/", include("routing.urls")),
     path("api/locations/", include("location.urls")),
 ]
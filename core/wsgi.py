@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+# Address reads use the sync DRF handlers here; the async views are for the ASGI server
+os.environ.setdefault("ASYNC_ADDRESS_READS", "false")
 
 application = get_wsgi_application()
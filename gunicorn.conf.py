@@ -0,0 +1,23 @@
+"""
+Gunicorn configuration: serves core.asgi (HTTP and WebSockets) on uvicorn workers.
+
+    gunicorn core.asgi:application
+
+For the WSGI comparison (see `manage.py loadtest_reads`), override the worker class:
+
+    gunicorn core.wsgi:application --worker-class gthread --threads 8 --bind 0.0.0.0:8001
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = 30
+# Recycle workers periodically so slow leaks cannot accumulate.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 10000))
+max_requests_jitter = max_requests // 10
+accesslog = "-"
@@ -8,4 +8,4 @@ class LocationConfig(AppConfig):
     name = "location"
 
     def ready(self):
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+Async read endpoints for addresses.
+
+Address list, retrieve and nearby search are the hottest read paths. They are plain Django async
+views on the async ORM (`aget`, async iteration), so under the ASGI server one worker serves
+many concurrent reads instead of holding a thread per request. They authenticate with the same
+JWTs and return the same bodies as the DRF endpoints. Writes on the same URLs are handed to
+`AddressViewSet`. List and retrieve responses are cached per user with ETags
+(see utils/response_cache.py). Reverse geocoding is served from the in-memory boundary index
+(see utils/reverse_geocode.py), and autocomplete from in-memory prefix indexes
+(see utils/autocomplete.py). Batch validation streams its NDJSON lines from an async iterator, since
+the ASGI handler would collect a sync iterator into memory before sending anything.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+
+from .authentication import CustomJWTAuthentication
+from .models import Address
+from .pagination import KeysetPagination
+from .serializers import AddressRepresenter
+from .utils.autocomplete import scope_for, suggest
+from .utils.batch_validation import stream_batch_validation
+from .utils.proximity import UNITS, addresses_within, nearest_addresses
+from .utils.response_cache import auser_version, entry_response, get_cache, is_enabled, make_etag, response_key
+from .utils.reverse_geocode import reverse_geocode
+
+NEARBY_DEFAULT_LIMIT = 50
+NEARBY_MAX_LIMIT = 500
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+AUTOCOMPLETE_MAX_QUERY = 100
+
+
+def error(message, status):
+    return JsonResponse({"error": message}, status=status)
+
+
+def authenticate(request):
+    """Authenticate like `CustomJWTAuthentication` does for DRF views; raises AuthenticationFailed."""
+    result = CustomJWTAuthentication().authenticate(request)
+    if result is None:
+        raise AuthenticationFailed("Authentication credentials were not provided.")
+    return result[0]
+
+
+def async_api_view(handler):
+    """Wrap an async read handler: JWT authentication and DRF-style 401/400/404 responses."""
+
+    async def view(request, *args, **kwargs):
+        try:
+            request.user = authenticate(request)
+            return await handler(request, *args, **kwargs)
+        except AuthenticationFailed as exc:
+            response = JsonResponse({"detail": str(exc.detail)}, status=401)
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=400, safe=False)
+        except Http404:
+            return JsonResponse({"detail": "No Address matches the given query."}, status=404)
+
+    return csrf_exempt(view)
+
+
+def with_write_view(read_view, write_view):
+    """Serve GET/HEAD with the async `read_view`; other methods go to the (sync) DRF `write_view`."""
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await read_view(request, *args, **kwargs)
+        return await sync_to_async(write_view)(request, *args, **kwargs)
+
+    return csrf_exempt(view)
+
+
+def cached_per_user(handler):
+    """
+    Serve a read handler's 200 responses from the per-user response cache. The version is read
+    before the handler runs, so a write racing with the read can only store under the old key.
+    Clients that send a matching `If-None-Match` get a 304. Without a shared cache backend (see
+    `response_cache.is_enabled`) the handler runs every time.
+    """
+
+    async def view(request, *args, **kwargs):
+        if not is_enabled():
+            return await handler(request, *args, **kwargs)
+        user_id = request.user.user_id
+        key = response_key(user_id, await auser_version(user_id), request.build_absolute_uri())
+        cache = get_cache()
+        entry = await cache.aget(key)
+        if entry is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = {"etag": make_etag(response.content), "body": response.content}
+            await cache.aset(key, entry, settings.ADDRESS_CACHE_TTL)
+        return entry_response(entry, request)
+
+    return view
+
+
+def user_addresses(user):
+    return Address.objects.filter(user_id=user.user_id)
+
+
+@async_api_view
+@cached_per_user
+async def address_list(request):
+    paginator = KeysetPagination(request)
+    rows = await paginator.apaginate_queryset(AddressRepresenter.queryset(user_addresses(request.user)))
+    return JsonResponse(paginator.get_paginated_data(AddressRepresenter.represent_many(rows)))
+
+
+@async_api_view
+@cached_per_user
+async def address_detail(request, pk):
+    try:
+        row = await AddressRepresenter.queryset(user_addresses(request.user)).aget(pk=pk)
+    except Address.DoesNotExist:
+        raise Http404
+    return JsonResponse(AddressRepresenter.represent(row))
+
+
+@async_api_view
+async def address_nearby(request):
+    """
+    Find the caller's addresses (or their tenant's, when the token carries a tenant_id)
+    near a point. `mode=radius` (default) returns everything within `radius`;
+    `mode=knn` returns the `limit` nearest, optionally bounded by `radius`.
+    """
+    params = request.GET
+    mode = params.get("mode", "radius")
+    unit = params.get("unit", "mi")
+    try:
+        latitude = float(params["lat"])
+        longitude = float(params["lng"])
+        radius = float(params["radius"]) if "radius" in params else None
+        limit = min(int(params.get("limit", NEARBY_DEFAULT_LIMIT)), NEARBY_MAX_LIMIT)
+    except (KeyError, ValueError):
+        return error("lat and lng are required; lat, lng, radius and limit must be numbers.", 400)
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return error("lat/lng out of range.", 400)
+    if limit < 1:
+        return error("limit must be at least 1.", 400)
+    if unit not in UNITS:
+        return error(f"unit must be one of: {', '.join(UNITS)}.", 400)
+    if mode not in ("radius", "knn"):
+        return error("mode must be 'radius' or 'knn'.", 400)
+    if mode == "radius" and radius is None:
+        return error("radius is required in radius mode.", 400)
+
+    user = request.user
+    if getattr(user, "tenant_id", None):
+        queryset = Address.objects.filter(tenant_id=user.tenant_id)
+    else:
+        queryset = user_addresses(user)
+
+    if mode == "knn":
+        queryset = nearest_addresses(queryset, latitude, longitude, radius=radius, unit=unit)
+    else:
+        queryset = addresses_within(queryset, latitude, longitude, radius, unit=unit)
+
+    results = []
+    async for row in queryset.values(*AddressRepresenter.fields, "distance")[:limit]:
+        item = AddressRepresenter.represent(row)
+        item["distance"] = getattr(row["distance"], unit)
+        results.append(item)
+    return JsonResponse({"unit": unit, "results": results})
+
+
+@async_api_view
+async def reverse_geocode_point(request):
+    """Resolve `lat`/`lng` to the containing City, State and Country from locally loaded boundaries."""
+    try:
+        latitude = float(request.GET["lat"])
+        longitude = float(request.GET["lng"])
+    except (KeyError, ValueError):
+        return error("lat and lng are required and must be numbers.", 400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return error("lat/lng out of range.", 400)
+
+    return JsonResponse(await sync_to_async(reverse_geocode)(latitude, longitude))
+
+
+@async_api_view
+async def address_autocomplete(request):
+    """
+    Typeahead over the caller's addresses (or their tenant's) and known cities and states.
+    An optional `lat`/`lng` bias ranks nearer matches first.
+    """
+    params = request.GET
+    query = params.get("q", "").strip()
+    if not query or len(query) > AUTOCOMPLETE_MAX_QUERY:
+        return error(f"q is required (at most {AUTOCOMPLETE_MAX_QUERY} characters).", 400)
+    try:
+        limit = min(int(params.get("limit", AUTOCOMPLETE_DEFAULT_LIMIT)), AUTOCOMPLETE_MAX_LIMIT)
+        latitude = float(params["lat"]) if "lat" in params else None
+        longitude = float(params["lng"]) if "lng" in params else None
+    except ValueError:
+        return error("lat, lng and limit must be numbers.", 400)
+    if (latitude is None) != (longitude is None):
+        return error("lat and lng must be given together.", 400)
+    if latitude is not None and not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return error("lat/lng out of range.", 400)
+
+    user = request.user
+    scope = scope_for(getattr(user, "tenant_id", None), user.user_id)
+    results = await sync_to_async(suggest)(query, scope, latitude, longitude, max(limit, 1))
+    return JsonResponse({"results": results})
+
+
+async def _aiterate(lines):
+    """Pull lines from a sync generator one `sync_to_async` hop at a time, so each is sent as soon as it is ready."""
+    pull = sync_to_async(next)
+    try:
+        while (line := await pull(lines, None)) is not None:
+            yield line
+    finally:
+        await sync_to_async(lines.close)()
+
+
+@async_api_view
+async def address_validate_batch(request):
+    """
+    Validate many addresses in one request and stream the results back as NDJSON,
+    one line per input item in input order.
+    """
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return error("Expected a JSON array.", 400)
+    if not isinstance(items, list):
+        return error("Expected a JSON array.", 400)
+    if len(items) > settings.GEOCODE_BATCH_MAX_ITEMS:
+        return error(f"At most {settings.GEOCODE_BATCH_MAX_ITEMS} items per request.", 400)
+
+    lines = stream_batch_validation(items, request.user.user_id, concurrency=settings.GEOCODE_BATCH_CONCURRENCY)
+    return StreamingHttpResponse(_aiterate(lines), content_type="application/x-ndjson")
@@ -1,12 +1,47 @@
+import hashlib
+import threading
+import time
+from urllib.parse import parse_qs
+
+from channels.middleware import BaseMiddleware
+from django.conf import settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
+from core.metrics import timed
+from .utils.cache import MISSING, TTLCache
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def _get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                # Entries are stored with the token's remaining lifetime as their TTL.
+                _token_cache = TTLCache(max_entries=settings.JWT_CACHE_MAX_ENTRIES, ttl=0)
+    return _token_cache
+
+
+def jwt_cache_stats():
+    return _get_token_cache().stats()
+
+
+def clear_jwt_cache():
+    _get_token_cache().clear()
+
 
 class SimulatedUser:
-    def __init__(self, user_id, username, email):
+    __slots__ = ("user_id", "username", "email", "tenant_id")
+
+    def __init__(self, user_id, username, email, tenant_id=None):
         self.user_id = user_id
         self.username = username
         self.email = email
+        self.tenant_id = tenant_id
 
     @property
     def is_authenticated(self):
@@ -26,17 +61,66 @@ class CustomJWTAuthentication(JWTAuthentication):
         if raw_token is None:
             return None
 
+        with timed("auth"):
+            return self.validate(raw_token)
+
+    def validate(self, raw_token):
+        """
+        Return (user, validated_token) for a raw token. Results are cached per token digest until
+        the token's `exp`, so a token reused across requests is only verified once per process.
+        """
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        cache = _get_token_cache()
+        key = hashlib.sha256(raw_token).digest()
+        cached = cache.get(key)
+        if cached is not MISSING:
+            return cached
+
         try:
             validated_token = self.get_validated_token(raw_token)
         except AuthenticationFailed as exc:
             raise AuthenticationFailed(f"Token validation failed: {str(exc)}")
 
+        result = (self.get_user(validated_token), validated_token)
+        expires_in = validated_token.get("exp", 0) - time.time()
+        cache.set(key, result, ttl=expires_in)
+        return result
+
+    def get_user(self, validated_token):
         user_id = validated_token.get("user_id")
         username = validated_token.get("username", "Unknown User")
         email = validated_token.get("email", "")
+        tenant_id = validated_token.get("tenant_id")
 
         if not user_id:
             raise AuthenticationFailed("User ID not found in token.")
 
-        user = SimulatedUser(user_id=user_id, username=username, email=email)
-        return user, validated_token
+        return SimulatedUser(user_id=user_id, username=username, email=email, tenant_id=tenant_id)
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Channels middleware that authenticates WebSocket connections with the same JWTs as the API.
+    Browsers cannot set headers on WebSocket requests, so the token is read from the `token`
+    query parameter (or an `Authorization: Bearer` header). `scope["user"]` is None when missing
+    or invalid.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope, user=self.authenticate(scope))
+        return await super().__call__(scope, receive, send)
+
+    @staticmethod
+    def authenticate(scope):
+        authentication = CustomJWTAuthentication()
+        token = parse_qs(scope.get("query_string", b"").decode()).get("token", [None])[0]
+        if token is None:
+            header = dict(scope.get("headers", [])).get(b"authorization")
+            token = authentication.get_raw_token(header) if header else None
+        if not token:
+            return None
+        try:
+            return authentication.validate(token)[0]
+        except AuthenticationFailed:
+            return None
@@ -0,0 +1,113 @@
+import json
+import random
+import statistics
+import time
+import uuid
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from location.models import Address, City, Country, State
+from location.utils.proximity import addresses_within, nearest_addresses
+
+# Continental US bounding box (lat_min, lat_max, lng_min, lng_max)
+BOUNDS = (24.5, 49.0, -124.8, -66.9)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the nearby-address radius and KNN queries over synthetic points and check the plans use location_idx."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic addresses to insert")
+        parser.add_argument("--queries", type=int, default=200, help="Queries to time per mode")
+        parser.add_argument("--radius", type=float, default=5.0, help="Radius in miles")
+        parser.add_argument("--k", type=int, default=10, help="Neighbours in KNN mode")
+        parser.add_argument("--chunk-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--keep", action="store_true", help="Keep the synthetic rows afterwards")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        tenant_id = uuid.uuid4()
+
+        self.stdout.write(f"Inserting {options['rows']} synthetic addresses (tenant {tenant_id})...")
+        started = time.perf_counter()
+        self.insert_points(rng, tenant_id, options["rows"], options["chunk_size"])
+        self.stdout.write(f"Inserted in {time.perf_counter() - started:.1f}s")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{Address._meta.db_table}"')
+
+        try:
+            queryset = Address.objects.filter(tenant_id=tenant_id)
+            points = [self.random_point(rng) for _ in range(options["queries"])]
+
+            def radius_query(lat, lng):
+                return addresses_within(queryset, lat, lng, options["radius"], unit="mi").values("id")
+
+            def knn_query(lat, lng):
+                return nearest_addresses(queryset, lat, lng).values("id")[: options["k"]]
+
+            report = {
+                "rows": options["rows"],
+                "radius": self.run(radius_query, points),
+                "knn": self.run(knn_query, points),
+            }
+            self.stdout.write(json.dumps(report, indent=2))
+
+            failed = [mode for mode in ("radius", "knn") if not report[mode]["uses_index"]]
+            if failed:
+                self.stderr.write(self.style.ERROR(f"Index not used by: {', '.join(failed)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS("Both query modes use location_idx."))
+        finally:
+            if not options["keep"]:
+                Address.objects.filter(tenant_id=tenant_id).delete()
+
+    @staticmethod
+    def random_point(rng):
+        lat_min, lat_max, lng_min, lng_max = BOUNDS
+        return rng.uniform(lat_min, lat_max), rng.uniform(lng_min, lng_max)
+
+    def insert_points(self, rng, tenant_id, rows, chunk_size):
+        country, _ = Country.objects.get_or_create(code="US")
+        state, _ = State.objects.get_or_create(name="BENCHMARK", country=country)
+        city, _ = City.objects.get_or_create(name="BENCHMARK", state=state, country=country)
+
+        for start in range(0, rows, chunk_size):
+            batch = []
+            for i in range(start, min(start + chunk_size, rows)):
+                lat, lng = self.random_point(rng)
+                batch.append(
+                    Address(
+                        address_line_1=f"{i} Benchmark St",
+                        address_line_2="",
+                        postal_code="00000",
+                        city=city,
+                        state=state,
+                        country=country,
+                        tenant_id=tenant_id,
+                        location=Point(lng, lat, srid=4326),
+                    )
+                )
+            Address.objects.bulk_create(batch)
+
+    @staticmethod
+    def run(build_query, points):
+        lat, lng = points[0]
+        plan = build_query(lat, lng).explain()
+
+        timings = []
+        for lat, lng in points:
+            started = time.perf_counter()
+            list(build_query(lat, lng))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        return {
+            "uses_index": "location_idx" in plan,
+            "mean_ms": round(statistics.mean(timings), 3),
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+        }
@@ -0,0 +1,330 @@
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.http import reset_clients
+from core.stub_server import StubProviderServer
+from location.models import Address
+from location.serializers import AddressSerializer
+from location.utils.geocode_queue import claim_jobs, enqueue_geocoding, process_jobs
+from location.utils.synthetic import DEPOT, REGION, make_addresses, make_geography, make_stops, stub_routes
+
+SCENARIOS = ("address_create", "address_list", "route_create", "nearby", "matrix", "geocode_worker")
+
+# (full, --quick) sizes per scenario
+LIST_ROWS = ((1_000, 10_000), (100, 1_000))
+ROUTE_STOPS = ((10, 100, 1_000), (10, 100))
+GOOGLE_STOPS = (10, 25)  # Directions API waypoint limit
+NEARBY_ROWS = (10_000, 1_000)
+MATRIX_SIZES = ((100, 1_000), (50, 200))
+WORKER_JOBS = (500, 50)
+PAGE_SIZE = 100
+FILE_CACHE = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark address and routing code paths (serializers, list pagination, route creation, nearby "
+        "search, distance matrices, the geocoding worker) on synthetic data in a throwaway test database. "
+        "Upstream geocoding and Directions calls go to a local fake server. Results are written as JSON; "
+        "pass --compare with an earlier result file to flag regressions between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per measurement")
+        parser.add_argument("--quick", action="store_true", help="Smaller data sets and fewer runs (smoke test)")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--upstream-latency", type=float, default=0.0, help="Fake provider latency (ms)")
+        parser.add_argument("--output", help="Write the JSON report to this file (default: stdout only)")
+        parser.add_argument("--compare", help="Earlier JSON report to compare p50 latencies against")
+        parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown that counts as a regression")
+        parser.add_argument("--fail-on-regression", action="store_true", help="Exit with an error on regressions")
+        parser.add_argument("--keepdb", action="store_true", help="Reuse the test database between runs")
+        parser.add_argument(
+            "--no-test-db",
+            action="store_true",
+            help="Run against the configured database instead of a test database (it gets synthetic rows)",
+        )
+
+    def handle(self, *args, **options):
+        self.quick = options["quick"]
+        self.repeat = min(options["repeat"], 5) if self.quick else options["repeat"]
+        self.rng = random.Random(options["seed"])
+
+        results = {}
+        old_name = None
+        if not options["no_test_db"]:
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+            )
+        try:
+            with StubProviderServer(stub_routes(), latency=options["upstream_latency"] / 1000) as stub:
+                provider = {**settings.PROVIDERS["google_maps"], "base_url": stub.url}
+                provider.update(max_retries=0, rate_limit=None)
+                with override_settings(
+                    ALLOWED_HOSTS=["testserver"],
+                    PROVIDERS={"google_maps": provider},
+                    CHANGE_STREAM_BROKER="memory",
+                    PROFILE_SAMPLE_RATE=0.0,
+                ):
+                    reset_clients()
+                    self.cities = make_geography(self.rng)
+                    for scenario in options["scenarios"]:
+                        self.stderr.write(f"Running {scenario}...")
+                        results.update(getattr(self, f"bench_{scenario}")())
+                reset_clients()
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        report = {"meta": self.metadata(options), "results": results}
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(output + "\n")
+        self.stdout.write(output)
+
+        if options["compare"]:
+            regressions = self.compare(options["compare"], results, options["threshold"])
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+    # Measurement helpers
+
+    def measure(self, call, repeat=None, warmup=1):
+        """Time `call(run)` `repeat` times after `warmup` runs; one extra run counts its queries."""
+        repeat = repeat or self.repeat
+        for run in range(warmup):
+            call(run)
+        with CaptureQueriesContext(connection) as queries:
+            call(warmup)
+        timings = []
+        for run in range(warmup + 1, warmup + 1 + repeat):
+            started = time.perf_counter()
+            call(run)
+            timings.append((time.perf_counter() - started) * 1000)
+        return self.summarize(timings, queries=len(queries))
+
+    @staticmethod
+    def summarize(timings, **extra):
+        timings = sorted(timings)
+        return {
+            "runs": len(timings),
+            "mean_ms": round(statistics.mean(timings), 3),
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            "min_ms": round(timings[0], 3),
+            "max_ms": round(timings[-1], 3),
+            **extra,
+        }
+
+    def client(self, user_id, tenant_id=None):
+        token = AccessToken()
+        token["user_id"] = str(user_id)
+        if tenant_id:
+            token["tenant_id"] = str(tenant_id)
+        return Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    @staticmethod
+    def expect(response, status=200):
+        if response.status_code != status:
+            path = response.request["PATH_INFO"]
+            raise CommandError(f"{path} returned {response.status_code}: {response.content[:200]!r}")
+        return response
+
+    def random_point(self):
+        lat_min, lat_max, lng_min, lng_max = REGION
+        return self.rng.uniform(lat_min, lat_max), self.rng.uniform(lng_min, lng_max)
+
+    # Scenarios
+
+    def bench_address_create(self):
+        user = type("BenchmarkUser", (), {"user_id": str(uuid.uuid4())})()
+
+        def create(run):
+            payload = {
+                "address_line_1": f"{run} Benchmark St",
+                "address_line_2": "",
+                "postal_code": "45402",
+                "city": "Dayton",
+                "state": "Ohio",
+                "country": "US",
+            }
+            serializer = AddressSerializer(data=payload, context={"user": user})
+            if not serializer.is_valid():
+                raise CommandError(f"Invalid benchmark payload: {serializer.errors}")
+            serializer.save()
+
+        return {"address_create/serializer": self.measure(create)}
+
+    def bench_address_list(self):
+        results = {}
+        for rows in LIST_ROWS[self.quick]:
+            user_id = uuid.uuid4()
+            make_addresses(self.rng, self.cities, rows, user_id=user_id)
+            client = self.client(user_id)
+            queryset = Address.objects.filter(user_id=user_id).select_related("city", "state", "country")
+
+            results[f"address_list/serializer/{rows}"] = self.measure(
+                lambda run: AddressSerializer(queryset[:PAGE_SIZE], many=True).data
+            )
+
+            url = f"/api/locations/addresses/?page_size={PAGE_SIZE}"
+            with override_settings(ADDRESS_CACHE_TTL=0):
+                results[f"address_list/first_page/{rows}"] = self.measure(lambda run: self.expect(client.get(url)))
+
+                # Walk to the last page once, then time fetching it by cursor.
+                last = url
+                while (next_url := self.expect(client.get(last)).json().get("next")) is not None:
+                    last = next_url
+                results[f"address_list/last_page/{rows}"] = self.measure(lambda run: self.expect(client.get(last)))
+
+            # Time response caching on a fresh file cache, so entries from earlier runs don't count.
+            with tempfile.TemporaryDirectory() as cache_dir:
+                responses = {"BACKEND": FILE_CACHE, "LOCATION": cache_dir}
+                with override_settings(CACHES={**settings.CACHES, "responses": responses}):
+                    results[f"address_list/first_page_cached/{rows}"] = self.measure(
+                        lambda run: self.expect(client.get(url))
+                    )
+        return results
+
+    def bench_route_create(self):
+        client = self.client(uuid.uuid4())
+        results = {}
+
+        def create(optimizer, size):
+            def call(run):
+                payload = {
+                    "name": f"bench {size}",
+                    "optimizer": optimizer,
+                    "origin": DEPOT,
+                    "destination": DEPOT,
+                    # Fresh stops every run, so the route cache never answers.
+                    "stops": make_stops(self.rng, size),
+                }
+                self.expect(client.post("/api/routing/create/", payload, content_type="application/json"), 201)
+
+            return call
+
+        for size in ROUTE_STOPS[self.quick]:
+            repeat = self.repeat if size < 1000 else min(self.repeat, 5)
+            results[f"route_create/local/{size}"] = self.measure(create("local", size), repeat=repeat)
+        for size in GOOGLE_STOPS:
+            results[f"route_create/google_stub/{size}"] = self.measure(create("google", size))
+        return results
+
+    def bench_nearby(self):
+        user_id, tenant_id = uuid.uuid4(), uuid.uuid4()
+        rows = NEARBY_ROWS[self.quick]
+        make_addresses(self.rng, self.cities, rows, user_id=user_id, tenant_id=tenant_id)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE "{Address._meta.db_table}"')
+        client = self.client(user_id, tenant_id)
+
+        def search(mode, extra):
+            def call(run):
+                lat, lng = self.random_point()
+                self.expect(client.get(f"/api/locations/addresses/nearby/?lat={lat}&lng={lng}&mode={mode}{extra}"))
+
+            return call
+
+        return {
+            f"nearby/radius_25mi/{rows}": self.measure(search("radius", "&radius=25")),
+            f"nearby/knn_10/{rows}": self.measure(search("knn", "&limit=10")),
+        }
+
+    def bench_matrix(self):
+        client = self.client(uuid.uuid4())
+        results = {}
+        for size in MATRIX_SIZES[self.quick]:
+            points = [{"latitude": lat, "longitude": lng} for lat, lng in (self.random_point() for _ in range(size))]
+            for encoding in ("json", "float32"):
+                body = {"origins": points, "destinations": points, "metric": "haversine", "encoding": encoding}
+                results[f"matrix/{encoding}/{size}x{size}"] = self.measure(
+                    lambda run: self.expect(client.post("/api/routing/matrix", body, content_type="application/json"))
+                )
+        return results
+
+    def bench_geocode_worker(self):
+        jobs = WORKER_JOBS[self.quick]
+        ids = make_addresses(self.rng, self.cities, jobs, user_id=uuid.uuid4())
+        Address.objects.filter(id__in=ids).update(is_valid=False)
+        enqueue_geocoding(ids)
+
+        started = time.perf_counter()
+        processed = 0
+        while batch := claim_jobs(100, "benchmark"):
+            process_jobs(batch, concurrency=10)
+            processed += len(batch)
+        elapsed = time.perf_counter() - started
+        return {
+            "geocode_worker/drain": {
+                "jobs": processed,
+                "seconds": round(elapsed, 3),
+                "jobs_per_second": round(processed / elapsed, 1) if elapsed else None,
+            }
+        }
+
+    # Reporting
+
+    @staticmethod
+    def git(*args):
+        try:
+            completed = subprocess.run(
+                ["git", *args], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10, check=True
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return completed.stdout.strip()
+
+    def metadata(self, options):
+        return {
+            "commit": self.git("rev-parse", "HEAD"),
+            "dirty": bool(self.git("status", "--porcelain", "--untracked-files=no")),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": connection.vendor,
+            "options": {
+                key: options[key] for key in ("scenarios", "quick", "seed", "upstream_latency") if key in options
+            }
+            | {"repeat": self.repeat},
+        }
+
+    def compare(self, path, results, threshold):
+        with open(path, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        regressions = []
+        self.stderr.write(f"Compared with {baseline.get('meta', {}).get('commit') or path}:")
+        for name, current in sorted(results.items()):
+            previous = baseline.get("results", {}).get(name)
+            if not previous or "p50_ms" not in current or not previous.get("p50_ms"):
+                continue
+            ratio = current["p50_ms"] / previous["p50_ms"]
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  REGRESSION"
+                regressions.append(name)
+            elif ratio < 1 - threshold:
+                flag = "  faster"
+            self.stderr.write(f"  {name}: {previous['p50_ms']} -> {current['p50_ms']} ms (x{ratio:.2f}){flag}")
+        return regressions
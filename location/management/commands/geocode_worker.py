@@ -0,0 +1,68 @@
+import json
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from location.utils.geocode_queue import claim_jobs, process_jobs, queue_metrics, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Run a geocoding worker that drains the GeocodeJob queue. Start as many as needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100, help="Jobs claimed per batch")
+        parser.add_argument("--concurrency", type=int, default=10, help="Concurrent upstream lookups per batch")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--stale-after", type=int, default=300, help="Seconds before a claimed job is re-queued")
+        parser.add_argument("--retry-interval", type=float, default=5.0, help="Seconds to wait after a failed batch")
+        parser.add_argument("--stats-interval", type=float, default=30.0, help="Seconds between metrics lines")
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+        parser.add_argument("--stats", action="store_true", help="Print queue metrics as JSON and exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(queue_metrics(), indent=2))
+            return
+
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f"Geocoding worker {worker_id} started")
+        stale_after = timedelta(seconds=options["stale_after"])
+        last_stats = time.monotonic()
+        while self.running:
+            close_old_connections()
+            try:
+                requeue_stale_jobs(stale_after)
+                jobs = claim_jobs(options["batch_size"], worker_id)
+                if jobs:
+                    process_jobs(jobs, concurrency=options["concurrency"])
+            except Exception as exc:
+                if options["once"]:
+                    raise
+                # Jobs claimed by the failed batch are re-queued once they are --stale-after old.
+                self.stderr.write(f"Geocoding batch failed, retrying: {exc}")
+                time.sleep(options["retry_interval"])
+                continue
+
+            if not jobs:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+
+            if time.monotonic() - last_stats >= options["stats_interval"]:
+                self.stdout.write(json.dumps(queue_metrics()))
+                last_stats = time.monotonic()
+
+        self.stdout.write(json.dumps(queue_metrics()))
+        self.stdout.write(f"Geocoding worker {worker_id} stopped")
+
+    def stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,30 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Load the full geography hierarchy in dependency order: country -> state -> city."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--countries", required=True, help="GeoNames countryInfo.txt")
+        parser.add_argument("--states", required=True, help="GeoNames admin1CodesASCII.txt")
+        parser.add_argument("--cities", required=True, help="GeoNames cities*.txt")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per insert")
+        parser.add_argument("--method", choices=["bulk", "copy"], default="bulk", help="bulk_create or COPY")
+
+    def handle(self, *args, **options):
+        steps = [
+            ("load_country", options["countries"]),
+            ("load_state", options["states"]),
+            ("load_city", options["cities"]),
+        ]
+        for command, path in steps:
+            self.stdout.write(f"Running {command} {path}")
+            call_command(
+                command,
+                path,
+                chunk_size=options["chunk_size"],
+                method=options["method"],
+                stdout=self.stdout,
+                stderr=self.stderr,
+            )
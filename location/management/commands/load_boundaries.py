@@ -0,0 +1,122 @@
+from pathlib import Path
+
+from django.contrib.gis.gdal import DataSource
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from location.models import City, Country, State
+from location.utils.reverse_geocode import reload_geocoder
+
+LEVELS = {"country": Country, "state": State, "city": City}
+
+
+class Command(BaseCommand):
+    help = (
+        "Attach boundary polygons from a shapefile or GeoJSON file (anything GDAL reads) to existing "
+        "Country, State or City rows, for reverse geocoding. Features are matched by code or name; "
+        "unmatched features are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Shapefile, GeoJSON or other OGR data source")
+        parser.add_argument("--level", choices=LEVELS, required=True)
+        parser.add_argument("--layer", default=0, help="Layer index or name inside the data source")
+        parser.add_argument("--name-field", default="NAME", help="Feature field with the place name")
+        parser.add_argument("--code-field", help="Feature field with the ISO code (countries, states)")
+        parser.add_argument("--country-field", help="Feature field with the country ISO code")
+        parser.add_argument("--country", help="Country ISO code for every feature (instead of --country-field)")
+        parser.add_argument("--state-field", help="Feature field with the state code (cities)")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+        level = options["level"]
+        if level != "country" and not (options["country"] or options["country_field"]):
+            raise CommandError("--country or --country-field is required for states and cities.")
+
+        layer = options["layer"]
+        layer = DataSource(str(path))[int(layer) if str(layer).isdigit() else layer]
+        self.prepare(level)
+
+        updated, skipped, batch = 0, 0, []
+        for feature in layer:
+            pk = self.match(level, feature, options)
+            geometry = self.boundary(feature)
+            if pk is None or geometry is None:
+                skipped += 1
+                continue
+            # updated_at moves the boundary version that running servers poll (see reverse_geocode).
+            batch.append(LEVELS[level](id=pk, boundary=geometry, updated_at=timezone.now()))
+            if len(batch) >= options["chunk_size"]:
+                updated += self.save(level, batch)
+                batch = []
+        if batch:
+            updated += self.save(level, batch)
+
+        reload_geocoder()
+        self.stdout.write(self.style.SUCCESS(f"Attached {updated} {level} boundaries ({skipped} features skipped)."))
+
+    def prepare(self, level):
+        self.countries = {code.upper(): pk for pk, code in Country.objects.values_list("id", "code")}
+        self.country_names = {name.upper(): pk for pk, name in Country.objects.values_list("id", "name")}
+        self.states = {}
+        for pk, country_id, name, code in State.objects.values_list("id", "country_id", "name", "code"):
+            self.states[(country_id, name.upper())] = pk
+            if code:
+                self.states[(country_id, code.upper())] = pk
+        if level == "city":
+            self.cities = {
+                (country_id, state_id, name.upper()): pk
+                for pk, country_id, state_id, name in City.objects.values_list("id", "country_id", "state_id", "name")
+            }
+
+    @staticmethod
+    def field(feature, name):
+        if not name:
+            return ""
+        value = feature.get(name)
+        return str(value).strip().upper() if value is not None else ""
+
+    def match(self, level, feature, options):
+        name = self.field(feature, options["name_field"])
+        code = self.field(feature, options["code_field"])
+        if level == "country":
+            return self.countries.get(code) or self.country_names.get(name)
+
+        country_code = (options["country"] or self.field(feature, options["country_field"])).upper()
+        country_id = self.countries.get(country_code)
+        if country_id is None:
+            return None
+        if level == "state":
+            return self.states.get((country_id, code)) or self.states.get((country_id, name))
+
+        state_id = self.states.get((country_id, self.field(feature, options["state_field"])))
+        return self.cities.get((country_id, state_id, name[:100])) or self.cities.get((country_id, None, name[:100]))
+
+    @staticmethod
+    def boundary(feature):
+        try:
+            geometry = feature.geom.geos
+        except Exception:
+            return None
+        if geometry.srid and geometry.srid != 4326:
+            geometry.transform(4326)
+        if not isinstance(geometry, (Polygon, MultiPolygon)) or geometry.empty:
+            return None
+        if not geometry.valid:
+            # Self-intersecting rings are common in public boundary files.
+            geometry = geometry.buffer(0)
+        if isinstance(geometry, Polygon):
+            geometry = MultiPolygon(geometry)
+        geometry.srid = 4326
+        return geometry
+
+    @staticmethod
+    def save(level, batch):
+        with transaction.atomic():
+            LEVELS[level].objects.bulk_update(batch, ["boundary", "updated_at"])
+        return len(batch)
@@ -0,0 +1,55 @@
+from location.models import City, Country, State
+from location.utils.bulk_load import BulkLoadCommand
+
+# GeoNames cities*.txt / allCountries.txt columns
+NAME = 1
+FEATURE_CLASS = 6
+COUNTRY_CODE = 8
+ADMIN1_CODE = 10
+
+
+class Command(BulkLoadCommand):
+    help = "Stream cities from a GeoNames cities*.txt file into the City table."
+
+    model = City
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--all-features",
+            action="store_true",
+            help="Load every row, not only populated places (feature class P)",
+        )
+
+    def prepare(self):
+        self.countries = dict(Country.objects.values_list("code", "id"))
+        self.states = {
+            (country_id, code.upper()): pk
+            for pk, country_id, code in State.objects.exclude(code__isnull=True)
+            .exclude(code="")
+            .values_list("id", "country_id", "code")
+        }
+        self.existing = set(City.objects.values_list("country_id", "state_id", "name"))
+
+    def handle(self, *args, **options):
+        self.all_features = options["all_features"]
+        super().handle(*args, **options)
+
+    def parse_row(self, fields):
+        if len(fields) <= ADMIN1_CODE:
+            return None
+        if not self.all_features and fields[FEATURE_CLASS] != "P":
+            return None
+
+        country_id = self.countries.get(fields[COUNTRY_CODE].strip().upper())
+        if country_id is None:
+            return None
+
+        state_id = self.states.get((country_id, fields[ADMIN1_CODE].strip().upper()))
+        name = fields[NAME].strip().upper()
+        key = (country_id, state_id, name)
+        if not name or key in self.existing:
+            return None
+
+        self.existing.add(key)
+        return City(name=name[:100], state_id=state_id, country_id=country_id)
@@ -0,0 +1,46 @@
+from location.models import Country
+from location.utils.bulk_load import BulkLoadCommand
+from location.utils.response_cache import bump_global_version
+
+# GeoNames countryInfo.txt columns
+ISO = 0
+NAME = 4
+LANGUAGES = 15
+
+
+class Command(BulkLoadCommand):
+    help = "Stream countries from a GeoNames countryInfo.txt file into the Country table."
+
+    model = Country
+
+    def prepare(self):
+        self.existing = {code: (pk, name) for pk, code, name in Country.objects.values_list("id", "code", "name")}
+        self.renames = []
+
+    def parse_row(self, fields):
+        if len(fields) <= LANGUAGES:
+            return None
+
+        code = fields[ISO].strip().upper()
+        name = fields[NAME].strip()
+        if len(code) != 2 or not name:
+            return None
+
+        if code in self.existing:
+            pk, current_name = self.existing[code]
+            if not current_name:
+                # Countries created through the serializer only carry a code.
+                self.renames.append(Country(id=pk, name=name))
+            return None
+
+        language = (fields[LANGUAGES].split(",")[0].split("-")[0] or "en").lower()
+        self.existing[code] = (None, name)
+        return Country(code=code, name=name, language=language[:10])
+
+    def flush(self, instances, method):
+        if self.renames:
+            Country.objects.bulk_update(self.renames, ["name"])
+            # bulk_update skips the signals that invalidate cached address responses.
+            bump_global_version()
+            self.renames = []
+        return super().flush(instances, method)
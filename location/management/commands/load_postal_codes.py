@@ -0,0 +1,118 @@
+import csv
+import json
+from pathlib import Path
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand, CommandError
+
+from location.models import PostalCode
+from location.utils.postal_radius import reload_engine
+
+CODE_COLUMNS = ("code", "zip", "zip_code", "postal_code", "zipcode", "ZCTA5CE20", "GEOID20")
+LATITUDE_COLUMNS = ("latitude", "lat", "INTPTLAT20", "INTPTLAT")
+LONGITUDE_COLUMNS = ("longitude", "lng", "lon", "INTPTLON20", "INTPTLON")
+CITY_COLUMNS = ("city", "city_name", "place_name")
+STATE_COLUMNS = ("state", "state_code", "admin_code1")
+
+
+def _pick(record, columns, default=None):
+    for column in columns:
+        value = record.get(column)
+        if value not in (None, ""):
+            return value
+    return default
+
+
+class Command(BaseCommand):
+    help = "Load ZIP/postal code centroids from a local CSV or GeoJSON file into the PostalCode table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or GeoJSON FeatureCollection")
+        parser.add_argument("--country", default="US", help="Two-letter country code for the loaded rows")
+        parser.add_argument("--format", choices=["csv", "geojson"], help="Defaults to the file extension")
+        parser.add_argument("--delimiter", default=",", help="CSV delimiter")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        file_format = options["format"] or ("geojson" if path.suffix.lower() in (".json", ".geojson") else "csv")
+        records = self.read_geojson(path) if file_format == "geojson" else self.read_csv(path, options["delimiter"])
+
+        country_code = options["country"].upper()
+        loaded = skipped = duplicates = 0
+        batch = []
+        # GeoNames dumps list a code once per place name. The first row wins: a code repeated
+        # within one upsert batch would make ON CONFLICT DO UPDATE fail.
+        seen = set()
+        for record in records:
+            postal_code = self.build(record, country_code)
+            if postal_code is None:
+                skipped += 1
+                continue
+            if postal_code.code in seen:
+                duplicates += 1
+                continue
+            seen.add(postal_code.code)
+            batch.append(postal_code)
+            if len(batch) >= options["chunk_size"]:
+                loaded += self.save(batch)
+                batch = []
+        if batch:
+            loaded += self.save(batch)
+
+        reload_engine(country_code)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {loaded} postal codes ({skipped} rows skipped, {duplicates} duplicate codes ignored)."
+            )
+        )
+
+    @staticmethod
+    def read_csv(path, delimiter):
+        with path.open(newline="", encoding="utf-8") as handle:
+            yield from csv.DictReader(handle, delimiter=delimiter)
+
+    @staticmethod
+    def read_geojson(path):
+        with path.open(encoding="utf-8") as handle:
+            collection = json.load(handle)
+        for feature in collection.get("features", []):
+            record = dict(feature.get("properties") or {})
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Point":
+                record["longitude"], record["latitude"] = geometry["coordinates"][:2]
+            yield record
+
+    @staticmethod
+    def build(record, country_code):
+        code = _pick(record, CODE_COLUMNS)
+        try:
+            latitude = float(_pick(record, LATITUDE_COLUMNS))
+            longitude = float(_pick(record, LONGITUDE_COLUMNS))
+        except (TypeError, ValueError):
+            return None
+        if not code:
+            return None
+
+        return PostalCode(
+            code=str(code).strip(),
+            country_code=country_code,
+            city_name=str(_pick(record, CITY_COLUMNS, "")).strip().upper(),
+            state_code=str(_pick(record, STATE_COLUMNS, "")).strip().upper(),
+            latitude=latitude,
+            longitude=longitude,
+            location=Point(longitude, latitude, srid=4326),
+        )
+
+    @staticmethod
+    def save(batch):
+        PostalCode.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["country_code", "code"],
+            update_fields=["city_name", "state_code", "latitude", "longitude", "location", "updated_at"],
+        )
+        return len(batch)
@@ -0,0 +1,56 @@
+from location.models import Country, State
+from location.utils.bulk_load import BulkLoadCommand
+from location.utils.response_cache import bump_global_version
+
+# GeoNames admin1CodesASCII.txt columns: "US.OH", "Ohio", "Ohio", geonameid
+CODE = 0
+NAME = 1
+
+
+class Command(BulkLoadCommand):
+    help = "Stream states/provinces from a GeoNames admin1CodesASCII.txt file into the State table."
+
+    model = State
+
+    def prepare(self):
+        self.countries = dict(Country.objects.values_list("code", "id"))
+        self.existing = {
+            (country_id, name): (pk, code)
+            for pk, country_id, name, code in State.objects.values_list("id", "country_id", "name", "code")
+        }
+        self.recodes = []
+        self.missing_countries = set()
+
+    def parse_row(self, fields):
+        if len(fields) <= NAME or "." not in fields[CODE]:
+            return None
+
+        country_code, state_code = fields[CODE].strip().upper().split(".", 1)
+        country_id = self.countries.get(country_code)
+        if country_id is None:
+            self.missing_countries.add(country_code)
+            return None
+
+        name = fields[NAME].strip().upper()
+        key = (country_id, name)
+        if key in self.existing:
+            pk, current_code = self.existing[key]
+            if pk and not current_code:
+                self.recodes.append(State(id=pk, code=state_code))
+            return None
+
+        self.existing[key] = (None, state_code)
+        return State(name=name, code=state_code, country_id=country_id)
+
+    def flush(self, instances, method):
+        if self.recodes:
+            State.objects.bulk_update(self.recodes, ["code"])
+            # bulk_update skips the signals that invalidate cached address responses.
+            bump_global_version()
+            self.recodes = []
+        return super().flush(instances, method)
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        if self.missing_countries:
+            self.stderr.write(f"Skipped rows for unknown countries: {', '.join(sorted(self.missing_countries))}")
@@ -0,0 +1,118 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the address read endpoints (list, retrieve, nearby) on running servers and report "
+        "requests/s and latency percentiles per target. Start the servers first, e.g. the async views under\n"
+        "  gunicorn core.asgi:application --bind 0.0.0.0:8000\n"
+        "and the sync DRF handlers (core/wsgi.py sets ASYNC_ADDRESS_READS=false) under\n"
+        "  gunicorn core.wsgi:application --worker-class gthread --threads 8 --bind 0.0.0.0:8001\n"
+        "then: manage.py loadtest_reads --target asgi=http://localhost:8000 --target wsgi=http://localhost:8001"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target", action="append", required=True, help="name=base_url; repeat to compare servers"
+        )
+        parser.add_argument("--user-id", required=True, help="User whose addresses are read (token subject)")
+        parser.add_argument("--concurrency", type=int, default=50, help="Concurrent client connections")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds per endpoint and target")
+        parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured traffic first")
+        parser.add_argument("--lat", type=float, default=39.7589, help="Nearby search latitude")
+        parser.add_argument("--lng", type=float, default=-84.1916, help="Nearby search longitude")
+        parser.add_argument("--radius", type=float, default=10.0, help="Nearby search radius (mi)")
+
+    def handle(self, *args, **options):
+        token = AccessToken()
+        token["user_id"] = options["user_id"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        report = []
+        for target in options["target"]:
+            name, _, base_url = target.partition("=")
+            if not base_url:
+                raise CommandError(f"--target must look like name=url, got {target!r}")
+            base_url = base_url.rstrip("/")
+
+            first_page = requests.get(f"{base_url}/api/locations/addresses/", headers=headers, timeout=10)
+            if first_page.status_code != 200:
+                raise CommandError(f"{name}: list returned {first_page.status_code}: {first_page.text[:200]}")
+            results = first_page.json()["results"]
+            if not results:
+                raise CommandError(f"{name}: user {options['user_id']} has no addresses to read")
+
+            endpoints = {
+                "list": f"{base_url}/api/locations/addresses/",
+                "retrieve": f"{base_url}/api/locations/addresses/{results[0]['id']}/",
+                "nearby": (
+                    f"{base_url}/api/locations/addresses/nearby/"
+                    f"?lat={options['lat']}&lng={options['lng']}&radius={options['radius']}"
+                ),
+            }
+            for endpoint, url in endpoints.items():
+                self.run(url, headers, options["concurrency"], options["warmup"])
+                latencies, errors, elapsed = self.run(url, headers, options["concurrency"], options["duration"])
+                report.append(self.summarize(name, endpoint, latencies, errors, elapsed))
+                self.stderr.write(f"{name} {endpoint}: {report[-1]['rps']} req/s, p99 {report[-1]['p99_ms']} ms")
+
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run(self, url, headers, concurrency, duration):
+        """Hit `url` from `concurrency` keep-alive sessions for `duration` seconds."""
+        deadline = time.perf_counter() + duration
+        latencies, errors = [], 0
+        lock = threading.Lock()
+
+        def client():
+            nonlocal errors
+            session = requests.Session()
+            session.headers.update(headers)
+            local, failed = [], 0
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    ok = session.get(url, timeout=30).status_code == 200
+                except requests.RequestException:
+                    ok = False
+                if ok:
+                    local.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+            with lock:
+                latencies.extend(local)
+                errors += failed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for _ in range(concurrency):
+                executor.submit(client)
+        return latencies, errors, time.perf_counter() - started
+
+    @staticmethod
+    def summarize(target, endpoint, latencies, errors, elapsed):
+        latencies = sorted(latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+
+        return {
+            "target": target,
+            "endpoint": endpoint,
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+        }
@@ -0,0 +1,62 @@
+import json
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from location.utils.change_stream import get_broker, relay_batch, relay_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Relay the ChangeEvent outbox to Kafka (KAFKA_TOPIC). Rows are deleted only after the broker "
+        "acknowledges them, so delivery is at least once. Run one relay per topic to keep per-row order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.CHANGE_STREAM_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=0.2, help="Seconds to sleep when the outbox is empty")
+        parser.add_argument("--retry-interval", type=float, default=5.0, help="Seconds to wait after a broker error")
+        parser.add_argument("--stats-interval", type=float, default=30.0, help="Seconds between metrics lines")
+        parser.add_argument("--once", action="store_true", help="Drain the outbox once and exit")
+        parser.add_argument("--stats", action="store_true", help="Print relay metrics as JSON and exit")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(relay_metrics(), indent=2))
+            return
+
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        broker = get_broker()
+        self.stdout.write(f"Change relay started ({settings.CHANGE_STREAM_BROKER} -> {settings.KAFKA_TOPIC})")
+        last_stats = time.monotonic()
+        while self.running:
+            close_old_connections()
+            try:
+                relayed = relay_batch(broker, options["batch_size"])
+            except Exception as exc:
+                if options["once"]:
+                    raise
+                self.stderr.write(f"Relay batch failed, retrying: {exc}")
+                time.sleep(options["retry_interval"])
+                continue
+
+            if not relayed:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+
+            if time.monotonic() - last_stats >= options["stats_interval"]:
+                self.stdout.write(json.dumps(relay_metrics()))
+                last_stats = time.monotonic()
+
+        self.stdout.write(json.dumps(relay_metrics()))
+        self.stdout.write("Change relay stopped")
+
+    def stop(self, signum, frame):
+        self.running = False
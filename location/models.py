@@ -1,6 +1,8 @@
 import uuid
 from django.contrib.gis.db import models
 from django.contrib.gis.geos import Point
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 
 def default_location():
@@ -25,6 +27,7 @@ class Country(BaseModel):
     name = models.CharField(max_length=100)
     language = models.CharField(max_length=10, default="en", help_text="Primary language code")
     timezone = models.CharField(max_length=50, default="UTC", help_text="Default timezone")
+    boundary = models.MultiPolygonField(srid=4326, blank=True, null=True, help_text="Used for reverse geocoding")
 
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -38,6 +41,7 @@ class State(BaseModel):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10, blank=True, null=True)
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="states")
+    boundary = models.MultiPolygonField(srid=4326, blank=True, null=True, help_text="Used for reverse geocoding")
 
     def __str__(self):
         return f"{self.name}, {self.country.code}"
@@ -51,6 +55,7 @@ class City(BaseModel):
     name = models.CharField(max_length=100)
     state = models.ForeignKey(State, on_delete=models.CASCADE, related_name="cities", blank=True, null=True)
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name="cities")
+    boundary = models.MultiPolygonField(srid=4326, blank=True, null=True, help_text="Used for reverse geocoding")
 
     def __str__(self):
         if self.state:
@@ -86,6 +91,7 @@ class Address(BaseModel):
         indexes = [
             models.Index(fields=["postal_code", "city", "state"]),
             models.Index(fields=["location"], name="location_idx"),  # ✅ Spatial Index for faster lookup
+            models.Index(fields=["user_id", "-created_at", "-id"], name="address_user_keyset_idx"),
         ]
         unique_together = ["address_line_1", "address_line_2", "city", "state", "country", "postal_code", "user_id"]
         db_table = "Address"
@@ -94,6 +100,36 @@ class Address(BaseModel):
         return f"{self.address_line_1}, {self.city.name}, {self.state.name if self.state else ''}, {self.country.code}"
 
 
+class GeocodeJob(BaseModel):
+    """Outbox of addresses waiting to be geocoded by the background worker."""
+    PENDING = "pending"
+    PROCESSING = "processing"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (PROCESSING, "Processing"), (FAILED, "Failed")]
+
+    address = models.ForeignKey(Address, on_delete=models.CASCADE, related_name="geocode_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Earliest time a worker may claim the job")
+    locked_at = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="geocode_job_claim_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["address"], condition=models.Q(status="pending"), name="geocode_job_one_pending"
+            ),
+        ]
+        db_table = "GeocodeJob"
+
+    def __str__(self):
+        return f"{self.address_id} ({self.status})"
+
+
 class Coordinates(BaseModel):
     """Stores latitude and longitude separately if needed."""
     latitude = models.FloatField(help_text="Latitude coordinate")
@@ -104,4 +140,59 @@ class Coordinates(BaseModel):
         db_table = "coordinates"
 
     def __str__(self):
-        return f"Lat: {self.latitude}, Lon: {self.longitude}"
\ No newline at end of file
+        return f"Lat: {self.latitude}, Lon: {self.longitude}"
+
+class PostalCode(BaseModel):
+    """Stores postal/ZIP code centroids used for offline radius searches."""
+    code = models.CharField(max_length=20)
+    country_code = models.CharField(max_length=2, default="US")
+    city_name = models.CharField(max_length=100, blank=True, default="")
+    state_code = models.CharField(max_length=10, blank=True, default="")
+    latitude = models.FloatField(help_text="Centroid latitude")
+    longitude = models.FloatField(help_text="Centroid longitude")
+    location = models.PointField(geography=True, srid=4326, default=default_location)
+
+    class Meta:
+        unique_together = ["country_code", "code"]
+        db_table = "PostalCode"
+
+    def __str__(self):
+        return f"{self.code} ({self.country_code})"
+
+
+class GeocodeResult(BaseModel):
+    """Persistent geocoding cache keyed on the normalized address string."""
+    query = models.CharField(max_length=512, unique=True, help_text="Normalized address string")
+    status = models.CharField(max_length=20, help_text="Geocoding API status, e.g. OK or ZERO_RESULTS")
+    result = models.JSONField(default=dict, help_text="Structured address returned by validate_address")
+    location = models.PointField(geography=True, srid=4326, blank=True, null=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "GeocodeResult"
+
+    def __str__(self):
+        return f"{self.query} ({self.status})"
+
+
+class ChangeEvent(models.Model):
+    """Transactional outbox of Address/Route/RouteStop changes, relayed to Kafka by `relay_changes`."""
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+    OP_CHOICES = [(CREATE, "Create"), (UPDATE, "Update"), (DELETE, "Delete")]
+
+    id = models.BigAutoField(primary_key=True)
+    entity = models.CharField(max_length=30, help_text="e.g. address, route, route_stop")
+    key = models.CharField(max_length=64, help_text="Primary key of the changed row")
+    op = models.CharField(max_length=10, choices=OP_CHOICES)
+    data = models.JSONField(
+        blank=True, null=True, encoder=DjangoJSONEncoder, help_text="Changed fields; null for deletes"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "ChangeEvent"
+
+    def __str__(self):
+        return f"{self.entity}:{self.key} {self.op}"
@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Keyset (cursor) pagination over (created_at, id), newest first.
+    Unlike offset pagination, every page costs one index range scan regardless of depth.
+    Works with DRF requests and plain Django requests; `apaginate_queryset` is the async variant.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 500
+
+    def __init__(self, request):
+        self.request = request
+        self.query_params = getattr(request, "query_params", request.GET)
+        self.next_cursor = None
+
+    def get_page_size(self):
+        try:
+            page_size = int(self.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be an integer."})
+        return max(1, min(page_size, self.max_page_size))
+
+    @staticmethod
+    def encode_cursor(created_at, pk):
+        raw = f"{created_at.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor, pk_field=None):
+        """Return (created_at, pk); `pk_field` parses the pk, so a tampered cursor fails here, not in the query."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, pk = raw.split("|", 1)
+            if pk_field is not None:
+                pk = pk_field.to_python(pk)
+            return datetime.fromisoformat(created_at), pk
+        except (ValueError, UnicodeDecodeError, DjangoValidationError):
+            raise ValidationError({"cursor": "Invalid cursor."})
+
+    def page_queryset(self, queryset):
+        """Apply the cursor and limit to `queryset`, fetching one extra row to detect a next page."""
+        cursor = self.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor, queryset.model._meta.pk)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return queryset.order_by("-created_at", "-id")[: self.get_page_size() + 1]
+
+    def paginate_queryset(self, queryset):
+        """Return one page of `queryset`; rows must expose `created_at` and `id`."""
+        return self.trim_page(list(self.page_queryset(queryset)))
+
+    async def apaginate_queryset(self, queryset):
+        """Async variant of `paginate_queryset`, using async iteration over the queryset."""
+        return self.trim_page([row async for row in self.page_queryset(queryset)])
+
+    def trim_page(self, rows):
+        page_size = self.get_page_size()
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            if isinstance(last, dict):
+                self.next_cursor = self.encode_cursor(last["created_at"], last["id"])
+            else:
+                self.next_cursor = self.encode_cursor(last.created_at, last.id)
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {"next": self.get_next_link(), "results": data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
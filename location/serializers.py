@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Address, City, State, Country
+from .utils.hierarchy import resolve_location
 
 
 class CitySerializer(serializers.ModelSerializer):
@@ -46,9 +47,7 @@ class AddressSerializer(serializers.ModelSerializer):
         country_code = data.get("country", "").strip().upper()
 
         try:
-            country, _ = Country.objects.get_or_create(code=country_code)
-            state, _ = State.objects.get_or_create(name=state_name, country=country)
-            city, _ = City.objects.get_or_create(name=city_name, state=state, country=country)
+            country, state, city = resolve_location(country_code, state_name, city_name)
 
         except Exception as e:
             raise serializers.ValidationError({"error": f"Error creating location objects: {str(e)}"})
@@ -75,7 +74,9 @@ class AddressSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = self.context.pop("user", "")
         validated_data["user_id"] = user.user_id if user else None
-        return Address.objects.get_or_create(**validated_data)[0]
+        # tenant_id isn't part of the unique key, so it only applies to newly created rows
+        defaults = {"tenant_id": getattr(user, "tenant_id", None)}
+        return Address.objects.get_or_create(**validated_data, defaults=defaults)[0]
 
     def update(self, instance, validated_data):
         address_1 = validated_data.pop("address_line_1", {})
@@ -95,9 +96,7 @@ class AddressSerializer(serializers.ModelSerializer):
         if not country_code:
             raise serializers.ValidationError({"error": "Country is required."})
 
-        country, _ = Country.objects.get_or_create(code=country_code.code)
-        state, _ = State.objects.get_or_create(name=state_name.name, country=country)
-        city, _ = City.objects.get_or_create(name=city_name.name, state=state, country=country)
+        country, state, city = resolve_location(country_code.code, state_name.name, city_name.name)
 
         validated_data["address_line_1"] = address_1
         validated_data["postal_code"] = postal_code
@@ -109,4 +108,46 @@ class AddressSerializer(serializers.ModelSerializer):
             setattr(instance, attr, value)
 
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+
+class AddressRepresenter:
+    """
+    Lightweight read-only representation of addresses for list endpoints.
+    Rows are fetched with `.values()` (one joined query, only the needed columns)
+    and turned into the same shape as `AddressSerializer.to_representation`.
+    """
+
+    fields = (
+        "id",
+        "address_line_1",
+        "address_line_2",
+        "postal_code",
+        "city__name",
+        "state__name",
+        "country__code",
+        "is_billing",
+        "created_at",
+    )
+
+    @classmethod
+    def queryset(cls, queryset):
+        return queryset.values(*cls.fields)
+
+    @staticmethod
+    def represent(row):
+        return {
+            "id": str(row["id"]),
+            "address_line_1": row["address_line_1"],
+            "address_line_2": row["address_line_2"],
+            "postal_code": row["postal_code"],
+            "city": row["city__name"],
+            "state": row["state__name"],
+            "country": row["country__code"],
+            "is_billing": row["is_billing"],
+        }
+
+    @classmethod
+    def represent_many(cls, rows):
+        represent = cls.represent
+        return [represent(row) for row in rows]
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Address, ChangeEvent, City, Country, State
+from .utils.autocomplete import address_changed, address_deleted, place_changed, place_deleted, scope_for
+from .utils.change_stream import record_changes
+from .utils.geocode_queue import enqueue_geocoding
+from .utils.hierarchy import invalidate_city, invalidate_country, invalidate_state
+from .utils.response_cache import bump_global_version, bump_user_version
+from .utils.reverse_geocode import check_boundaries
+
+GEOCODED_FIELDS = {"address_line_1", "address_line_2", "postal_code", "city", "state", "country"}
+
+
+@receiver([post_save, post_delete], sender=Country)
+def invalidate_cached_country(sender, instance, **kwargs):
+    invalidate_country(instance.pk)
+    bump_global_version()
+    transaction.on_commit(check_boundaries)
+
+
+@receiver([post_save, post_delete], sender=State)
+def invalidate_cached_state(sender, instance, **kwargs):
+    invalidate_state(instance.pk)
+    bump_global_version()
+    transaction.on_commit(check_boundaries)
+
+
+@receiver([post_save, post_delete], sender=City)
+def invalidate_cached_city(sender, instance, **kwargs):
+    invalidate_city(instance.pk)
+    bump_global_version()
+    transaction.on_commit(check_boundaries)
+
+
+@receiver(post_save, sender=Address)
+def enqueue_address_geocoding(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or GEOCODED_FIELDS & set(update_fields):
+        enqueue_geocoding([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Address)
+def invalidate_cached_address_responses(sender, instance, **kwargs):
+    bump_user_version(instance.user_id)
+
+
+def address_scopes(instance):
+    return {scope_for(instance.tenant_id, instance.user_id), scope_for(None, instance.user_id)}
+
+
+# Loaded autocomplete indexes are only touched once the write commits, so rolled-back rows never
+# show up in suggestions.
+@receiver(post_save, sender=Address)
+def index_saved_address(sender, instance, **kwargs):
+    pk, scopes = instance.pk, address_scopes(instance)
+    transaction.on_commit(lambda: address_changed(pk, scopes))
+
+
+@receiver(post_delete, sender=Address)
+def unindex_deleted_address(sender, instance, **kwargs):
+    pk, scopes = instance.pk, address_scopes(instance)
+    transaction.on_commit(lambda: address_deleted(pk, scopes))
+
+
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=City)
+def index_saved_place(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: place_changed(sender, pk))
+
+
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=City)
+def unindex_deleted_place(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: place_deleted(sender, pk))
+
+
+@receiver(post_save, sender=Address)
+def record_saved_address(sender, instance, created, update_fields=None, **kwargs):
+    record_changes(ChangeEvent.CREATE if created else ChangeEvent.UPDATE, [instance], fields=update_fields)
+
+
+@receiver(post_delete, sender=Address)
+def record_deleted_address(sender, instance, **kwargs):
+    record_changes(ChangeEvent.DELETE, [instance])
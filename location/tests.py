@@ -1,3 +1,781 @@
-from django.test import TestCase
+import base64
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.asgi import application
+from core.http import reset_clients
+from .authentication import CustomJWTAuthentication, SimulatedUser, clear_jwt_cache, jwt_cache_stats
+from core.stub_server import StubProviderServer
+from .models import Address, ChangeEvent, City, Country, GeocodeJob, PostalCode, State
+from .serializers import AddressSerializer
+from .views import AddressViewSet
+from .utils.address_validation import clear_geocode_cache, geocode_cache_stats, validate_address
+from .utils.autocomplete import clear_indexes
+from .utils import bulk_import
+from .utils.bulk_import import import_addresses, normalize_row
+from .utils.change_stream import InMemoryBroker, relay_batch
+from .utils.geocode_queue import claim_jobs, enqueue_geocoding, process_jobs
+from .utils.hierarchy import clear_location_cache, resolve_location
+from .utils.postal_radius import EARTH_RADIUS, PostalRadiusEngine
+from .utils.reverse_geocode import STRtree, check_boundaries, get_geocoder, reload_geocoder
+
+
+GEOCODE_OK = {
+    "status": "OK",
+    "results": [
+        {
+            "address_components": [
+                {"long_name": "100", "short_name": "100", "types": ["street_number"]},
+                {"long_name": "Main Street", "short_name": "Main St", "types": ["route"]},
+                {"long_name": "Dayton", "short_name": "Dayton", "types": ["locality"]},
+                {"long_name": "Ohio", "short_name": "OH", "types": ["administrative_area_level_1"]},
+                {"long_name": "United States", "short_name": "US", "types": ["country"]},
+                {"long_name": "45402", "short_name": "45402", "types": ["postal_code"]},
+            ],
+            "geometry": {"location": {"lat": 39.7589, "lng": -84.1916}},
+        }
+    ],
+}
+
+
+def stub_providers(stub):
+    """Point the google_maps provider at a local stub server, without retry backoff."""
+    return override_settings(
+        PROVIDERS={"google_maps": {"base_url": stub.url, "max_retries": 2, "backoff_factor": 0, "timeout": 2}}
+    )
+
+
+class SimulatedRequestUser:
+    user_id = "7c9e6679-7425-40de-944b-e07fc1f99a4a"
+
+
+def address_payload(line_1="100 Main St"):
+    return {
+        "address_line_1": line_1,
+        "address_line_2": "",
+        "postal_code": "45402",
+        "city": "Dayton",
+        "state": "Ohio",
+        "country": "US",
+    }
+
+
+class AddressTestCase(TestCase):
+    """Starts and ends every test with an empty location hierarchy cache."""
+
+    def setUp(self):
+        clear_location_cache()
+        self.addCleanup(clear_location_cache)
+
+
+class LocationHierarchyCacheTests(AddressTestCase):
+    def test_known_location_costs_no_queries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            resolve_location("US", "OHIO", "DAYTON")
+        with self.assertNumQueries(0):
+            resolve_location("us", " Ohio ", "dayton")
+
+    def test_rolled_back_rows_are_not_cached(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    resolve_location("US", "OHIO", "DAYTON")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+
+        country, state, city = resolve_location("US", "OHIO", "DAYTON")
+        self.assertTrue(City.objects.filter(pk=city.pk, state=state, country=country).exists())
+
+    def test_rename_invalidates_cached_city(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            _, _, city = resolve_location("US", "OHIO", "DAYTON")
+        city.name = "KETTERING"
+        city.save()
+
+        _, _, resolved = resolve_location("US", "OHIO", "DAYTON")
+        self.assertNotEqual(resolved.pk, city.pk)
+
+    def test_create_query_count(self):
+        """Creating an address in a known location only costs the Address write itself."""
+        with CaptureQueriesContext(connection) as cold, self.captureOnCommitCallbacks(execute=True):
+            self._create(address_payload("1 First St"))
+        with CaptureQueriesContext(connection) as warm:
+            self._create(address_payload("2 Second St"))
+        with CaptureQueriesContext(connection) as address_only:
+            Address.objects.get_or_create(
+                address_line_1="3 Third St",
+                address_line_2="",
+                postal_code="45402",
+                city=resolve_location("US", "OHIO", "DAYTON")[2],
+                state=resolve_location("US", "OHIO", "DAYTON")[1],
+                country=resolve_location("US", "OHIO", "DAYTON")[0],
+                user_id=SimulatedRequestUser.user_id,
+            )
+
+        self.assertGreaterEqual(len(cold), len(warm) + 3)
+        self.assertEqual(len(warm), len(address_only))
+
+    def _create(self, payload):
+        serializer = AddressSerializer(data=payload, context={"user": SimulatedRequestUser()})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+
+class GeocodeProviderTests(AddressTestCase):
+    def setUp(self):
+        super().setUp()
+        clear_geocode_cache()
+        reset_clients()
+        self.addCleanup(reset_clients)
+
+    def test_repeated_address_is_served_from_cache(self):
+        with StubProviderServer({"/maps/api/geocode/json": GEOCODE_OK}) as stub, stub_providers(stub):
+            first = validate_address("100 Main St, Dayton, OH")
+            second = validate_address("  100 main st ,dayton, oh ")
+
+        self.assertTrue(first["valid"])
+        self.assertEqual(first, second)
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(geocode_cache_stats()["memory_hits"], 1)
+
+    def test_transient_errors_are_retried(self):
+        responses = iter([(503, {}), (200, GEOCODE_OK)])
+
+        with StubProviderServer({"/maps/api/geocode/json": lambda params: next(responses)}) as stub, stub_providers(stub):
+            result = validate_address("100 Main St, Dayton, OH")
+
+        self.assertTrue(result["valid"])
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_unreachable_provider_reports_invalid(self):
+        with StubProviderServer({}) as stub, stub_providers(stub):
+            result = validate_address("100 Main St, Dayton, OH")
+
+        self.assertFalse(result["valid"])
+        self.assertEqual(geocode_cache_stats()["memory_size"], 0)
+
+    def test_quota_and_configuration_errors_keep_the_job_queued(self):
+        serializer = AddressSerializer(data=address_payload(), context={"user": SimulatedRequestUser()})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        address = serializer.save()
+        Address.objects.filter(pk=address.pk).update(is_valid=True)
+
+        for status in ("OVER_QUERY_LIMIT", "REQUEST_DENIED", "INVALID_REQUEST"):
+            GeocodeJob.objects.all().delete()
+            enqueue_geocoding([address.pk])
+            with StubProviderServer({"/maps/api/geocode/json": {"status": status}}) as stub:
+                with stub_providers(stub):
+                    process_jobs(claim_jobs(10, "test"))
+
+            job = GeocodeJob.objects.get(address=address)
+            self.assertEqual(job.status, GeocodeJob.PENDING)
+            self.assertIn(status, job.last_error)
+            address.refresh_from_db()
+            self.assertTrue(address.is_valid)
+
+
+class BatchValidationStreamTests(TransactionTestCase):
+    def setUp(self):
+        clear_geocode_cache()
+        reset_clients()
+        self.addCleanup(reset_clients)
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        self.authorization = f"Bearer {token}".encode()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def geocode(self, params):
+        if params["address"].startswith("2 "):
+            self.release.wait(5)
+        return 200, GEOCODE_OK
+
+    async def test_first_line_is_sent_before_the_batch_finishes(self):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/locations/addresses/validate/batch/",
+            "query_string": b"",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"authorization", self.authorization),
+                (b"content-type", b"application/json"),
+            ],
+        }
+        body = json.dumps(["1 First St, Dayton, OH", "2 Second St, Dayton, OH"]).encode()
+
+        with StubProviderServer({"/maps/api/geocode/json": self.geocode}) as stub, stub_providers(stub):
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({"type": "http.request", "body": body})
+            self.assertEqual((await communicator.receive_output(timeout=5))["status"], 200)
+
+            first = await communicator.receive_output(timeout=5)
+            self.assertFalse(self.release.is_set())
+            self.assertEqual(json.loads(first["body"])["index"], 0)
+
+            self.release.set()
+            rest = b""
+            while True:
+                message = await communicator.receive_output(timeout=5)
+                rest += message.get("body", b"")
+                if not message.get("more_body"):
+                    break
+            self.assertEqual(json.loads(rest.splitlines()[-1])["index"], 1)
+
+
+class BulkImportTests(TestCase):
+    def test_boolean_flags_are_parsed_explicitly(self):
+        cases = (("false", False), ("0", False), ("no", False), ("true", True), (1, True), (None, False))
+        for value, expected in cases:
+            data, errors = normalize_row({**address_payload(), "is_billing": value})
+            self.assertIsNone(errors)
+            self.assertIs(data["is_billing"], expected, value)
+
+        _, errors = normalize_row({**address_payload(), "is_default": "maybe"})
+        self.assertIn("is_default", errors)
+
+    def test_rows_inserted_concurrently_are_reported_as_existing(self):
+        stored_id = import_addresses([address_payload()], SimulatedRequestUser.user_id)["results"][0]["id"]
+
+        # Hide the stored row from the pre-insert check, as if another request inserted it in between.
+        existing_keys = bulk_import._existing_keys
+        calls = []
+
+        def racing_existing_keys(addresses, user_id):
+            calls.append(user_id)
+            return {} if len(calls) == 1 else existing_keys(addresses, user_id)
+
+        with mock.patch.object(bulk_import, "_existing_keys", racing_existing_keys):
+            report = import_addresses([address_payload(), address_payload()], SimulatedRequestUser.user_id)
+
+        self.assertEqual([result["status"] for result in report["results"]], ["exists", "duplicate"])
+        self.assertEqual({result["id"] for result in report["results"]}, {stored_id})
+        self.assertEqual(Address.objects.count(), 1)
+
+
+class JWTCacheTests(TestCase):
+    def setUp(self):
+        clear_jwt_cache()
+
+    def test_reused_token_is_verified_once(self):
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        authentication = CustomJWTAuthentication()
+
+        first, _ = authentication.validate(str(token))
+        second, _ = authentication.validate(str(token))
+
+        self.assertIs(first, second)
+        self.assertEqual(first.user_id, SimulatedRequestUser.user_id)
+        self.assertEqual(jwt_cache_stats()["hits"], 1)
+
+
+class AsyncAddressReadTests(AddressTestCase):
+    def setUp(self):
+        super().setUp()
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        for line_1 in ("1 First St", "2 Second St", "3 Third St"):
+            serializer = AddressSerializer(data=address_payload(line_1), context={"user": SimulatedRequestUser()})
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            serializer.save()
+
+    def test_list_and_retrieve(self):
+        response = self.client.get("/api/locations/addresses/?page_size=2", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        page = response.json()
+        self.assertEqual(len(page["results"]), 2)
+        self.assertIsNotNone(page["next"])
+
+        address = page["results"][0]
+        response = self.client.get(f"/api/locations/addresses/{address['id']}/", **self.auth)
+        self.assertEqual(response.json(), address)
+
+    @override_settings(ADDRESS_CACHE_TTL=0)
+    def test_sync_handlers_match_the_async_views(self):
+        factory = APIRequestFactory()
+        sync_views = {
+            "/api/locations/addresses/": AddressViewSet.as_view({"get": "list"}),
+            "/api/locations/addresses/nearby/?lat=39.76&lng=-84.19&mode=knn": AddressViewSet.as_view({"get": "nearby"}),
+        }
+        for url, sync_view in sync_views.items():
+            response = sync_view(factory.get(url, **self.auth))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.render().content), self.client.get(url, **self.auth).json())
+
+        address = self.client.get("/api/locations/addresses/", **self.auth).json()["results"][0]
+        request = factory.get(f"/api/locations/addresses/{address['id']}/", **self.auth)
+        response = AddressViewSet.as_view({"get": "retrieve"})(request, pk=address["id"])
+        self.assertEqual(json.loads(response.render().content), address)
+
+    def test_writes_still_reach_the_viewset(self):
+        response = self.client.post(
+            "/api/locations/addresses/", address_payload("4 Fourth St"), content_type="application/json", **self.auth
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_missing_token_is_rejected(self):
+        self.assertEqual(self.client.get("/api/locations/addresses/").status_code, 401)
+
+    def test_tampered_cursor_is_rejected(self):
+        cursor = base64.urlsafe_b64encode(b"2026-01-01T00:00:00+00:00|not-a-uuid").decode().rstrip("=")
+        response = self.client.get(f"/api/locations/addresses/?cursor={cursor}", **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_tenant_addresses_created_through_the_api_are_found_nearby(self):
+        tenant_id = "3f1c2b4e-5d6a-4b7c-8d9e-0f1a2b3c4d5e"
+        tokens = []
+        for user_id in (SimulatedRequestUser.user_id, "16fd2706-8baf-433b-82eb-8c7fada847da"):
+            token = AccessToken()
+            token["user_id"] = user_id
+            token["tenant_id"] = tenant_id
+            tokens.append({"HTTP_AUTHORIZATION": f"Bearer {token}"})
+
+        response = self.client.post(
+            "/api/locations/addresses/", address_payload("4 Fourth St"), content_type="application/json", **tokens[0]
+        )
+        self.assertEqual(response.status_code, 201)
+        Address.objects.filter(pk=response.json()["id"]).update(location=Point(-84.19, 39.76, srid=4326), is_valid=True)
+
+        url = "/api/locations/addresses/nearby/?lat=39.76&lng=-84.19&radius=1"
+        for auth in tokens:
+            results = self.client.get(url, **auth).json()["results"]
+            self.assertEqual([result["id"] for result in results], [response.json()["id"]])
+
+    def test_nearby_rejects_non_positive_limit(self):
+        url = "/api/locations/addresses/nearby/?lat=39.76&lng=-84.19&mode=knn&limit=-1"
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 400)
+
+
+class AddressResponseCacheTests(AddressTestCase):
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        file_cache = override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+                "responses": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": cache_dir},
+            }
+        )
+        file_cache.enable()
+        self.addCleanup(file_cache.disable)
+
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.client.post(
+            "/api/locations/addresses/", address_payload("1 First St"), content_type="application/json", **self.auth
+        )
+
+    def test_unchanged_list_is_not_modified_without_queries(self):
+        etag = self.client.get("/api/locations/addresses/", **self.auth)["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/locations/addresses/", HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_invalidates_cached_list(self):
+        first = self.client.get("/api/locations/addresses/", **self.auth)
+        self.client.post(
+            "/api/locations/addresses/", address_payload("2 Second St"), content_type="application/json", **self.auth
+        )
+
+        second = self.client.get("/api/locations/addresses/", HTTP_IF_NONE_MATCH=first["ETag"], **self.auth)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()["results"]), len(first.json()["results"]) + 1)
+
+    def test_sync_handlers_are_cached_too(self):
+        factory = APIRequestFactory()
+        list_view = AddressViewSet.as_view({"get": "list"})
+        retrieve_view = AddressViewSet.as_view({"get": "retrieve"})
+        address_id = str(Address.objects.get().pk)
+
+        etags = {}
+        for view, url, kwargs in (
+            (list_view, "/api/locations/addresses/", {}),
+            (retrieve_view, f"/api/locations/addresses/{address_id}/", {"pk": address_id}),
+        ):
+            first = view(factory.get(url, **self.auth), **kwargs)
+            self.assertEqual(first.status_code, 200)
+            with self.assertNumQueries(0):
+                second = view(factory.get(url, HTTP_IF_NONE_MATCH=first["ETag"], **self.auth), **kwargs)
+            self.assertEqual(second.status_code, 304)
+            etags[url] = first["ETag"]
+
+        self.client.post(
+            "/api/locations/addresses/", address_payload("2 Second St"), content_type="application/json", **self.auth
+        )
+        url = "/api/locations/addresses/"
+        third = list_view(factory.get(url, HTTP_IF_NONE_MATCH=etags[url], **self.auth))
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(len(json.loads(third.content)["results"]), 2)
+
+    def test_process_local_backend_is_not_used(self):
+        local = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        with override_settings(CACHES={"default": local, "responses": local}):
+            response = self.client.get("/api/locations/addresses/", **self.auth)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+
+class PostalRadiusTests(TestCase):
+    def test_points_at_the_east_west_edge_of_the_radius_are_kept(self):
+        # At 60N the widest point of a 500 mi circle is ~14.58 degrees east, past delta_lat / cos(lat).
+        angular = 499.5 / EARTH_RADIUS["miles"]
+        edge_lat = math.degrees(math.asin(math.sin(math.radians(60)) / math.cos(angular)))
+        edge_lng = math.degrees(math.asin(math.sin(angular) / math.cos(math.radians(60))))
+        engine = PostalRadiusEngine(["00001", "00002"], [60.0, edge_lat], [0.0, edge_lng])
+
+        codes, _ = engine.within_point(60.0, 0.0, 500)
+
+        self.assertEqual(codes, ["00001", "00002"])
+
+    def test_circles_over_a_pole_span_every_longitude(self):
+        engine = PostalRadiusEngine(["00001", "00002"], [89.5, 89.5], [0.0, 180.0])
+        self.assertEqual(engine.within_point(89.9, 0.0, 100)[0], ["00001", "00002"])
+
+    def test_loader_keeps_the_first_row_of_a_repeated_code(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "postal_codes.csv")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("postal_code,place_name,admin_code1,latitude,longitude\n")
+            handle.write("45402,Dayton,OH,39.76,-84.19\n")
+            handle.write("45402,Dayton Municipal,OH,39.75,-84.20\n")
+            handle.write("45403,Dayton,OH,39.77,-84.15\n")
+
+        call_command("load_postal_codes", path, stdout=StringIO())
+
+        self.assertEqual(PostalCode.objects.count(), 2)
+        self.assertEqual(PostalCode.objects.get(code="45402").city_name, "DAYTON")
+
+
+def square(min_x, min_y, max_x, max_y):
+    return MultiPolygon(Polygon.from_bbox((min_x, min_y, max_x, max_y)), srid=4326)
+
+
+@override_settings(REVERSE_GEOCODE_TOLERANCE=0.01)
+class ReverseGeocodeTests(TestCase):
+    def setUp(self):
+        country = Country.objects.create(code="US", name="United States", boundary=square(-90, 35, -80, 45))
+        state = State.objects.create(name="OHIO", code="OH", country=country, boundary=square(-85, 38, -80, 42))
+        City.objects.create(name="DAYTON", state=state, country=country, boundary=square(-84.3, 39.6, -84.1, 39.9))
+        reload_geocoder()
+        self.addCleanup(reload_geocoder)
+
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def lookup(self, lat, lng):
+        response = self.client.get(f"/api/locations/reverse/?lat={lat}&lng={lng}", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_resolves_city_state_and_country(self):
+        result = self.lookup(39.7589, -84.1916)
+        self.assertEqual(result["city"]["name"], "DAYTON")
+        self.assertEqual(result["state"]["code"], "OH")
+        self.assertEqual(result["country"]["code"], "US")
+
+    def test_interior_points_are_answered_from_memory(self):
+        self.lookup(39.7, -84.2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup(39.71, -84.21)["city"]["name"], "DAYTON")
+
+    def test_points_near_a_border_use_the_exact_boundary(self):
+        # Inside the city's tolerance band on either side of its eastern edge.
+        self.assertEqual(self.lookup(39.75, -84.105)["city"]["name"], "DAYTON")
+        result = self.lookup(39.75, -84.095)
+        self.assertIsNone(result["city"])
+        self.assertEqual(result["state"]["code"], "OH")
+
+    def test_falls_back_to_coarser_levels(self):
+        result = self.lookup(37.0, -88.0)
+        self.assertIsNone(result["city"])
+        self.assertIsNone(result["state"])
+        self.assertEqual(result["country"]["code"], "US")
+        self.assertEqual(self.lookup(10.0, 10.0), {"country": None, "state": None, "city": None})
+
+    def test_saves_without_boundary_changes_keep_the_index(self):
+        self.lookup(39.7, -84.2)
+        geocoder = get_geocoder()
+
+        City.objects.create(name="KETTERING", country=Country.objects.get(code="US"))
+        check_boundaries()
+
+        self.lookup(39.7, -84.2)
+        self.assertIs(get_geocoder(), geocoder)
+
+    @override_settings(REVERSE_GEOCODE_CHECK_INTERVAL=0)
+    def test_boundaries_loaded_elsewhere_are_picked_up(self):
+        self.assertEqual(self.lookup(39.5, -84.2)["city"], None)
+
+        # What load_boundaries does from another process: a bulk update, no signals.
+        City.objects.filter(name="DAYTON").update(boundary=square(-84.3, 39.4, -84.1, 39.9), updated_at=timezone.now())
+
+        self.assertEqual(self.lookup(39.5, -84.2)["city"]["name"], "DAYTON")
+
+    def test_rejects_bad_coordinates(self):
+        self.assertEqual(self.client.get("/api/locations/reverse/?lat=91&lng=0", **self.auth).status_code, 400)
+        self.assertEqual(self.client.get("/api/locations/reverse/?lat=x", **self.auth).status_code, 400)
+
+    def test_str_tree_matches_brute_force(self):
+        boxes = [(x, y, x + 1.5, y + 1.5) for x in range(30) for y in range(30)]
+        tree = STRtree(boxes)
+        for x, y in ((0.5, 0.5), (10.2, 20.7), (29.9, 3.0), (-1.0, 5.0)):
+            expected = {i for i, (x0, y0, x1, y1) in enumerate(boxes) if x0 <= x <= x1 and y0 <= y <= y1}
+            self.assertEqual(set(tree.query(x, y).tolist()), expected)
+
+
+class AutocompleteTests(AddressTestCase):
+    tenant_id = "3f1c2b4e-5d6a-4b7c-8d9e-0f1a2b3c4d5e"
+
+    def setUp(self):
+        super().setUp()
+        clear_indexes()
+        self.addCleanup(clear_indexes)
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        token["tenant_id"] = self.tenant_id
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        self.near = self.create("100 Main St", Point(-84.19, 39.76, srid=4326))
+        self.far = self.create("200 Main St", Point(-80.0, 35.0, srid=4326))
+        self.create("300 Main St", Point(-84.19, 39.76, srid=4326), tenant_id=None)
+
+    def create(self, line_1, location, tenant_id=tenant_id):
+        user = SimulatedUser(SimulatedRequestUser.user_id, "", "", tenant_id=tenant_id)
+        serializer = AddressSerializer(data=address_payload(line_1), context={"user": user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            address = serializer.save()
+            address.location = location
+            address.is_valid = True
+            address.save()
+        return address
+
+    def search(self, query, **params):
+        params = "".join(f"&{key}={value}" for key, value in params.items())
+        response = self.client.get(f"/api/locations/autocomplete/?q={query}{params}", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_matches_any_word_within_the_tenant(self):
+        labels = [result["label"] for result in self.search("main") if result["type"] == "address"]
+        self.assertEqual(len(labels), 2)
+        self.assertFalse(any(label.startswith("300") for label in labels))
+
+    def test_bias_point_ranks_nearest_first(self):
+        results = self.search("main", lat=35.0, lng=-80.0)
+        self.assertEqual(results[0]["id"], str(self.far.id))
+        self.assertLess(results[0]["distance_km"], 1)
+
+    def test_matches_cities_and_postal_codes(self):
+        self.assertIn("city", {result["type"] for result in self.search("day")})
+        self.assertEqual(len([result for result in self.search("4540") if result["type"] == "address"]), 2)
+
+    def test_loaded_index_follows_writes(self):
+        self.search("main")
+        added = self.create("400 Market St", Point(-84.2, 39.7, srid=4326))
+        self.assertEqual([result["id"] for result in self.search("market")], [str(added.id)])
+        with self.captureOnCommitCallbacks(execute=True):
+            added.delete()
+        self.assertEqual(self.search("market"), [])
+
+    def test_addresses_created_through_the_api_are_suggested_to_the_tenant(self):
+        self.search("main")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/locations/addresses/", address_payload("500 Elm St"), content_type="application/json", **self.auth
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([result["id"] for result in self.search("elm")], [response.json()["id"]])
+
+    def test_rolled_back_addresses_are_not_indexed(self):
+        self.search("main")
+        user = SimulatedUser(SimulatedRequestUser.user_id, "", "", tenant_id=self.tenant_id)
+        serializer = AddressSerializer(data=address_payload("600 Oak St"), context={"user": user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    serializer.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(self.search("oak"), [])
+
+    def test_ungeocoded_addresses_are_not_ranked_by_distance(self):
+        Address.objects.filter(pk=self.far.pk).update(is_valid=False, location=Point(0, 0, srid=4326))
+
+        results = {result["id"]: result for result in self.search("main", lat=0.0, lng=0.0)}
+
+        self.assertIsNone(results[str(self.far.id)]["distance_km"])
+
+    def test_address_moved_to_another_tenant_leaves_the_old_index(self):
+        self.search("main")
+        self.near.tenant_id = "9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near.save()
+
+        ids = [result["id"] for result in self.search("main") if result["type"] == "address"]
+        self.assertEqual(ids, [str(self.far.id)])
+
+    def test_requires_query(self):
+        self.assertEqual(self.client.get("/api/locations/autocomplete/", **self.auth).status_code, 400)
+
+
+class ChangeStreamTests(AddressTestCase):
+    def setUp(self):
+        super().setUp()
+        self.broker = InMemoryBroker()
+        serializer = AddressSerializer(data=address_payload(), context={"user": SimulatedRequestUser()})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.address = serializer.save()
+
+    def published(self):
+        return self.broker.published(settings.KAFKA_TOPIC)
+
+    def test_writes_are_relayed_in_order_and_removed_from_the_outbox(self):
+        self.address.is_default = True
+        self.address.save(update_fields=["is_default"])
+        self.address.delete()
+
+        pending = ChangeEvent.objects.count()
+        self.assertEqual(relay_batch(self.broker, 100), pending)
+        events = [event for event in self.published() if event["key"] == str(self.address.id)]
+        self.assertEqual([event["op"] for event in events], ["create", "update", "delete"])
+        self.assertEqual(events[0]["data"]["address_line_1"], "100 Main St")
+        self.assertEqual(events[1]["data"], {"is_default": True})
+        self.assertIsNone(events[2]["data"])
+        self.assertEqual(ChangeEvent.objects.count(), 0)
+
+    def test_update_of_a_loaded_address_is_recorded(self):
+        # Rows read back from the database carry uuid.UUID values, not the strings of a fresh instance.
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        response = self.client.put(
+            f"/api/locations/addresses/{self.address.id}/",
+            address_payload("200 Main St"),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        event = ChangeEvent.objects.filter(op=ChangeEvent.UPDATE, key=str(self.address.id)).latest("id")
+        self.assertEqual(event.data["user_id"], SimulatedRequestUser.user_id)
+        self.assertEqual(event.data["address_line_1"], "200 Main St")
+
+    def test_failed_delivery_keeps_events_for_the_next_batch(self):
+        self.broker.fail_next = True
+        with self.assertRaises(ConnectionError):
+            relay_batch(self.broker, 100)
+        self.assertEqual(self.published(), [])
+        self.assertTrue(ChangeEvent.objects.exists())
+
+        relay_batch(self.broker, 100)
+        self.assertEqual(self.published()[0]["key"], str(self.address.id))
+        self.assertFalse(ChangeEvent.objects.exists())
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        token = AccessToken()
+        token["user_id"] = SimulatedRequestUser.user_id
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_requests_show_up_in_prometheus_output(self):
+        self.client.get("/api/locations/addresses/", **self.auth)
+
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        # Counters are process-wide, so other tests may have added to them.
+        self.assertRegex(
+            body, r'http_request_duration_seconds_count\{view="address-list",method="GET",status="200"\} \d+'
+        )
+        self.assertRegex(body, r'http_request_db_queries_bucket\{view="address-list",le="\+Inf"\} \d+')
+        self.assertIn('http_request_phase_seconds_total{view="address-list",phase="auth"}', body)
+        self.assertIn('cache_hit_ratio{cache="jwt"}', body)
+        self.assertIn("# TYPE cache_hits_total counter", body)
+        self.assertRegex(body, r'cache_misses_total\{cache="jwt"\} \d+')
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token_protects_the_endpoint(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="", DEBUG=False)
+    def test_endpoint_is_hidden_without_a_token_outside_debug(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    @override_settings(METRICS_TOKEN="secret", METRICS_DB_GAUGE_TTL=60)
+    def test_queue_depths_are_not_queried_on_every_scrape(self):
+        self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        with self.assertNumQueries(0):
+            response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertIn("change_outbox_depth", response.content.decode())
+
+    @override_settings(PROFILE_SAMPLE_RATE=1.0, PROFILE_THRESHOLD_MS=0)
+    def test_slow_sampled_requests_are_profiled(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        with override_settings(PROFILE_DIR=profile_dir):
+            self.client.get("/api/locations/addresses/", **self.auth)
+        self.assertTrue(any(name.endswith(".pstats") for name in os.listdir(profile_dir)))
+
+
+class BenchmarkCommandTests(TestCase):
+    def run_benchmark(self, *args):
+        output = os.path.join(tempfile.mkdtemp(), "bench.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(output), ignore_errors=True)
+        call_command(
+            "benchmark", "--quick", "--no-test-db", "--repeat", "1", "--output", output, *args,
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        with open(output, encoding="utf-8") as handle:
+            return json.load(handle), output
+
+    def test_writes_comparable_report(self):
+        report, _ = self.run_benchmark("--scenarios", "address_create", "matrix")
+
+        self.assertIn("commit", report["meta"])
+        self.assertEqual(report["results"]["address_create/serializer"]["runs"], 1)
+        self.assertIn("p95_ms", report["results"]["matrix/json/50x50"])
+        self.assertIn("queries", report["results"]["matrix/float32/200x200"])
+
+    def test_regression_against_baseline_fails(self):
+        report, baseline = self.run_benchmark("--scenarios", "address_create")
+        report["results"]["address_create/serializer"]["p50_ms"] = 1e-6
+        with open(baseline, "w", encoding="utf-8") as handle:
+            json.dump(report, handle)
+
+        with self.assertRaisesMessage(CommandError, "address_create/serializer"):
+            self.run_benchmark("--scenarios", "address_create", "--compare", baseline, "--fail-on-regression")
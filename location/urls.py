@@ -1,10 +1,41 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import (
+    address_autocomplete,
+    address_detail,
+    address_list,
+    address_nearby,
+    address_validate_batch,
+    reverse_geocode_point,
+    with_write_view,
+)
 from .views import AddressViewSet
 
 router = DefaultRouter()
 router.register(r"addresses", AddressViewSet, basename="address")
 
-urlpatterns = [
+urlpatterns = []
+if settings.ASYNC_ADDRESS_READS:
+    # Async read path; writes on the same URLs fall through to the viewset. Under WSGI the router
+    # below serves the viewset's sync list/retrieve/nearby instead.
+    urlpatterns += [
+        path(
+            "addresses/",
+            with_write_view(address_list, AddressViewSet.as_view({"post": "create"})),
+            name="address-list",
+        ),
+        path("addresses/nearby/", address_nearby, name="address-nearby"),
+        path("addresses/validate/batch/", address_validate_batch, name="address-validate-batch"),
+        path(
+            "addresses/<uuid:pk>/",
+            with_write_view(address_detail, AddressViewSet.as_view({"put": "update", "delete": "destroy"})),
+            name="address-detail",
+        ),
+    ]
+
+urlpatterns += [
+    path("autocomplete/", address_autocomplete, name="address-autocomplete"),
+    path("reverse/", reverse_geocode_point, name="reverse-geocode"),
     path("", include(router.urls)),
 ]
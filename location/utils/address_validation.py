@@ -11,10 +11,25 @@ Functions:
 
 - validate_address(address): Sends a request to the Google Maps Geocoding API to validate an address 
   and returns structured address details along with latitude, longitude, and validation status.
+  Results are cached in two tiers: an in-process LRU with TTL, backed by the `GeocodeResult` table
+  keyed on the normalized address string. `ZERO_RESULTS` responses are cached with a shorter TTL;
+  transient errors (REQUEST_DENIED, UNKNOWN_ERROR, ...) are never cached.
+
+- avalidate_address(address): Async wrapper around validate_address for ASGI callers.
+
+- validate_addresses(addresses, concurrency, with_status=False): Validates many addresses at once.
+  Inputs are deduplicated on their normalized form, both cache tiers are consulted with one
+  database query, and the remaining lookups fan out concurrently. Results are yielded in input
+  order; `with_status=True` yields (provider status, result) pairs instead.
+
+- normalize_address(address): Builds the cache key for an address string.
+
+- geocode_cache_stats(): Returns hit/miss counters for both cache tiers.
 
 Dependencies:
-- requests (for making API calls)
-- Django settings (expects `GOOGLE_MAPS_API_KEY` to be configured)
+- core.http (pooled, rate-limited provider client; see `settings.PROVIDERS["google_maps"]`)
+- Django settings (expects `GOOGLE_MAPS_API_KEY` to be configured; `GEOCODE_CACHE_TTL`,
+  `GEOCODE_CACHE_NEGATIVE_TTL` and `GEOCODE_CACHE_MAX_ENTRIES` tune the cache)
 
 Usage Example:
     validated_address = validate_address("1600 Amphitheatre Parkway, Mountain View, CA")
@@ -27,8 +42,74 @@ Author: Camryn Crowder
 Date: 01/29/2025
 """
 
-import requests
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import close_old_connections
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from core.http import ProviderError, get_client
+from location.models import GeocodeResult
+from location.utils.cache import MISSING, TTLCache
+
+CACHEABLE_STATUSES = ("OK", "ZERO_RESULTS")
+
+# Provider statuses worth retrying later, as opposed to invalid addresses: quota exhausted, provider
+# failed or unreachable, or a configuration problem (bad or expired key, quota misconfiguration) that
+# says nothing about the address. UNAVAILABLE is ours: the request never got a response.
+RETRYABLE_STATUSES = ("OVER_QUERY_LIMIT", "UNKNOWN_ERROR", "UNAVAILABLE", "REQUEST_DENIED", "INVALID_REQUEST")
+
+_memory_cache = None
+_memory_cache_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def _get_memory_cache():
+    global _memory_cache
+    if _memory_cache is None:
+        with _memory_cache_lock:
+            if _memory_cache is None:
+                _memory_cache = TTLCache(
+                    max_entries=settings.GEOCODE_CACHE_MAX_ENTRIES,
+                    ttl=settings.GEOCODE_CACHE_TTL,
+                )
+    return _memory_cache
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def normalize_address(address):
+    """Normalize an address string so equivalent inputs share a cache key."""
+    address = re.sub(r"\s*,\s*", ", ", str(address))
+    address = re.sub(r"\s+", " ", address)
+    return address.strip(" ,").upper()
+
+
+def geocode_cache_stats():
+    """Return hit/miss counters for the in-process and database cache tiers."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["memory_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+    stats["memory_size"] = len(_get_memory_cache())
+    return stats
+
+
+def clear_geocode_cache():
+    """Drop the in-process tier and reset counters (database rows are left untouched)."""
+    _get_memory_cache().clear()
+    with _stats_lock:
+        for counter in _stats:
+            _stats[counter] = 0
 
 
 def extract_address_components(address_components):
@@ -65,14 +146,15 @@ def extract_address_components(address_components):
     return address_data
 
 
-def validate_address(address):
-    """Validate an address using Google Maps API and return structured data."""
+def _request_geocode(address):
+    """Call the Google Maps Geocoding API and return (status, structured result)."""
     api_key = settings.GOOGLE_MAPS_API_KEY
-    base_url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {"address": address, "key": api_key}
 
-    response = requests.get(base_url, params=params)
-    data = response.json()
+    try:
+        data = get_client("google_maps").get_json("/maps/api/geocode/json", params=params)
+    except ProviderError:
+        return "UNAVAILABLE", {"valid": False, "error": "Geocoding provider unavailable"}
     status = data.get("status")
 
     if status == "OK":
@@ -85,13 +167,180 @@ def validate_address(address):
         structured_address["longitude"] = location["lng"]
         structured_address["valid"] = True
 
-        return structured_address
+        return status, structured_address
     elif status == "ZERO_RESULTS":
-        return {"valid": False, "error": "No results found"}
+        return status, {"valid": False, "error": "No results found"}
     elif status == "REQUEST_DENIED":
-        return {"valid": False, "error": "Request denied"}
+        return status, {"valid": False, "error": "Request denied"}
     elif status == "INVALID_REQUEST":
-        return {"valid": False, "error": "Invalid request"}
+        return status, {"valid": False, "error": "Invalid request"}
     elif status == "UNKNOWN_ERROR":
-        return {"valid": False, "error": "Unknown error"}
-    return {"valid": False, "error": "Invalid Address"}
+        return status, {"valid": False, "error": "Unknown error"}
+    elif status == "OVER_QUERY_LIMIT":
+        return status, {"valid": False, "error": "Over query limit"}
+    return status, {"valid": False, "error": "Invalid Address"}
+
+
+def _ttl_for(status):
+    if status == "OK":
+        return settings.GEOCODE_CACHE_TTL
+    return settings.GEOCODE_CACHE_NEGATIVE_TTL
+
+
+def _load_from_db(key):
+    now = timezone.now()
+    row = (
+        GeocodeResult.objects.filter(query=key, expires_at__gt=now)
+        .values("result", "expires_at")
+        .first()
+    )
+    if row is None:
+        return MISSING, 0
+    return row["result"], (row["expires_at"] - now).total_seconds()
+
+
+def _store_in_db(key, status, result, ttl):
+    location = None
+    if result.get("valid"):
+        location = Point(result["longitude"], result["latitude"], srid=4326)
+
+    GeocodeResult.objects.update_or_create(
+        query=key,
+        defaults={
+            "status": status,
+            "result": result,
+            "location": location,
+            "expires_at": timezone.now() + timedelta(seconds=ttl),
+        },
+    )
+
+
+def _lookup_cached(keys):
+    """Return {key: result} for keys found in either cache tier, using one query for the database tier."""
+    memory_cache = _get_memory_cache()
+    found = {}
+    for key in keys:
+        result = memory_cache.get(key)
+        if result is not MISSING:
+            _record("memory_hits")
+            found[key] = result
+
+    remaining = [key for key in keys if key not in found]
+    if remaining:
+        now = timezone.now()
+        rows = GeocodeResult.objects.filter(query__in=remaining, expires_at__gt=now).values_list(
+            "query", "result", "expires_at"
+        )
+        for key, result, expires_at in rows:
+            _record("db_hits")
+            memory_cache.set(key, result, ttl=(expires_at - now).total_seconds())
+            found[key] = result
+    return found
+
+
+def _store_many_in_db(entries):
+    """Persist many (key, status, result, ttl) entries with a single upsert."""
+    now = timezone.now()
+    rows = []
+    for key, status, result, ttl in entries:
+        location = None
+        if result.get("valid"):
+            location = Point(result["longitude"], result["latitude"], srid=4326)
+        rows.append(
+            GeocodeResult(
+                query=key,
+                status=status,
+                result=result,
+                location=location,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+        )
+
+    GeocodeResult.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["query"],
+        update_fields=["status", "result", "location", "expires_at", "updated_at"],
+    )
+
+
+def validate_addresses(addresses, concurrency=10, with_status=False):
+    """
+    Validate many addresses, yielding one result per input in input order.
+    Duplicate inputs share a single lookup and only cache misses reach the provider.
+    With `with_status`, yields (status, result) pairs; only OK and ZERO_RESULTS are cached, so
+    cache hits report one of those.
+    """
+    keys = [normalize_address(address) for address in addresses]
+    unique = {}
+    for key, address in zip(keys, addresses):
+        unique.setdefault(key, address)
+
+    cached = _lookup_cached(list(unique))
+    pending = {key: address for key, address in unique.items() if key not in cached}
+
+    memory_cache = _get_memory_cache()
+    statuses = {}
+    to_store = []
+    workers = max(1, min(concurrency, len(pending)))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(_request_geocode, address) for key, address in pending.items()}
+            for key in keys:
+                if key in cached:
+                    result = cached[key]
+                    status = statuses.get(key) or ("OK" if result.get("valid") else "ZERO_RESULTS")
+                else:
+                    status, result = futures[key].result()
+                    _record("misses")
+                    cached[key], statuses[key] = result, status
+                    if status in CACHEABLE_STATUSES:
+                        ttl = _ttl_for(status)
+                        memory_cache.set(key, result, ttl=ttl)
+                        to_store.append((key, status, result, ttl))
+                yield (status, dict(result)) if with_status else dict(result)
+    finally:
+        if to_store:
+            _store_many_in_db(to_store)
+
+
+def validate_address(address, use_cache=True):
+    """Validate an address using Google Maps API and return structured data."""
+    if not use_cache:
+        return _request_geocode(address)[1]
+
+    key = normalize_address(address)
+    memory_cache = _get_memory_cache()
+
+    result = memory_cache.get(key)
+    if result is not MISSING:
+        _record("memory_hits")
+        return dict(result)
+
+    result, remaining_ttl = _load_from_db(key)
+    if result is not MISSING:
+        _record("db_hits")
+        memory_cache.set(key, result, ttl=remaining_ttl)
+        return dict(result)
+
+    _record("misses")
+    status, result = _request_geocode(address)
+    if status in CACHEABLE_STATUSES:
+        ttl = _ttl_for(status)
+        memory_cache.set(key, result, ttl=ttl)
+        _store_in_db(key, status, result, ttl)
+    return dict(result)
+
+
+def _validate_address_in_worker(address, use_cache=True):
+    # Executor threads outlive the request, so release their DB connection the way a request would.
+    close_old_connections()
+    try:
+        return validate_address(address, use_cache=use_cache)
+    finally:
+        close_old_connections()
+
+
+# Async entry point for ASGI callers; cache tiers and the provider call run on a worker thread
+# so slow provider calls don't queue behind each other on the shared sync thread.
+avalidate_address = sync_to_async(_validate_address_in_worker, thread_sensitive=False)
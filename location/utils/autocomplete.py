@@ -0,0 +1,388 @@
+"""
+Address Autocomplete Module
+
+This module answers typeahead queries from in-memory prefix indexes, so keystrokes never reach
+the external geocoder or scan the Address table:
+
+- One global index of places: City and State names (with the centroid of their boundary, when
+  one is loaded).
+- One index per tenant (or per user, for tokens without a tenant) of `address_line_1` and
+  `postal_code`, built from the database on the first query and kept in an LRU
+  (`AUTOCOMPLETE_MAX_SCOPES`). Addresses that are not geocoded yet have no location.
+
+Each index is a sorted list of (key, ref) pairs searched with `bisect`. Every word of a name is
+a key start, so "main" finds "100 Main St". Save/delete signals update loaded indexes in place
+once the write commits (see location/signals.py). Indexes older than `AUTOCOMPLETE_INDEX_TTL` seconds are rebuilt in a
+background thread while queries keep using the old one, which bounds how stale other processes
+can get without putting a rebuild on the request path. Only the first build of an index makes
+requests wait, and concurrent first requests for one scope share that build.
+
+Matches are ranked by distance to the optional bias point, then by whether the query matched
+the start of the label, then by label length.
+
+Classes:
+- PrefixIndex: Sorted prefix index with incremental add/remove.
+
+Functions:
+- suggest(query, scope, latitude=None, longitude=None, limit=10): Ranked suggestions.
+- scope_for(tenant_id, user_id): Index scope for a caller.
+- address_changed(address_id, scopes) / address_deleted(address_id, scopes): Signal hooks.
+- place_changed(model, pk) / place_deleted(model, pk): Signal hooks for City and State.
+- clear_indexes(): Drop every index (tests, bulk loads).
+
+Usage Example:
+    suggest("100 ma", scope_for(tenant_id, user_id), latitude=39.76, longitude=-84.19)
+    # [{"type": "address", "id": ..., "label": "100 Main St, DAYTON, OH 45402", "distance_km": 0.4}, ...]
+"""
+
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Centroid
+from django.db import close_old_connections
+
+from location.models import Address, City, State
+from location.utils.cache import MISSING, TTLCache
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 64
+EARTH_RADIUS_KM = 6371.0088
+BUILD_LOCK_STRIPES = 64
+_non_word = re.compile(r"[^\w]+")
+
+
+def normalize(text):
+    return _non_word.sub(" ", str(text or "").casefold()).strip()
+
+
+def prefix_keys(*texts):
+    """Every word-start suffix of each text, so a query can match from any word."""
+    keys = set()
+    for text in texts:
+        text = normalize(text)
+        for match in re.finditer(r"\S+", text):
+            keys.add(text[match.start():match.start() + MAX_KEY_LENGTH])
+    return keys
+
+
+class PrefixIndex:
+    """Sorted (key, ref) pairs plus a record per ref; prefix lookups by binary search."""
+
+    def __init__(self):
+        self.entries = []
+        self.records = {}
+        self.keys = {}
+        self.lock = threading.Lock()
+
+    def add(self, ref, record, keys):
+        with self.lock:
+            self._remove(ref)
+            self.records[ref] = record
+            self.keys[ref] = keys
+            for key in keys:
+                insort(self.entries, (key, ref))
+
+    def remove(self, ref):
+        with self.lock:
+            self._remove(ref)
+
+    def _remove(self, ref):
+        self.records.pop(ref, None)
+        for key in self.keys.pop(ref, ()):
+            position = bisect_left(self.entries, (key, ref))
+            if position < len(self.entries) and self.entries[position] == (key, ref):
+                del self.entries[position]
+
+    def load(self, items):
+        """Bulk-build from (ref, record, keys) triples; faster than repeated `add`."""
+        with self.lock:
+            for ref, record, keys in items:
+                self.records[ref] = record
+                self.keys[ref] = keys
+            self.entries = sorted((key, ref) for ref, keys in self.keys.items() for key in keys)
+
+    def search(self, prefix, limit):
+        """Return up to `limit` (record, matched_at_start) pairs whose key starts with `prefix`."""
+        found = {}
+        with self.lock:
+            position = bisect_left(self.entries, (prefix,))
+            while position < len(self.entries) and len(found) < limit:
+                key, ref = self.entries[position]
+                if not key.startswith(prefix):
+                    break
+                if ref not in found:
+                    found[ref] = self.records[ref]
+                position += 1
+        return [(record, record["key"].startswith(prefix)) for record in found.values()]
+
+
+class _Loaded:
+    """An index and when it was built."""
+    __slots__ = ("index", "built_at")
+
+    def __init__(self, index):
+        self.index = index
+        self.built_at = time.monotonic()
+
+
+_places = None
+_scopes = None
+_indexes_lock = threading.Lock()
+# First builds of one scope are serialized; a fixed set of striped locks keeps this bounded.
+_build_locks = [threading.Lock() for _ in range(BUILD_LOCK_STRIPES)]
+_refreshing = set()
+_executor = None
+
+
+def scope_for(tenant_id, user_id):
+    return f"tenant:{tenant_id}" if tenant_id else f"user:{user_id}"
+
+
+def _point(geometry):
+    return (geometry.y, geometry.x) if geometry is not None else (None, None)
+
+
+def _place_item(kind, pk, label, center):
+    latitude, longitude = _point(center)
+    record = {"type": kind, "id": str(pk), "label": label, "latitude": latitude, "longitude": longitude}
+    record["key"] = normalize(label)
+    return f"{kind}:{pk}", record, prefix_keys(label.split(",")[0])
+
+
+def _city_items(queryset):
+    rows = queryset.annotate(center=Centroid("boundary")).values_list(
+        "id", "name", "state__code", "state__name", "country__code", "center"
+    )
+    for pk, name, state_code, state_name, country_code, center in rows.iterator(chunk_size=5000):
+        region = state_code or state_name
+        label = f"{name}, {region}, {country_code}" if region else f"{name}, {country_code}"
+        yield _place_item("city", pk, label, center)
+
+
+def _state_items(queryset):
+    rows = queryset.annotate(center=Centroid("boundary")).values_list("id", "name", "country__code", "center")
+    for pk, name, country_code, center in rows.iterator(chunk_size=5000):
+        yield _place_item("state", pk, f"{name}, {country_code}", center)
+
+
+def _address_item(row):
+    pk, line_1, postal_code, city, state_code, country_code, location, is_valid = row
+    region = f"{state_code} {postal_code}" if state_code else postal_code
+    label = f"{line_1}, {city}, {region}"
+    # Until geocoded, `location` is the POINT(0 0) default and must not be ranked by distance.
+    latitude, longitude = _point(location if is_valid else None)
+    record = {
+        "type": "address",
+        "id": str(pk),
+        "label": label,
+        "latitude": latitude,
+        "longitude": longitude,
+        "key": normalize(line_1),
+    }
+    return str(pk), record, prefix_keys(line_1, postal_code)
+
+
+def _address_rows(queryset):
+    return queryset.values_list(
+        "id", "address_line_1", "postal_code", "city__name", "state__code", "country__code", "location", "is_valid"
+    )
+
+
+def _scope_queryset(scope):
+    kind, _, value = scope.partition(":")
+    return Address.objects.filter(**{"tenant_id" if kind == "tenant" else "user_id": value})
+
+
+def _get_caches():
+    global _places, _scopes
+    if _scopes is None:
+        with _indexes_lock:
+            if _scopes is None:
+                # Entries never expire on their own (stale ones are rebuilt in place); the LRU bounds memory.
+                _places = TTLCache(max_entries=1, ttl=float("inf"))
+                _scopes = TTLCache(max_entries=settings.AUTOCOMPLETE_MAX_SCOPES, ttl=float("inf"))
+    return _places, _scopes
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _indexes_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="autocomplete")
+    return _executor
+
+
+def _build_places():
+    index = PrefixIndex()
+    index.load([*_city_items(City.objects.all()), *_state_items(State.objects.all())])
+    return index
+
+
+def _build_scope(scope):
+    index = PrefixIndex()
+    index.load(_address_item(row) for row in _address_rows(_scope_queryset(scope)).iterator(chunk_size=5000))
+    return index
+
+
+def _rebuild(cache, key, build):
+    """Runs on the executor: build a fresh index and swap it in."""
+    try:
+        cache.set(key, _Loaded(build()))
+    except Exception:
+        logger.exception("Rebuilding autocomplete index %s failed", key)
+    finally:
+        with _indexes_lock:
+            _refreshing.discard((id(cache), key))
+        close_old_connections()
+
+
+def _get_index(cache, key, build):
+    """Return the index under `key`, building it on first use and refreshing it in the background when stale."""
+    loaded = cache.get(key)
+    if loaded is MISSING:
+        with _build_locks[hash(key) % BUILD_LOCK_STRIPES]:
+            loaded = cache.get(key)
+            if loaded is MISSING:
+                loaded = _Loaded(build())
+                cache.set(key, loaded)
+        return loaded.index
+
+    if time.monotonic() - loaded.built_at >= settings.AUTOCOMPLETE_INDEX_TTL:
+        with _indexes_lock:
+            start = (id(cache), key) not in _refreshing
+            _refreshing.add((id(cache), key))
+        if start:
+            _get_executor().submit(_rebuild, cache, key, build)
+    return loaded.index
+
+
+def _get_places():
+    places, _ = _get_caches()
+    return _get_index(places, "places", _build_places)
+
+
+def _get_scope_index(scope):
+    _, scopes = _get_caches()
+    return _get_index(scopes, scope, lambda: _build_scope(scope))
+
+
+def _loaded_index(cache, key):
+    loaded = cache.get(key)
+    return loaded.index if loaded is not MISSING else None
+
+
+def _distances_km(records, latitude, longitude):
+    latitudes = np.array([np.nan if record["latitude"] is None else record["latitude"] for record in records])
+    longitudes = np.array([np.nan if record["longitude"] is None else record["longitude"] for record in records])
+    lat1, lng1 = np.radians(latitude), np.radians(longitude)
+    lat2, lng2 = np.radians(latitudes), np.radians(longitudes)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def suggest(query, scope, latitude=None, longitude=None, limit=10):
+    """
+    Return up to `limit` suggestions for `query`: the scope's addresses plus matching cities and
+    states, nearest to (latitude, longitude) first when a bias point is given.
+    """
+    prefix = normalize(query)[:MAX_KEY_LENGTH]
+    if not prefix:
+        return []
+
+    scan = settings.AUTOCOMPLETE_SCAN_LIMIT
+    matches = _get_scope_index(scope).search(prefix, scan) + _get_places().search(prefix, scan)
+    if not matches:
+        return []
+
+    records = [record for record, _ in matches]
+    biased = latitude is not None and longitude is not None
+    distances = _distances_km(records, latitude, longitude) if biased else np.full(len(records), np.nan)
+    ranked = sorted(
+        range(len(matches)),
+        key=lambda i: (
+            np.isnan(distances[i]) if biased else False,
+            distances[i] if biased and not np.isnan(distances[i]) else 0.0,
+            not matches[i][1],
+            len(records[i]["label"]),
+            records[i]["label"],
+        ),
+    )
+
+    suggestions = []
+    for i in ranked[:limit]:
+        record = records[i]
+        suggestion = {field: record[field] for field in ("type", "id", "label", "latitude", "longitude")}
+        if biased:
+            suggestion["distance_km"] = None if np.isnan(distances[i]) else round(float(distances[i]), 3)
+        suggestions.append(suggestion)
+    return suggestions
+
+
+def address_changed(address_id, scopes):
+    """
+    Re-index one address in every loaded scope index it belongs to, and drop it from loaded
+    indexes of scopes it no longer belongs to (e.g. after a tenant change).
+    """
+    _, cache = _get_caches()
+    ref = str(address_id)
+    for scope, loaded in cache.items():
+        if scope not in scopes and ref in loaded.index.records:
+            loaded.index.remove(ref)
+    loaded = [index for index in (_loaded_index(cache, scope) for scope in scopes) if index is not None]
+    if not loaded:
+        return
+    row = _address_rows(Address.objects.filter(pk=address_id)).first()
+    for index in loaded:
+        if row is None:
+            index.remove(ref)
+        else:
+            index.add(*_address_item(row))
+
+
+def address_deleted(address_id, scopes):
+    _, cache = _get_caches()
+    for scope in scopes:
+        index = _loaded_index(cache, scope)
+        if index is not None:
+            index.remove(str(address_id))
+
+
+def place_changed(model, pk):
+    """
+    Re-index a saved City. A State change can rename many city labels, so it marks the index
+    stale instead; the next query triggers a background rebuild.
+    """
+    places, _ = _get_caches()
+    loaded = places.get("places")
+    if loaded is MISSING:
+        return
+    index = loaded.index
+    if model is not City:
+        loaded.built_at = float("-inf")
+        return
+    items = list(_city_items(City.objects.filter(pk=pk)))
+    if items:
+        index.add(*items[0])
+    else:
+        index.remove(f"city:{pk}")
+
+
+def place_deleted(model, pk):
+    places, _ = _get_caches()
+    index = _loaded_index(places, "places")
+    if index is not None:
+        index.remove(f"{'city' if model is City else 'state'}:{pk}")
+
+
+def clear_indexes():
+    global _places, _scopes
+    with _indexes_lock:
+        _places, _scopes = None, None
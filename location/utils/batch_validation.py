@@ -0,0 +1,97 @@
+"""
+Batch Address Validation Module
+
+This module backs `POST /api/locations/addresses/validate/batch`. It turns the request items into
+address strings, validates them with `validate_addresses` (deduplicated, cache-first, concurrent
+fan-out), and produces NDJSON lines in input order. Items that reference one of the caller's
+stored addresses by `id` get `location` and `is_valid=True` written back in one bulk update once
+the batch is done.
+
+Accepted item shapes:
+- "1600 Amphitheatre Parkway, Mountain View, CA"
+- {"id": "<address uuid>", "address": "1600 Amphitheatre Parkway, ..."}
+- {"id": "<address uuid>", "address_line_1": "...", "city": "...", "state": "...", "postal_code": "...", "country": "..."}
+"""
+
+import json
+import uuid
+
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.utils import timezone
+
+from location.models import Address, ChangeEvent
+from location.utils.address_validation import validate_addresses
+from location.utils.change_stream import record_changes
+
+ADDRESS_FIELDS = ("address_line_1", "address_line_2", "city", "state", "postal_code", "country")
+
+
+def address_text(item):
+    """Return the address string for one request item, or None if there is nothing to validate."""
+    if isinstance(item, str):
+        text = item
+    elif isinstance(item, dict):
+        text = item.get("address") or ", ".join(
+            str(item[field]).strip() for field in ADDRESS_FIELDS if str(item.get(field) or "").strip()
+        )
+    else:
+        return None
+    text = str(text).strip()
+    return text or None
+
+
+def _address_id(item):
+    if not isinstance(item, dict) or not item.get("id"):
+        return None
+    try:
+        return uuid.UUID(str(item["id"]))
+    except ValueError:
+        return None
+
+
+def stream_batch_validation(items, user_id, concurrency=10):
+    """Yield one NDJSON line per item, in input order, then write valid results back to Address rows."""
+    texts = [address_text(item) for item in items]
+    ids = [_address_id(item) for item in items]
+
+    owned = set()
+    requested = {address_id for address_id in ids if address_id}
+    if requested:
+        owned = set(Address.objects.filter(id__in=requested, user_id=user_id).values_list("id", flat=True))
+
+    results = validate_addresses([text for text in texts if text], concurrency=concurrency)
+    updates = {}
+    for index, (text, address_id) in enumerate(zip(texts, ids)):
+        line = {"index": index}
+        if address_id:
+            line["id"] = str(address_id)
+
+        if text is None:
+            line.update({"valid": False, "error": "No address given"})
+        else:
+            result = next(results)
+            line["input"] = text
+            line.update(result)
+            if address_id in owned and result.get("valid"):
+                updates[address_id] = result
+        yield json.dumps(line) + "\n"
+
+    # Drain the generator so its results are persisted to the geocode cache.
+    for _ in results:
+        pass
+
+    if updates:
+        now = timezone.now()
+        addresses = [
+            Address(
+                id=address_id,
+                location=Point(result["longitude"], result["latitude"], srid=4326),
+                is_valid=True,
+                updated_at=now,
+            )
+            for address_id, result in updates.items()
+        ]
+        with transaction.atomic():
+            Address.objects.bulk_update(addresses, ["location", "is_valid", "updated_at"])
+            record_changes(ChangeEvent.UPDATE, addresses, fields=["location", "is_valid"])
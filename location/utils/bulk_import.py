@@ -0,0 +1,243 @@
+"""
+Bulk Address Import Module
+
+This module imports large batches of addresses for a single user without going through
+`AddressSerializer` row by row. Country, State and City rows are resolved for a whole chunk
+with set-based queries, and addresses are inserted with `bulk_create(..., ignore_conflicts=True)`
+against the `Address` unique constraint. New rows are queued for the background geocoding worker.
+
+Functions:
+- normalize_row(row): Cleans one input row the same way `AddressSerializer.to_internal_value` does
+  and returns (data, errors).
+
+- resolve_locations(rows): Maps the country/state/city names of normalized rows to model instances,
+  creating any that are missing with one `bulk_create` per level.
+
+- import_addresses(rows, user_id, tenant_id=None): Imports the rows in chunks and returns a per-row
+  result report. New rows are stored under the caller's tenant, when they have one.
+
+Usage Example:
+    report = import_addresses(
+        [{"address_line_1": "1 Main St", "postal_code": "45402", "city": "Dayton",
+          "state": "Ohio", "country": "US"}],
+        user_id=request.user.user_id,
+    )
+"""
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
+
+from location.models import Address, ChangeEvent, City, Country, State
+from location.utils.change_stream import record_changes
+from location.utils.geocode_queue import enqueue_geocoding
+from location.utils.response_cache import bump_user_version
+
+BULK_IMPORT_CHUNK_SIZE = 1000
+
+REQUIRED_FIELDS = ("address_line_1", "postal_code", "city", "country")
+
+
+def _clean(value):
+    return str(value or "").strip()
+
+
+def _boolean(value):
+    """Parse a flag the way the serializer's BooleanField does ("false", "0", "no" are False); None if invalid."""
+    if value is None or value == "":
+        return False
+    try:
+        return BooleanField().to_internal_value(value)
+    except ValidationError:
+        return None
+
+
+def normalize_row(row):
+    """Normalize one input row; returns (data, errors) where errors is a dict or None."""
+    if not isinstance(row, dict):
+        return None, {"error": "Each row must be a JSON object."}
+
+    data = {
+        "address_line_1": _clean(row.get("address_line_1")).title(),
+        "address_line_2": _clean(row.get("address_line_2")).upper(),
+        "postal_code": _clean(row.get("postal_code")),
+        "city": _clean(row.get("city")).upper(),
+        "state": _clean(row.get("state")).upper(),
+        "country": _clean(row.get("country")).upper(),
+        "is_billing": _boolean(row.get("is_billing")),
+        "is_default": _boolean(row.get("is_default")),
+    }
+
+    errors = {field: "This field is required." for field in REQUIRED_FIELDS if not data[field]}
+    for field in ("is_billing", "is_default"):
+        if data[field] is None:
+            errors[field] = "Must be a valid boolean."
+    if len(data["country"]) > 2:
+        errors["country"] = "Use the two-letter ISO country code."
+    return data, errors or None
+
+
+def resolve_locations(rows):
+    """
+    Resolve Country, State and City instances for normalized rows.
+
+    Returns three dicts keyed on country code, (country_id, state name) and
+    (country_id, state_id, city name). Missing rows are created in bulk.
+    """
+    codes = {row["country"] for row in rows}
+    countries = {}
+    for country in Country.objects.filter(code__in=codes).order_by("created_at"):
+        countries.setdefault(country.code, country)
+    missing = [Country(code=code) for code in codes if code not in countries]
+    for country in Country.objects.bulk_create(missing):
+        countries[country.code] = country
+
+    state_keys = {(countries[row["country"]].id, row["state"]) for row in rows if row["state"]}
+    states = {}
+    existing = State.objects.filter(
+        country_id__in={country_id for country_id, _ in state_keys},
+        name__in={name for _, name in state_keys},
+    ).order_by("created_at")
+    for state in existing:
+        states.setdefault((state.country_id, state.name), state)
+    missing = [State(country_id=country_id, name=name) for country_id, name in state_keys if (country_id, name) not in states]
+    for state in State.objects.bulk_create(missing):
+        states[(state.country_id, state.name)] = state
+
+    city_keys = set()
+    for row in rows:
+        country_id = countries[row["country"]].id
+        state = states.get((country_id, row["state"]))
+        city_keys.add((country_id, state.id if state else None, row["city"]))
+    cities = {}
+    existing = City.objects.filter(
+        country_id__in={country_id for country_id, _, _ in city_keys},
+        name__in={name for _, _, name in city_keys},
+    ).order_by("created_at")
+    for city in existing:
+        cities.setdefault((city.country_id, city.state_id, city.name), city)
+    missing = [
+        City(country_id=country_id, state_id=state_id, name=name)
+        for country_id, state_id, name in city_keys
+        if (country_id, state_id, name) not in cities
+    ]
+    for city in City.objects.bulk_create(missing):
+        cities[(city.country_id, city.state_id, city.name)] = city
+
+    return countries, states, cities
+
+
+def _existing_keys(addresses, user_id):
+    """Return the unique keys of addresses in this chunk that are already stored."""
+    queryset = Address.objects.filter(
+        user_id=user_id,
+        address_line_1__in={address.address_line_1 for address in addresses},
+        postal_code__in={address.postal_code for address in addresses},
+    )
+    return {
+        (line_1, line_2, str(city_id), str(state_id) if state_id else None, str(country_id), postal_code): address_id
+        for address_id, line_1, line_2, city_id, state_id, country_id, postal_code in queryset.values_list(
+            "id", "address_line_1", "address_line_2", "city_id", "state_id", "country_id", "postal_code"
+        )
+    }
+
+
+def _key(address):
+    return (
+        address.address_line_1,
+        address.address_line_2,
+        str(address.city_id),
+        str(address.state_id) if address.state_id else None,
+        str(address.country_id),
+        address.postal_code,
+    )
+
+
+def _import_chunk(chunk, user_id, tenant_id, results):
+    valid = []
+    for index, row in chunk:
+        data, errors = normalize_row(row)
+        if errors:
+            results[index] = {"row": index, "status": "error", "errors": errors}
+        else:
+            valid.append((index, data))
+    if not valid:
+        return
+
+    with transaction.atomic():
+        countries, states, cities = resolve_locations([data for _, data in valid])
+
+        pending = []
+        for index, data in valid:
+            country = countries[data["country"]]
+            state = states.get((country.id, data["state"]))
+            city = cities[(country.id, state.id if state else None, data["city"])]
+            address = Address(
+                address_line_1=data["address_line_1"],
+                address_line_2=data["address_line_2"],
+                postal_code=data["postal_code"],
+                city=city,
+                state=state,
+                country=country,
+                user_id=user_id,
+                tenant_id=tenant_id,
+                is_billing=data["is_billing"],
+                is_default=data["is_default"],
+            )
+            pending.append((index, address))
+
+        existing = _existing_keys([address for _, address in pending], user_id)
+        seen = {}
+        to_create = []
+        rows_by_id = {}
+        for index, address in pending:
+            key = _key(address)
+            if key in existing:
+                results[index] = {"row": index, "status": "exists", "id": str(existing[key])}
+            elif key in seen:
+                results[index] = {"row": index, "status": "duplicate", "id": str(seen[key])}
+                rows_by_id[seen[key]].append(index)
+            else:
+                seen[key] = address.id
+                to_create.append(address)
+                results[index] = {"row": index, "status": "created", "id": str(address.id)}
+                rows_by_id[address.id] = [index]
+
+        Address.objects.bulk_create(to_create, ignore_conflicts=True)
+        created_ids = set(
+            Address.objects.filter(id__in=[address.id for address in to_create]).values_list("id", flat=True)
+        )
+        # Rows skipped by ignore_conflicts were inserted concurrently by another request; report
+        # them as existing, with the id of the stored row.
+        conflicted = [address for address in to_create if address.id not in created_ids]
+        if conflicted:
+            stored = _existing_keys(conflicted, user_id)
+            for address in conflicted:
+                stored_id = str(stored[_key(address)])
+                for index in rows_by_id[address.id]:
+                    results[index]["id"] = stored_id
+                    if results[index]["status"] == "created":
+                        results[index]["status"] = "exists"
+
+        # bulk_create skips post_save, so invalidate cached reads, queue the new rows for the
+        # geocoding worker and feed the change stream here.
+        if created_ids:
+            bump_user_version(user_id)
+        enqueue_geocoding(created_ids)
+        record_changes(ChangeEvent.CREATE, [address for address in to_create if address.id in created_ids])
+
+
+def import_addresses(rows, user_id, tenant_id=None, chunk_size=BULK_IMPORT_CHUNK_SIZE):
+    """Import `rows` for `user_id` (and `tenant_id`) and return a summary plus one result entry per input row."""
+    user_id = Address._meta.get_field("user_id").to_python(user_id) if user_id else None
+    tenant_id = Address._meta.get_field("tenant_id").to_python(tenant_id) if tenant_id else None
+    results = [None] * len(rows)
+
+    indexed = list(enumerate(rows))
+    for start in range(0, len(indexed), chunk_size):
+        _import_chunk(indexed[start:start + chunk_size], user_id, tenant_id, results)
+
+    summary = {"created": 0, "exists": 0, "duplicate": 0, "error": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    return {"summary": summary, "results": results}
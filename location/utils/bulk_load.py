@@ -0,0 +1,157 @@
+"""
+Streaming Bulk Load Module
+
+This module provides the plumbing shared by the `load_country`, `load_state` and `load_city`
+management commands. Input files (GeoNames-style TSV or CSV) are streamed through a generator
+pipeline so memory stays constant regardless of file size:
+
+    read_rows(path) -> parse_row(fields) -> chunked(size) -> insert (bulk_create or COPY)
+
+Classes:
+- BulkLoadCommand: Base management command. Subclasses set `model` and implement `prepare()`
+  (build in-memory parent-key maps) and `parse_row(fields)` (return a model instance or None).
+- Progress: Prints rows-per-second and the resumable offset after every chunk.
+
+Functions:
+- read_rows(path, delimiter, offset): Yields (offset, fields) for data lines, skipping comments.
+- chunked(iterable, size): Groups an iterable into lists of at most `size` items.
+- copy_instances(model, instances): Inserts instances with PostgreSQL `COPY ... FROM STDIN`.
+"""
+
+import io
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from location.utils.hierarchy import clear_location_cache
+
+
+def read_rows(path, delimiter="\t", offset=0):
+    """Yield (offset, fields) for every data line after `offset`, skipping blanks and '#' comments."""
+    with open(path, encoding="utf-8", newline="") as handle:
+        position = 0
+        for line in handle:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            position += 1
+            if position <= offset:
+                continue
+            yield position, line.split(delimiter)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_instances(model, instances):
+    """Insert unsaved instances with COPY; auto_now/auto_now_add fields are filled in here."""
+    fields = [field for field in model._meta.concrete_fields]
+    now = timezone.now()
+    buffer = io.StringIO()
+    for instance in instances:
+        values = []
+        for field in fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                setattr(instance, field.attname, now)
+            value = getattr(instance, field.attname)
+            if hasattr(value, "hexewkb"):
+                value = value.hexewkb.decode()
+            else:
+                value = field.get_db_prep_save(value, connection)
+            values.append(_copy_value(value))
+        buffer.write(",".join(values) + "\n")
+    buffer.seek(0)
+
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+
+
+class Progress:
+    def __init__(self, stdout, label, offset=0):
+        self.stdout = stdout
+        self.label = label
+        self.offset = offset
+        self.rows = 0
+        self.inserted = 0
+        self.started = time.perf_counter()
+
+    def update(self, offset, rows, inserted):
+        self.offset = offset
+        self.rows += rows
+        self.inserted += inserted
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f"{self.label}: {self.rows} rows read, {self.inserted} inserted, "
+            f"{rate:,.0f} rows/s (resume with --offset {self.offset})"
+        )
+
+
+class BulkLoadCommand(BaseCommand):
+    """Base command for streaming a delimited file into one model in chunks."""
+
+    model = None
+    default_delimiter = "\t"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file (GeoNames TSV by default)")
+        parser.add_argument("--delimiter", default=None, help="Field delimiter (default: tab)")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per insert")
+        parser.add_argument("--offset", type=int, default=0, help="Skip this many data rows (resume)")
+        parser.add_argument("--method", choices=["bulk", "copy"], default="bulk", help="bulk_create or COPY")
+
+    def prepare(self):
+        """Build in-memory parent-key maps before streaming starts."""
+
+    def parse_row(self, fields):
+        """Return an unsaved model instance for one row, or None to skip it."""
+        raise NotImplementedError
+
+    def flush(self, instances, method):
+        """Insert a chunk of parsed instances; returns the number inserted."""
+        if not instances:
+            return 0
+        if method == "copy":
+            copy_instances(self.model, instances)
+        else:
+            self.model.objects.bulk_create(instances)
+        return len(instances)
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        delimiter = options["delimiter"] or self.default_delimiter
+        self.prepare()
+
+        progress = Progress(self.stdout, self.model.__name__, options["offset"])
+        rows = read_rows(path, delimiter=delimiter, offset=options["offset"])
+        for chunk in chunked(rows, options["chunk_size"]):
+            instances = [instance for instance in (self.parse_row(fields) for _, fields in chunk) if instance]
+            with transaction.atomic():
+                inserted = self.flush(instances, options["method"])
+            progress.update(chunk[-1][0], len(chunk), inserted)
+
+        clear_location_cache()
+        self.stdout.write(self.style.SUCCESS(f"{self.model.__name__}: inserted {progress.inserted} rows."))
@@ -0,0 +1,259 @@
+"""
+Change Stream Module
+
+This module publishes every Address, Route and RouteStop create/update/delete to Kafka, so
+downstream services can consume changes instead of polling the REST endpoints.
+
+It uses a transactional outbox. A write only inserts a `ChangeEvent` row, in the same
+transaction as the change: one INSERT, with no broker round trip on the request path. A relay
+(`manage.py relay_changes`) drains the table in id order:
+
+1. It locks a batch with `SELECT ... FOR UPDATE SKIP LOCKED`.
+2. It hands the batch to the producer, which batches and compresses (`CHANGE_STREAM_LINGER_MS`,
+   `CHANGE_STREAM_COMPRESSION`).
+3. It waits for the broker to acknowledge every message, then deletes the rows in the same
+   transaction.
+
+A crash or broker error rolls the transaction back, and the batch is sent again. Delivery is
+therefore at least once: consumers should de-duplicate on the event `id`.
+
+Messages are compact JSON keyed by "<entity>:<pk>", so all changes to one row land on the same
+partition in order:
+
+    {"id": 1042, "entity": "address", "key": "<uuid>", "op": "update", "at": "<iso time>",
+     "data": {"is_valid": true, "location": [-84.19, 39.76]}}
+
+Create events carry every tracked field. Updates carry the saved fields (all tracked fields
+unless `update_fields` was given). Deletes carry `data: null`.
+
+Signals cover per-row saves and deletes (location/signals.py, routing/signals.py). Bulk writes
+skip signals, so those call sites use `record_changes` directly.
+
+Classes:
+- InMemoryBroker: Stand-in for Kafka; keeps published messages per topic.
+- KafkaBroker: kafka-python producer wrapper that surfaces failed deliveries on `flush()`.
+
+Functions:
+- record_changes(op, instances, fields=None): Add outbox rows for changed model instances.
+- relay_batch(broker, batch_size): Publish and delete one batch; returns the number relayed.
+- get_broker(): The configured broker (process-wide).
+- relay_metrics(): Outbox depth plus this process's relay counters.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from location.models import ChangeEvent
+
+# Tracked models and the fields their events carry.
+EVENT_FIELDS = {
+    "location.Address": (
+        "address",
+        (
+            "address_line_1",
+            "address_line_2",
+            "postal_code",
+            "city_id",
+            "state_id",
+            "country_id",
+            "location",
+            "is_valid",
+            "is_billing",
+            "is_default",
+            "user_id",
+            "tenant_id",
+        ),
+    ),
+    "routing.Route": (
+        "route",
+        (
+            "plan_id",
+            "vehicle",
+            "name",
+            "origin_address",
+            "origin_latitude",
+            "origin_longitude",
+            "destination_address",
+            "destination_latitude",
+            "destination_longitude",
+            "user_id",
+            "tenant_id",
+        ),
+    ),
+    "routing.RouteStop": ("route_stop", ("route_id", "address", "latitude", "longitude", "delivery_time", "sequence")),
+}
+
+_counters = {"relayed": 0, "batches": 0, "failed_batches": 0}
+_counters_lock = threading.Lock()
+_started = time.monotonic()
+
+
+def _value(value):
+    if isinstance(value, GEOSGeometry):
+        return [round(value.x, 7), round(value.y, 7)]
+    return value
+
+
+def _data(instance, fields):
+    return {field: _value(getattr(instance, field)) for field in fields}
+
+
+def record_changes(op, instances, fields=None):
+    """
+    Add one outbox row per instance. `fields` limits update events to the given field names
+    (pass the `bulk_update` field list); omitted fields are not sent.
+    """
+    if not settings.CHANGE_STREAM_ENABLED:
+        return
+    events = []
+    for instance in instances:
+        entity, tracked = EVENT_FIELDS[instance._meta.label]
+        if op == ChangeEvent.DELETE:
+            data = None
+        else:
+            names = {name if name in tracked else f"{name}_id" for name in fields} if fields else None
+            data = _data(instance, [field for field in tracked if names is None or field in names])
+            if op == ChangeEvent.UPDATE and not data:
+                continue
+        events.append(ChangeEvent(entity=entity, key=str(instance.pk), op=op, data=data))
+    if events:
+        ChangeEvent.objects.bulk_create(events)
+
+
+def encode(event):
+    message = {
+        "id": event.id,
+        "entity": event.entity,
+        "key": event.key,
+        "op": event.op,
+        "at": event.created_at,
+        "data": event.data,
+    }
+    return json.dumps(message, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+class InMemoryBroker:
+    """Keeps (key, value) messages per topic; `fail_next` makes the next flush raise."""
+
+    def __init__(self):
+        self.messages = defaultdict(list)
+        self.pending = []
+        self.fail_next = False
+        self.lock = threading.Lock()
+
+    def send(self, topic, value, key=None):
+        with self.lock:
+            self.pending.append((topic, key, value))
+
+    def flush(self, timeout=None):
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if self.fail_next:
+                self.fail_next = False
+                raise ConnectionError("Simulated broker failure.")
+            for topic, key, value in pending:
+                self.messages[topic].append((key, value))
+
+    def published(self, topic):
+        """Decoded messages published to `topic`, oldest first."""
+        with self.lock:
+            return [json.loads(value) for _, value in self.messages[topic]]
+
+    def clear(self):
+        with self.lock:
+            self.messages.clear()
+            self.pending = []
+
+
+class KafkaBroker:
+    """Wraps a `KafkaProducer`; `flush()` raises if any message since the last flush failed."""
+
+    def __init__(self, servers, linger_ms, compression):
+        try:
+            from kafka import KafkaProducer
+        except ImportError as exc:
+            raise ImproperlyConfigured("CHANGE_STREAM_BROKER='kafka' requires the kafka-python package.") from exc
+        self.producer = KafkaProducer(
+            bootstrap_servers=servers,
+            acks="all",
+            linger_ms=linger_ms,
+            compression_type=None if compression == "none" else compression,
+            batch_size=256 * 1024,
+            retries=5,
+            # One in-flight request per broker keeps per-key order when a send is retried.
+            max_in_flight_requests_per_connection=1,
+        )
+        self.futures = []
+
+    def send(self, topic, value, key=None):
+        self.futures.append(self.producer.send(topic, value=value, key=key))
+
+    def flush(self, timeout=None):
+        self.producer.flush(timeout=timeout)
+        futures, self.futures = self.futures, []
+        for future in futures:
+            # Raises the delivery error, or KafkaTimeoutError if the message is still pending.
+            future.get(timeout=0)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.CHANGE_STREAM_BROKER == "memory":
+                    _broker = InMemoryBroker()
+                else:
+                    _broker = KafkaBroker(
+                        settings.KAFKA_SERVERS, settings.CHANGE_STREAM_LINGER_MS, settings.CHANGE_STREAM_COMPRESSION
+                    )
+    return _broker
+
+
+def relay_batch(broker, batch_size, timeout=30):
+    """Publish up to `batch_size` outbox rows, oldest first, and delete them once acknowledged."""
+    topic = settings.KAFKA_TOPIC
+    try:
+        with transaction.atomic():
+            events = list(ChangeEvent.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size])
+            if not events:
+                return 0
+            for event in events:
+                broker.send(topic, encode(event), key=f"{event.entity}:{event.key}".encode())
+            broker.flush(timeout=timeout)
+            ChangeEvent.objects.filter(id__in=[event.id for event in events]).delete()
+    except Exception:
+        with _counters_lock:
+            _counters["failed_batches"] += 1
+        raise
+    with _counters_lock:
+        _counters["relayed"] += len(events)
+        _counters["batches"] += 1
+    return len(events)
+
+
+def relay_metrics():
+    """Outbox depth and age, plus relay throughput in this process."""
+    oldest = ChangeEvent.objects.order_by("id").values_list("created_at", flat=True).first()
+    with _counters_lock:
+        counters = dict(_counters)
+    uptime = time.monotonic() - _started
+    return {
+        "outbox": ChangeEvent.objects.count(),
+        "oldest_event_at": oldest.isoformat() if oldest else None,
+        "counters": counters,
+        "uptime_seconds": round(uptime, 1),
+        "events_per_second": round(counters["relayed"] / uptime, 2) if uptime else 0.0,
+    }
@@ -0,0 +1,179 @@
+"""
+Geocoding Queue Module
+
+This module moves geocoding off the request path. Address writes only enqueue a `GeocodeJob`
+(one INSERT, deduplicated by a partial unique constraint on pending jobs); a pool of workers
+(`manage.py geocode_worker`) claims jobs in batches with `SELECT ... FOR UPDATE SKIP LOCKED`,
+geocodes them through the cached `validate_addresses` fan-out, and fills `location`, `is_valid`,
+`timezone` and `language` on the addresses. Finished jobs are deleted; jobs that keep failing
+upstream are retried with exponential backoff and parked as `failed` after MAX_ATTEMPTS.
+Any number of workers can run side by side.
+
+Functions:
+- enqueue_geocoding(address_ids): Adds pending jobs for the given addresses.
+- claim_jobs(batch_size, worker_id): Atomically claims up to `batch_size` due jobs.
+- process_jobs(jobs, concurrency): Geocodes claimed jobs and records the outcome.
+- requeue_stale_jobs(older_than): Returns jobs abandoned by crashed workers to the queue.
+- queue_metrics(): Queue depth per status plus this process's throughput counters.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.gis.geos import Point
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from location.models import Address, ChangeEvent, GeocodeJob
+from location.utils.address_validation import RETRYABLE_STATUSES, validate_addresses
+from location.utils.change_stream import record_changes
+
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 30
+
+_counters = {"processed": 0, "succeeded": 0, "invalid": 0, "retried": 0, "failed": 0}
+_counters_lock = threading.Lock()
+_started = time.monotonic()
+
+
+def _count(**increments):
+    with _counters_lock:
+        for counter, value in increments.items():
+            _counters[counter] += value
+
+
+def enqueue_geocoding(address_ids):
+    """Queue addresses for geocoding; addresses that already have a pending job are skipped."""
+    jobs = [GeocodeJob(address_id=address_id) for address_id in address_ids]
+    if jobs:
+        GeocodeJob.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+def claim_jobs(batch_size, worker_id):
+    """Claim up to `batch_size` due jobs; concurrent workers skip rows another worker has locked."""
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            GeocodeJob.objects.select_for_update(skip_locked=True)
+            .filter(status=GeocodeJob.PENDING, available_at__lte=now)
+            .order_by("available_at")[:batch_size]
+        )
+        if jobs:
+            GeocodeJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=GeocodeJob.PROCESSING,
+                locked_at=now,
+                locked_by=worker_id,
+                attempts=F("attempts") + 1,
+                updated_at=now,
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def _address_text(address):
+    parts = [
+        address.address_line_1,
+        address.address_line_2,
+        address.city.name if address.city else "",
+        address.state.name if address.state else "",
+        address.postal_code,
+        address.country.code if address.country else "",
+    ]
+    return ", ".join(part for part in parts if part)
+
+
+def process_jobs(jobs, concurrency=10):
+    """Geocode the addresses behind `jobs`, write results back and settle each job."""
+    addresses = Address.objects.select_related("city", "state", "country").in_bulk(
+        [job.address_id for job in jobs]
+    )
+    now = timezone.now()
+    jobs = [job for job in jobs if job.address_id in addresses]
+    results = list(
+        validate_addresses([_address_text(addresses[job.address_id]) for job in jobs], concurrency, with_status=True)
+    )
+
+    updated_addresses = []
+    done, retry, failed = [], [], []
+    for job, (status, result) in zip(jobs, results):
+        address = addresses[job.address_id]
+
+        if status in RETRYABLE_STATUSES:
+            job.last_error = f"{status}: {result.get('error', '')}"
+            if job.attempts >= MAX_ATTEMPTS:
+                job.status = GeocodeJob.FAILED
+                failed.append(job)
+            else:
+                job.status = GeocodeJob.PENDING
+                job.available_at = now + timedelta(seconds=RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1))
+                retry.append(job)
+            continue
+
+        address.is_valid = bool(result.get("valid"))
+        if address.is_valid:
+            address.location = Point(result["longitude"], result["latitude"], srid=4326)
+        address.timezone = address.timezone or address.country.timezone
+        address.language = address.language or address.country.language
+        address.updated_at = now
+        updated_addresses.append(address)
+
+        done.append(job)
+
+    with transaction.atomic():
+        if updated_addresses:
+            Address.objects.bulk_update(
+                updated_addresses, ["location", "is_valid", "timezone", "language", "updated_at"]
+            )
+            record_changes(ChangeEvent.UPDATE, updated_addresses, fields=["location", "is_valid"])
+        GeocodeJob.objects.filter(id__in=[job.id for job in done]).delete()
+        for job in failed + retry:
+            job.updated_at = now
+        GeocodeJob.objects.bulk_update(failed, ["status", "last_error", "updated_at"])
+        # A newer pending job for the same address may exist; drop retries that would collide with it.
+        pending = set(
+            GeocodeJob.objects.filter(
+                status=GeocodeJob.PENDING, address_id__in=[job.address_id for job in retry]
+            ).values_list("address_id", flat=True)
+        )
+        GeocodeJob.objects.filter(id__in=[job.id for job in retry if job.address_id in pending]).delete()
+        GeocodeJob.objects.bulk_update(
+            [job for job in retry if job.address_id not in pending],
+            ["status", "available_at", "last_error", "updated_at"],
+        )
+
+    _count(
+        processed=len(jobs),
+        succeeded=sum(1 for address in updated_addresses if address.is_valid),
+        invalid=sum(1 for address in updated_addresses if not address.is_valid),
+        retried=len(retry),
+        failed=len(failed),
+    )
+    return len(jobs)
+
+
+def requeue_stale_jobs(older_than=timedelta(minutes=5)):
+    """Return jobs stuck in `processing` (their worker died) to the pending queue."""
+    cutoff = timezone.now() - older_than
+    stale = GeocodeJob.objects.filter(status=GeocodeJob.PROCESSING, locked_at__lt=cutoff)
+    # Addresses that were re-queued meanwhile already have a pending job.
+    superseded = stale.filter(
+        address_id__in=GeocodeJob.objects.filter(status=GeocodeJob.PENDING).values("address_id")
+    )
+    superseded.delete()
+    return stale.update(status=GeocodeJob.PENDING, locked_at=None, locked_by="", available_at=timezone.now())
+
+
+def queue_metrics():
+    """Queue depth per status, plus jobs processed by this process and its throughput (jobs/s)."""
+    depth = {status: 0 for status, _ in GeocodeJob.STATUS_CHOICES}
+    for row in GeocodeJob.objects.values("status").annotate(total=Count("id")):
+        depth[row["status"]] = row["total"]
+
+    with _counters_lock:
+        counters = dict(_counters)
+    elapsed = time.monotonic() - _started
+    counters["throughput"] = counters["processed"] / elapsed if elapsed else 0.0
+    return {"depth": depth, "worker": counters}
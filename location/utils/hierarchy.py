@@ -0,0 +1,102 @@
+"""
+Location Hierarchy Cache Module
+
+This module keeps a process-local map of the Country -> State -> City hierarchy so that turning
+"US" / "OHIO" / "DAYTON" into foreign keys costs no database queries once a location has been seen.
+
+The cache is filled lazily: a miss falls back to `get_or_create` (without the boundary polygons) and
+stores the result once the surrounding transaction commits, so a rolled-back row is never cached.
+Entries are invalidated by the `post_save` / `post_delete` receivers in `location.signals`.
+
+Functions:
+- resolve_location(country_code, state_name, city_name): Returns (country, state, city) instances.
+
+- invalidate_country(pk), invalidate_state(pk), invalidate_city(pk): Drop cached entries for a row.
+
+- clear_location_cache(): Drop everything (used by tests and bulk loaders).
+"""
+
+import threading
+
+from django.db import transaction
+
+from location.models import City, Country, State
+
+_countries = {}
+_states = {}
+_cities = {}
+_lock = threading.Lock()
+
+
+def _normalize(value):
+    return (value or "").strip().upper()
+
+
+def _publish(cache, key, instance):
+    """Cache `instance` once the current transaction commits (immediately in autocommit mode)."""
+
+    def publish():
+        with _lock:
+            cache[key] = instance
+
+    transaction.on_commit(publish)
+
+
+def resolve_location(country_code, state_name, city_name):
+    """Return (country, state, city) for the given names, creating missing rows."""
+    country_code = _normalize(country_code)
+    state_name = _normalize(state_name)
+    city_name = _normalize(city_name)
+
+    country = _countries.get(country_code)
+    if country is None:
+        country, _ = Country.objects.defer("boundary").get_or_create(code=country_code)
+        _publish(_countries, country_code, country)
+
+    state_key = (country.pk, state_name)
+    state = _states.get(state_key)
+    if state is None:
+        state, _ = State.objects.defer("boundary").get_or_create(name=state_name, country=country)
+        _publish(_states, state_key, state)
+
+    city_key = (country.pk, state.pk, city_name)
+    city = _cities.get(city_key)
+    if city is None:
+        city, _ = City.objects.defer("boundary").get_or_create(name=city_name, state=state, country=country)
+        _publish(_cities, city_key, city)
+
+    return country, state, city
+
+
+def _evict(cache, pk):
+    with _lock:
+        for key in [key for key, instance in cache.items() if instance.pk == pk]:
+            del cache[key]
+
+
+def invalidate_country(pk):
+    _evict(_countries, pk)
+    # States and cities are keyed on the country, and are removed with it on delete.
+    with _lock:
+        for key in [key for key in _states if key[0] == pk]:
+            del _states[key]
+        for key in [key for key in _cities if key[0] == pk]:
+            del _cities[key]
+
+
+def invalidate_state(pk):
+    _evict(_states, pk)
+    with _lock:
+        for key in [key for key in _cities if key[1] == pk]:
+            del _cities[key]
+
+
+def invalidate_city(pk):
+    _evict(_cities, pk)
+
+
+def clear_location_cache():
+    with _lock:
+        _countries.clear()
+        _states.clear()
+        _cities.clear()
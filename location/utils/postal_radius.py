@@ -0,0 +1,140 @@
+"""
+Postal Radius Engine Module
+
+This module answers "which ZIP codes lie within N miles of this ZIP code" entirely in process,
+from the centroids stored in the `PostalCode` table. No network access is needed.
+
+Centroids are held in NumPy arrays sorted by latitude. A query first narrows the candidates to a
+bounding box (a `searchsorted` latitude band, then a vectorized longitude mask) and only then runs
+an exact haversine check on the survivors, so a lookup over the full US ZIP set takes microseconds.
+
+Classes:
+- PostalRadiusEngine: Immutable index over (code, latitude, longitude) arrays.
+
+Functions:
+- get_engine(country_code="US"): Returns the process-wide engine, loading it from the database once.
+- reload_engine(country_code=None): Drops cached engines so the next call reloads them.
+
+Usage Example:
+    engine = get_engine()
+    engine.within("45440", 5)              # ["45440", "45429", ...] nearest first
+    engine.within("45440", 8, units="km")
+"""
+
+import threading
+
+import numpy as np
+
+from location.models import PostalCode
+
+EARTH_RADIUS = {"miles": 3958.7613, "km": 6371.0088}
+UNIT_ALIASES = {"miles": "miles", "mile": "miles", "mi": "miles", "km": "km", "kilometers": "km"}
+
+
+def _earth_radius(units):
+    try:
+        return EARTH_RADIUS[UNIT_ALIASES[units]]
+    except KeyError:
+        raise ValueError(f"Unsupported units '{units}'. Use 'miles' or 'km'.")
+
+
+class PostalRadiusEngine:
+    """Latitude-sorted centroid arrays with a bounding-box prefilter and exact haversine check."""
+
+    def __init__(self, codes, latitudes, longitudes):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        order = np.argsort(latitudes, kind="stable")
+
+        self.codes = np.asarray(codes, dtype=object)[order]
+        self.latitudes = latitudes[order]
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)[order]
+        self._lat_radians = np.radians(self.latitudes)
+        self._lng_radians = np.radians(self.longitudes)
+        self._cos_lat = np.cos(self._lat_radians)
+        self._positions = {code: position for position, code in enumerate(self.codes)}
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        rows = list(queryset.values_list("code", "latitude", "longitude"))
+        if not rows:
+            return cls([], [], [])
+        codes, latitudes, longitudes = zip(*rows)
+        return cls(codes, latitudes, longitudes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self._positions
+
+    def within_point(self, latitude, longitude, distance, units="miles"):
+        """Return (codes, distances) within `distance` of a point, nearest first."""
+        radius = _earth_radius(units)
+        if len(self.codes) == 0 or distance < 0:
+            return [], []
+
+        # Bounding box: a latitude band via binary search, then a longitude mask inside it.
+        delta_lat = np.degrees(distance / radius)
+        start = np.searchsorted(self.latitudes, latitude - delta_lat, side="left")
+        stop = np.searchsorted(self.latitudes, latitude + delta_lat, side="right")
+        if start == stop:
+            return [], []
+
+        # Widest longitude offset on the circle is asin(sin(d/R) / cos(lat)) (delta_lat / cos(lat)
+        # undershoots it); when sin(d/R) >= cos(lat) the circle reaches a pole and spans every longitude.
+        angular = distance / radius
+        cos_lat = np.cos(np.radians(latitude))
+        sin_angular = np.sin(angular)
+        if angular < np.pi / 2 and sin_angular < cos_lat:
+            delta_lng = np.degrees(np.arcsin(sin_angular / cos_lat))
+            offset = np.abs((self.longitudes[start:stop] - longitude + 180.0) % 360.0 - 180.0)
+            candidates = np.nonzero(offset <= delta_lng)[0] + start
+        else:
+            candidates = np.arange(start, stop)
+
+        # Exact haversine on the survivors.
+        lat1 = np.radians(latitude)
+        lng1 = np.radians(longitude)
+        dlat = self._lat_radians[candidates] - lat1
+        dlng = self._lng_radians[candidates] - lng1
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * self._cos_lat[candidates] * np.sin(dlng / 2) ** 2
+        distances = 2 * radius * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        inside = distances <= distance
+        candidates = candidates[inside]
+        distances = distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return self.codes[candidates[order]].tolist(), distances[order].tolist()
+
+    def within(self, zip_code, distance, units="miles"):
+        """Return ZIP codes within `distance` of `zip_code` (including itself), nearest first."""
+        position = self._positions.get(str(zip_code))
+        if position is None:
+            return []
+        codes, _ = self.within_point(self.latitudes[position], self.longitudes[position], distance, units)
+        return codes
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(country_code="US"):
+    """Return the cached engine for `country_code`, building it from `PostalCode` on first use."""
+    engine = _engines.get(country_code)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(country_code)
+            if engine is None:
+                engine = PostalRadiusEngine.from_queryset(PostalCode.objects.filter(country_code=country_code))
+                _engines[country_code] = engine
+    return engine
+
+
+def reload_engine(country_code=None):
+    """Forget cached engines (all of them when `country_code` is None)."""
+    with _engines_lock:
+        if country_code is None:
+            _engines.clear()
+        else:
+            _engines.pop(country_code, None)
@@ -0,0 +1,56 @@
+"""
+Address Proximity Module
+
+This module answers "which stored addresses are near this point" directly in PostGIS, using the
+geography `Address.location` column and its GiST index (`location_idx`).
+
+Functions:
+- to_meters(distance, unit): Converts a distance in "mi", "km" or "m" to meters.
+
+- addresses_within(queryset, latitude, longitude, radius, unit): Radius search. Filters with
+  `ST_DWithin` on the indexed geography column and orders by distance.
+
+- nearest_addresses(queryset, latitude, longitude, radius=None, unit="mi"): k-nearest-neighbour
+  search ordered by the index-assisted `<->` operator; slice the result to pick k.
+
+Both functions annotate each row with `distance` (a `django.contrib.gis.measure.Distance`).
+"""
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+UNITS = {"mi": "mi", "km": "km", "m": "m"}
+
+
+def to_meters(distance, unit):
+    if unit not in UNITS:
+        raise ValueError(f"Unsupported unit '{unit}'. Use one of: {', '.join(UNITS)}.")
+    return D(**{UNITS[unit]: distance}).m
+
+
+def addresses_within(queryset, latitude, longitude, radius, unit="mi"):
+    """Return addresses within `radius` of the point, nearest first."""
+    point = Point(longitude, latitude, srid=4326)
+    return (
+        queryset.filter(location__dwithin=(point, D(m=to_meters(radius, unit))))
+        .annotate(distance=Distance("location", point))
+        .order_by("distance")
+    )
+
+
+def nearest_addresses(queryset, latitude, longitude, radius=None, unit="mi"):
+    """Return addresses ordered by the KNN `<->` operator; slice the result to take the k nearest."""
+    point = Point(longitude, latitude, srid=4326)
+    if radius is not None:
+        queryset = queryset.filter(location__dwithin=(point, D(m=to_meters(radius, unit))))
+
+    table = queryset.model._meta.db_table
+    knn = RawSQL(
+        f'"{table}"."location" <-> ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography',
+        (longitude, latitude),
+        output_field=FloatField(),
+    )
+    return queryset.annotate(distance=Distance("location", point)).order_by(knn)
@@ -0,0 +1,135 @@
+"""
+Address Response Cache Module
+
+This module caches rendered address read responses (list pages and single addresses) per user,
+so repeated reads skip the database query and serialization entirely. Keys are versioned instead
+of deleted:
+
+- Every user has a version counter, bumped whenever one of their addresses is created, updated
+  or deleted (see `location.signals` and `bulk_import`). Old entries become unreachable and expire
+  on their own.
+- A global version is bumped when a Country, State or City changes, because their names are part
+  of every address representation.
+
+Each entry stores the body and its ETag, so a client that sends a matching `If-None-Match` gets
+a 304 without the body being rebuilt.
+
+The backend is the Django cache named by `ADDRESS_CACHE_ALIAS` (a file cache shared by the workers
+on one host by default). A process-local backend (LocMemCache) only sees version bumps made in the
+same process, and the shipped gunicorn config runs several workers, so caching is switched off if
+the alias is pointed at one. Set `ADDRESS_CACHE_ALLOW_LOCAL` for single-process setups.
+
+The async read views (location/async_views.py) and the sync viewset handlers (location/views.py)
+both go through this module, so ASGI and WSGI deployments cache the same way.
+
+Functions:
+- user_version(user_id) / auser_version(user_id): Current version for a user.
+- bump_user_version(user_id): Invalidate every cached response of one user.
+- bump_global_version(): Invalidate every cached response.
+- response_key(user_id, version, url): Cache key for one response.
+- make_etag(body): Strong ETag for a response body.
+- get_cache(): The configured cache backend.
+- is_enabled(): Whether responses are cached at all (TTL > 0 and a shared backend).
+- entry_response(entry, request): 200 (or 304 on a matching `If-None-Match`) for a cache entry.
+
+Usage Example:
+    key = response_key(user_id, await auser_version(user_id), request.build_absolute_uri())
+    entry = await get_cache().aget(key)  # {"etag": ..., "body": ...} or None
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+KEY_PREFIX = "address-response"
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def get_cache():
+    return caches[settings.ADDRESS_CACHE_ALIAS]
+
+
+def is_enabled():
+    if settings.ADDRESS_CACHE_TTL <= 0:
+        return False
+    return settings.ADDRESS_CACHE_ALLOW_LOCAL or not isinstance(get_cache(), PROCESS_LOCAL_BACKENDS)
+
+
+def _version_key(user_id):
+    return f"{KEY_PREFIX}:version:{user_id}"
+
+
+def _global_key():
+    return f"{KEY_PREFIX}:version"
+
+
+def _fresh_version():
+    # Versions start from a clock value, not 0, so an evicted counter never comes back to a
+    # value whose cached responses may still be around.
+    return time.time_ns()
+
+
+def _bump(key):
+    cache = get_cache()
+    cache.add(key, _fresh_version(), timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr().
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def bump_user_version(user_id):
+    if user_id:
+        _bump(_version_key(user_id))
+
+
+def bump_global_version():
+    _bump(_global_key())
+
+
+def user_version(user_id):
+    cache = get_cache()
+    keys = [_global_key(), _version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _fresh_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return f"{versions[keys[0]]}.{versions[keys[1]]}"
+
+
+async def auser_version(user_id):
+    cache = get_cache()
+    keys = [_global_key(), _version_key(user_id)]
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _fresh_version(), timeout=None)
+            versions[key] = await cache.aget(key)
+    return f"{versions[keys[0]]}.{versions[keys[1]]}"
+
+
+def response_key(user_id, version, url):
+    digest = hashlib.sha256(url.encode()).hexdigest()[:32]
+    return f"{KEY_PREFIX}:{user_id}:{version}:{digest}"
+
+
+def make_etag(body):
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def entry_response(entry, request):
+    if entry["etag"] in parse_etags(request.headers.get("If-None-Match", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry["body"], content_type="application/json")
+    response["ETag"] = entry["etag"]
+    response["Cache-Control"] = "private, no-cache"
+    return response
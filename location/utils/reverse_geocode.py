@@ -0,0 +1,311 @@
+"""
+Reverse Geocoding Module
+
+This module turns a latitude/longitude into the City / State / Country that contains it, using the
+`boundary` polygons stored on the location hierarchy (see `manage.py load_boundaries`). No call
+to the paid geocoding API is made.
+
+Queries are answered in process:
+
+1. Each level's boundaries are simplified (Douglas-Peucker, `REVERSE_GEOCODE_TOLERANCE` degrees)
+   and prepared, and their bounding boxes are packed into an STR tree held in NumPy arrays.
+2. A lookup walks the tree to the few polygons whose box contains the point and runs a prepared
+   point-in-polygon test on them.
+3. Simplification moves edges by at most the tolerance, so only points within that distance of a
+   simplified edge can get a different answer than the exact polygon. Those points (tested with a
+   prepared buffer around each boundary) are resolved from the exact geometry in PostGIS via the
+   GiST index.
+
+Most lookups never touch the database, and repeated points are served from a small LRU.
+
+Boundaries change in other processes (`load_boundaries`, the admin), so each process compares a
+cheap version of them (latest `updated_at` and count of rows with a boundary, per level) at most
+every `REVERSE_GEOCODE_CHECK_INTERVAL` seconds and rebuilds its index when it moved. Local
+City/State/Country saves only bring that check forward; saves that leave boundaries alone (e.g.
+a city created by an address POST) never trigger a rebuild. A rebuild happens in one thread
+while the others keep answering from the previous index.
+
+Classes:
+- STRtree: Static sort-tile-recursive packed R-tree over bounding boxes; `query(x, y)` returns the
+  indices of the boxes containing a point.
+- ReverseGeocoder: Per-level trees plus the lookup logic.
+
+Functions:
+- reverse_geocode(latitude, longitude): Returns {"country", "state", "city"} (each a dict or None).
+- get_geocoder(): Returns the process-wide geocoder, building it from the database once.
+- boundary_version(): The version compared against the database.
+- check_boundaries(): Makes the next lookup compare the version (called on hierarchy saves).
+- reload_geocoder(): Drops the index so the next call rebuilds it unconditionally.
+- reverse_geocode_stats(): Hit/miss counters of the lookup cache.
+
+Usage Example:
+    reverse_geocode(39.7589, -84.1916)
+    # {"country": {"id": ..., "code": "US", "name": "United States"},
+    #  "state": {"id": ..., "name": "OHIO", "code": "OH"}, "city": {"id": ..., "name": "DAYTON"}}
+"""
+
+import math
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db.models import Count, Max
+
+from location.models import City, Country, State
+from location.utils.cache import MISSING, TTLCache
+
+NODE_CAPACITY = 10
+COORDINATE_PRECISION = 5
+
+
+class STRtree:
+    """
+    Sort-tile-recursive packed R-tree over axis-aligned boxes (minx, miny, maxx, maxy).
+
+    Leaves are ordered by STR (vertical slices by x, then y within each slice) and grouped into
+    nodes of `node_capacity`; each upper level groups the one below the same way. Every level is a
+    (n, 4) array of boxes, and a node's children are a contiguous slice of the level below.
+    """
+
+    def __init__(self, boxes, node_capacity=NODE_CAPACITY):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.node_capacity = node_capacity
+        self.order = self._str_order(boxes, node_capacity)
+        self.levels = [boxes[self.order]]
+        while len(self.levels[-1]) > node_capacity:
+            self.levels.append(self._parents(self.levels[-1], node_capacity))
+
+    @staticmethod
+    def _str_order(boxes, capacity):
+        count = len(boxes)
+        if count == 0:
+            return np.zeros(0, dtype=np.int64)
+        centers_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        centers_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        leaves = math.ceil(count / capacity)
+        slice_size = math.ceil(math.sqrt(leaves)) * capacity
+
+        by_x = np.argsort(centers_x, kind="stable")
+        order = []
+        for start in range(0, count, slice_size):
+            chunk = by_x[start:start + slice_size]
+            order.append(chunk[np.argsort(centers_y[chunk], kind="stable")])
+        return np.concatenate(order)
+
+    @staticmethod
+    def _parents(boxes, capacity):
+        starts = np.arange(0, len(boxes), capacity)
+        return np.column_stack(
+            [
+                np.minimum.reduceat(boxes[:, 0], starts),
+                np.minimum.reduceat(boxes[:, 1], starts),
+                np.maximum.reduceat(boxes[:, 2], starts),
+                np.maximum.reduceat(boxes[:, 3], starts),
+            ]
+        )
+
+    def __len__(self):
+        return len(self.order)
+
+    def query(self, x, y):
+        """Return indices (into the input boxes) of every box that contains (x, y)."""
+        if not len(self.order):
+            return np.zeros(0, dtype=np.int64)
+
+        capacity = self.node_capacity
+        candidates = np.arange(len(self.levels[-1]))
+        for depth in range(len(self.levels) - 1, -1, -1):
+            boxes = self.levels[depth][candidates]
+            candidates = candidates[(boxes[:, 0] <= x) & (x <= boxes[:, 2]) & (boxes[:, 1] <= y) & (y <= boxes[:, 3])]
+            if depth > 0:
+                children = (candidates[:, None] * capacity + np.arange(capacity)).ravel()
+                candidates = children[children < len(self.levels[depth - 1])]
+        return self.order[candidates]
+
+
+class _Level:
+    """Simplified, prepared boundaries of one hierarchy level, indexed by an STR tree."""
+
+    def __init__(self, model, rows, tolerance):
+        self.model = model
+        self.ids, self.polygons, self.borders = [], [], []
+        boxes = []
+        for pk, boundary in rows:
+            simplified = boundary.simplify(tolerance, preserve_topology=True) if tolerance else boundary
+            if simplified.empty:
+                continue
+            minx, miny, maxx, maxy = simplified.extent
+            self.ids.append(pk)
+            self.polygons.append(simplified.prepared)
+            self.borders.append(simplified.boundary.buffer(tolerance, quadsegs=2).prepared if tolerance else None)
+            boxes.append((minx - tolerance, miny - tolerance, maxx + tolerance, maxy + tolerance))
+        self.tree = STRtree(boxes)
+
+    def locate(self, point):
+        """Return the id of the boundary containing `point`, or None; near-border points are checked exactly."""
+        near_border = False
+        found = None
+        for index in self.tree.query(point.x, point.y):
+            border = self.borders[index]
+            if border is not None and border.contains(point):
+                near_border = True
+            elif found is None and self.polygons[index].contains(point):
+                found = self.ids[index]
+        if near_border:
+            return self.model.objects.filter(boundary__contains=point).values_list("id", flat=True).first()
+        return found
+
+
+class ReverseGeocoder:
+    """Point -> (city, state, country) over in-memory simplified boundaries."""
+
+    def __init__(self, tolerance=0.0):
+        self.cities = _Level(City, self._boundaries(City), tolerance)
+        self.states = _Level(State, self._boundaries(State), tolerance)
+        self.countries = _Level(Country, self._boundaries(Country), tolerance)
+
+        self.country_info = {
+            pk: {"id": str(pk), "code": code, "name": name}
+            for pk, code, name in Country.objects.values_list("id", "code", "name")
+        }
+        self.state_info = {
+            pk: ({"id": str(pk), "name": name, "code": code}, country_id)
+            for pk, name, code, country_id in State.objects.values_list("id", "name", "code", "country_id")
+        }
+        self.city_info = {
+            pk: ({"id": str(pk), "name": name}, state_id, country_id)
+            for pk, name, state_id, country_id in City.objects.filter(id__in=self.cities.ids).values_list(
+                "id", "name", "state_id", "country_id"
+            )
+        }
+
+    @staticmethod
+    def _boundaries(model):
+        return model.objects.exclude(boundary=None).values_list("id", "boundary").iterator(chunk_size=200)
+
+    def locate(self, latitude, longitude):
+        point = Point(longitude, latitude, srid=4326)
+        city = state = country = None
+
+        city_id = self.cities.locate(point)
+        if city_id is not None and city_id in self.city_info:
+            city, state_id, country_id = self.city_info[city_id]
+        else:
+            state_id = self.states.locate(point)
+            country_id = None
+
+        if state_id is not None and state_id in self.state_info:
+            state, state_country_id = self.state_info[state_id]
+            country_id = country_id or state_country_id
+        if country_id is None:
+            country_id = self.countries.locate(point)
+        country = self.country_info.get(country_id)
+        return {"country": country, "state": state, "city": city}
+
+
+class _Index(NamedTuple):
+    """One build of the geocoder with its own lookup cache, swapped in as a unit."""
+    geocoder: ReverseGeocoder
+    results: TTLCache
+    version: tuple
+    checked_at: float
+    checked_request: int
+
+
+_index = None
+_index_lock = threading.Lock()
+# Bumped by check_boundaries(); an index checked before the latest bump is due for a check.
+_check_requests = 0
+
+
+def boundary_version():
+    """Per level, the latest `updated_at` and count of rows with a boundary; changes whenever a boundary does."""
+    version = []
+    for model in (Country, State, City):
+        stats = model.objects.exclude(boundary=None).aggregate(latest=Max("updated_at"), count=Count("id"))
+        version.append((stats["latest"], stats["count"]))
+    return tuple(version)
+
+
+def _is_due(index):
+    return (
+        index.checked_request != _check_requests
+        or time.monotonic() - index.checked_at >= settings.REVERSE_GEOCODE_CHECK_INTERVAL
+    )
+
+
+def _current_index():
+    """
+    Return the current index, comparing the boundary version when a check is due. While one
+    thread checks or rebuilds, the others keep answering from the previous index; only the very
+    first build makes callers wait.
+    """
+    index = _index
+    if index is not None and not _is_due(index):
+        return index
+    if not _index_lock.acquire(blocking=index is None):
+        return index
+    try:
+        return _refresh()
+    finally:
+        _index_lock.release()
+
+
+def _refresh():
+    global _index
+    index = _index
+    if index is not None and not _is_due(index):
+        return index
+    request = _check_requests
+    version = boundary_version()
+    if index is None or index.version != version:
+        index = _Index(
+            geocoder=ReverseGeocoder(tolerance=settings.REVERSE_GEOCODE_TOLERANCE),
+            results=TTLCache(max_entries=settings.REVERSE_GEOCODE_CACHE_MAX_ENTRIES, ttl=60 * 60 * 24),
+            version=version,
+            checked_at=time.monotonic(),
+            checked_request=request,
+        )
+    else:
+        index = index._replace(checked_at=time.monotonic(), checked_request=request)
+    _index = index
+    return index
+
+
+def get_geocoder():
+    """Return the process-wide geocoder, loading boundaries from the database on first use."""
+    return _current_index().geocoder
+
+
+def check_boundaries():
+    """Make the next lookup compare the boundary version (cheap) instead of waiting for the interval."""
+    global _check_requests
+    _check_requests += 1
+
+
+def reload_geocoder():
+    """Drop the index so the next lookup rebuilds it unconditionally."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def reverse_geocode_stats():
+    """Hit/miss counters of the lookup cache (zeros until the geocoder is built)."""
+    index = _index
+    return index.results.stats() if index is not None else {"hits": 0, "misses": 0, "size": 0}
+
+
+def reverse_geocode(latitude, longitude):
+    """Return {"country", "state", "city"} for a point; levels without a match are None."""
+    # One read of the index, so the geocoder and its cache always belong to the same build.
+    index = _current_index()
+    key = (round(latitude, COORDINATE_PRECISION), round(longitude, COORDINATE_PRECISION))
+    result = index.results.get(key)
+    if result is MISSING:
+        result = index.geocoder.locate(latitude, longitude)
+        index.results.set(key, result)
+    return result
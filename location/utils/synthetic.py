@@ -0,0 +1,150 @@
+"""
+Synthetic Data Module
+
+This module generates deterministic fake data for benchmarks (`manage.py benchmark`):
+
+- a geography: a grid of states split into cities, each with a square `boundary`;
+- addresses spread over those cities for one user or tenant;
+- delivery stops around a depot;
+- fake Google Geocoding and Directions handlers for `core.stub_server.StubProviderServer`,
+  so no request leaves the machine.
+
+All generators take a `random.Random`, so the same seed always produces the same data.
+
+Functions:
+- make_geography(rng, states=10, cities_per_state=25): Creates (or reuses) Country/State/City rows; returns the cities.
+- make_addresses(rng, cities, count, user_id=None, tenant_id=None): Bulk-inserts addresses; returns their ids.
+- make_stops(rng, count, center=DEPOT, spread=0.2): Route stops around `center`.
+- stub_routes(): Path -> handler map for the fake upstream server.
+
+Usage Example:
+    rng = random.Random(42)
+    cities = make_geography(rng)
+    make_addresses(rng, cities, 10_000, user_id=user_id)
+    with StubProviderServer(stub_routes()) as stub:
+        ...
+"""
+
+import hashlib
+
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+
+from location.models import Address, City, Country, State
+
+# Region the synthetic geography covers: (lat_min, lat_max, lng_min, lng_max)
+REGION = (35.0, 45.0, -95.0, -75.0)
+DEPOT = {"address": "Depot", "latitude": 39.7589, "longitude": -84.1916}
+STREETS = ("Main", "Oak", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Park", "Pine", "Market", "Church")
+SUFFIXES = ("St", "Ave", "Rd", "Blvd", "Dr", "Ln", "Way", "Ct")
+
+
+def _square(min_lng, min_lat, max_lng, max_lat):
+    return MultiPolygon(Polygon.from_bbox((min_lng, min_lat, max_lng, max_lat)), srid=4326)
+
+
+def make_geography(rng, states=10, cities_per_state=25):
+    """One country split into `states` vertical strips, each split into a grid of city squares."""
+    lat_min, lat_max, lng_min, lng_max = REGION
+    country, created = Country.objects.get_or_create(
+        code="ZZ", defaults={"name": "Synthetic", "boundary": _square(lng_min, lat_min, lng_max, lat_max)}
+    )
+    if not created:  # kept from an earlier run (--keepdb)
+        return list(City.objects.filter(country=country))
+
+    strip = (lng_max - lng_min) / states
+    rows = max(1, int(cities_per_state**0.5))
+    columns = -(-cities_per_state // rows)
+    cities = []
+    for s in range(states):
+        west, east = lng_min + s * strip, lng_min + (s + 1) * strip
+        state = State.objects.create(
+            name=f"STATE {s:03d}", code=f"S{s:03d}", country=country, boundary=_square(west, lat_min, east, lat_max)
+        )
+        cell_lng, cell_lat = strip / columns, (lat_max - lat_min) / rows
+        for c in range(cities_per_state):
+            row, column = divmod(c, columns)
+            south, cell_west = lat_min + row * cell_lat, west + column * cell_lng
+            cities.append(
+                City(
+                    name=f"{rng.choice(STREETS).upper()}TON {s:03d}-{c:03d}",
+                    state=state,
+                    country=country,
+                    boundary=_square(cell_west, south, cell_west + cell_lng, south + cell_lat),
+                )
+            )
+    return City.objects.bulk_create(cities)
+
+
+def make_addresses(rng, cities, count, user_id=None, tenant_id=None, chunk_size=5000):
+    """Insert `count` addresses at random points inside random `cities`; returns their ids."""
+    ids = []
+    for start in range(0, count, chunk_size):
+        batch = []
+        for n in range(start, min(start + chunk_size, count)):
+            city = rng.choice(cities)
+            min_lng, min_lat, max_lng, max_lat = city.boundary.extent
+            batch.append(
+                Address(
+                    address_line_1=f"{rng.randint(1, 9999)} {rng.choice(STREETS)} {rng.choice(SUFFIXES)} #{n}",
+                    address_line_2="",
+                    postal_code=f"{rng.randint(10000, 99999)}",
+                    city=city,
+                    state_id=city.state_id,
+                    country_id=city.country_id,
+                    location=Point(rng.uniform(min_lng, max_lng), rng.uniform(min_lat, max_lat), srid=4326),
+                    is_valid=True,
+                    user_id=user_id,
+                    tenant_id=tenant_id,
+                )
+            )
+        ids.extend(address.id for address in Address.objects.bulk_create(batch))
+    return ids
+
+
+def make_stops(rng, count, center=DEPOT, spread=0.2):
+    return [
+        {
+            "address": f"Stop {n}",
+            "latitude": round(center["latitude"] + rng.uniform(-spread, spread), 6),
+            "longitude": round(center["longitude"] + rng.uniform(-spread, spread), 6),
+        }
+        for n in range(count)
+    ]
+
+
+def _fake_geocode(params):
+    """Deterministic OK result: the coordinates are derived from a hash of the address text."""
+    text = params.get("address", "")
+    digest = hashlib.sha256(text.encode()).digest()
+    lat_min, lat_max, lng_min, lng_max = REGION
+    lat = lat_min + (lat_max - lat_min) * digest[0] / 255
+    lng = lng_min + (lng_max - lng_min) * digest[1] / 255
+    parts = [part.strip() for part in text.split(",")]
+    street = parts[0] if parts else text
+    number, _, route = street.partition(" ")
+    components = [
+        {"long_name": number, "short_name": number, "types": ["street_number"]},
+        {"long_name": route, "short_name": route, "types": ["route"]},
+        {"long_name": parts[1] if len(parts) > 1 else "Synthetic City", "short_name": "", "types": ["locality"]},
+        {"long_name": "State 000", "short_name": "S000", "types": ["administrative_area_level_1"]},
+        {"long_name": "Synthetic", "short_name": "ZZ", "types": ["country"]},
+        {"long_name": "45402", "short_name": "45402", "types": ["postal_code"]},
+    ]
+    return 200, {
+        "status": "OK",
+        "results": [{"address_components": components, "geometry": {"location": {"lat": lat, "lng": lng}}}],
+    }
+
+
+def _fake_directions(params):
+    """Keeps the submitted waypoint order; every leg is 1 km / 2 minutes."""
+    waypoints = params.get("waypoints", "").split("|")[1:]
+    leg = {"distance": {"value": 1000}, "duration": {"value": 120}}
+    return 200, {
+        "status": "OK",
+        "routes": [{"waypoint_order": list(range(len(waypoints))), "legs": [leg] * (len(waypoints) + 1)}],
+    }
+
+
+def stub_routes():
+    return {"/maps/api/geocode/json": _fake_geocode, "/maps/api/directions/json": _fake_directions}
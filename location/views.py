@@ -1,19 +1,65 @@
+from functools import wraps
+
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from .models import Address
-from .serializers import AddressSerializer
+from .pagination import KeysetPagination
+from .parsers import NDJSONParser
+from .serializers import AddressRepresenter, AddressSerializer
+from .utils.batch_validation import stream_batch_validation
+from .utils.bulk_import import import_addresses
+from .utils.proximity import UNITS, addresses_within, nearest_addresses
+from .utils.response_cache import entry_response, get_cache, is_enabled, make_etag, response_key, user_version
+
+NEARBY_DEFAULT_LIMIT = 50
+NEARBY_MAX_LIMIT = 500
+
+
+def cached_per_user(handler):
+    """
+    Sync counterpart of `async_views.cached_per_user` for the viewset's read handlers: 200
+    responses are rendered once, stored in the per-user response cache and served with ETags.
+    """
+
+    @wraps(handler)
+    def method(self, request, *args, **kwargs):
+        if not is_enabled():
+            return handler(self, request, *args, **kwargs)
+        user_id = request.user.user_id
+        key = response_key(user_id, user_version(user_id), request.build_absolute_uri())
+        cache = get_cache()
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = JSONRenderer().render(response.data)
+            entry = {"etag": make_etag(body), "body": body}
+            cache.set(key, entry, settings.ADDRESS_CACHE_TTL)
+        return entry_response(entry, request)
+
+    return method
 
 
 class AddressViewSet(viewsets.ViewSet):
     """
     List, create, retrieve, update, and delete addresses for the authenticated user.
+    Under ASGI, list, retrieve and nearby search are served by the async views in async_views.py
+    instead (see ASYNC_ADDRESS_READS); these sync handlers serve them under WSGI.
     """
 
+    @cached_per_user
     def list(self, request):
-        queryset = Address.objects.filter(user_id=self.request.user.user_id)
-        serializer = AddressSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = AddressRepresenter.queryset(Address.objects.filter(user_id=self.request.user.user_id))
+        paginator = KeysetPagination(request)
+        rows = paginator.paginate_queryset(queryset)
+        return paginator.get_paginated_response(AddressRepresenter.represent_many(rows))
 
     def create(self, request):
         serializer = AddressSerializer(data=request.data, context={"user": self.request.user})
@@ -22,10 +68,11 @@ class AddressViewSet(viewsets.ViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @cached_per_user
     def retrieve(self, request, pk=None):
-        address = get_object_or_404(Address, pk=pk, user_id=self.request.user.user_id)
-        serializer = AddressSerializer(address)
-        return Response(serializer.data)
+        queryset = AddressRepresenter.queryset(Address.objects.filter(user_id=self.request.user.user_id))
+        row = get_object_or_404(queryset, pk=pk)
+        return Response(AddressRepresenter.represent(row))
 
     def update(self, request, pk=None):
         address = get_object_or_404(Address, pk=pk, user_id=self.request.user.user_id)
@@ -38,4 +85,87 @@ class AddressViewSet(viewsets.ViewSet):
     def destroy(self, request, pk=None):
         address = get_object_or_404(Address, pk=pk, user_id=self.request.user.user_id)
         address.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"], url_path="bulk", parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """
+        Import many addresses at once from a JSON array or NDJSON body.
+        Returns a per-row report with the status of every input row.
+        """
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"error": "Expected a JSON array or NDJSON body."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = self.request.user
+        report = import_addresses(rows, user_id=user.user_id, tenant_id=getattr(user, "tenant_id", None))
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="nearby")
+    def nearby(self, request):
+        """
+        Find the caller's addresses (or their tenant's, when the token carries a tenant_id)
+        near a point. `mode=radius` (default) returns everything within `radius`;
+        `mode=knn` returns the `limit` nearest, optionally bounded by `radius`.
+        """
+        params = request.query_params
+        mode = params.get("mode", "radius")
+        unit = params.get("unit", "mi")
+        try:
+            latitude = float(params["lat"])
+            longitude = float(params["lng"])
+            radius = float(params["radius"]) if "radius" in params else None
+            limit = min(int(params.get("limit", NEARBY_DEFAULT_LIMIT)), NEARBY_MAX_LIMIT)
+        except (KeyError, ValueError):
+            return Response(
+                {"error": "lat and lng are required; lat, lng, radius and limit must be numbers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response({"error": "lat/lng out of range."}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({"error": "limit must be at least 1."}, status=status.HTTP_400_BAD_REQUEST)
+        if unit not in UNITS:
+            return Response({"error": f"unit must be one of: {', '.join(UNITS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if mode not in ("radius", "knn"):
+            return Response({"error": "mode must be 'radius' or 'knn'."}, status=status.HTTP_400_BAD_REQUEST)
+        if mode == "radius" and radius is None:
+            return Response({"error": "radius is required in radius mode."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = self.request.user
+        if getattr(user, "tenant_id", None):
+            queryset = Address.objects.filter(tenant_id=user.tenant_id)
+        else:
+            queryset = Address.objects.filter(user_id=user.user_id)
+
+        if mode == "knn":
+            queryset = nearest_addresses(queryset, latitude, longitude, radius=radius, unit=unit)
+        else:
+            queryset = addresses_within(queryset, latitude, longitude, radius, unit=unit)
+
+        results = []
+        for row in queryset.values(*AddressRepresenter.fields, "distance")[:limit]:
+            item = AddressRepresenter.represent(row)
+            item["distance"] = getattr(row["distance"], unit)
+            results.append(item)
+        return Response({"unit": unit, "results": results})
+
+    @action(detail=False, methods=["post"], url_path="validate/batch")
+    def validate_batch(self, request):
+        """
+        Validate many addresses in one request and stream the results back as NDJSON,
+        one line per input item in input order. Under ASGI this URL is served by
+        async_views.address_validate_batch, which streams from an async iterator.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({"error": "Expected a JSON array."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > settings.GEOCODE_BATCH_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {settings.GEOCODE_BATCH_MAX_ITEMS} items per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        lines = stream_batch_validation(items, self.request.user.user_id, concurrency=settings.GEOCODE_BATCH_CONCURRENCY)
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
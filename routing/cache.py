@@ -0,0 +1,145 @@
+"""
+Route Optimization Cache Module
+
+Dispatchers often re-submit the same origin, stop set and destination (UI refreshes, retries).
+This module caches optimization results under a canonical fingerprint of the rounded coordinates
+that does not depend on the order stops were sent in. A hit is remapped onto the caller's stop
+order, so it can be used exactly like a fresh `waypoint_order`.
+
+Tiers:
+- In-process LRU with TTL (always on).
+- `RouteCacheEntry` table shared by all workers (enable with `ROUTE_CACHE_DB_ENABLED`).
+
+Functions:
+- fingerprint(optimizer, origin, stops, destination, departure_time=None): Returns (key, canonical),
+  where canonical[k] is the caller's index of the k-th stop in canonical order. The key is None
+  (do not cache) when stops have delivery windows but no explicit departure time.
+- get_cached(key, canonical): Returns {"waypoint_order", "legs"} in caller order, or None.
+- store(key, canonical, optimizer, waypoint_order, legs, upstream_seconds): Caches a fresh result.
+- route_cache_stats(): Hit/miss counters, hit ratio and upstream time saved.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from location.utils.cache import MISSING, TTLCache
+from .models import RouteCacheEntry
+
+COORDINATE_PRECISION = 5
+
+_memory_cache = None
+_memory_cache_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "saved_upstream_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _get_memory_cache():
+    global _memory_cache
+    if _memory_cache is None:
+        with _memory_cache_lock:
+            if _memory_cache is None:
+                _memory_cache = TTLCache(max_entries=settings.ROUTE_CACHE_MAX_ENTRIES, ttl=settings.ROUTE_CACHE_TTL)
+    return _memory_cache
+
+
+def _record(counter, saved_seconds=0.0):
+    with _stats_lock:
+        _stats[counter] += 1
+        _stats["saved_upstream_seconds"] += saved_seconds
+
+
+def _point(point):
+    return [round(float(point["latitude"]), COORDINATE_PRECISION), round(float(point["longitude"]), COORDINATE_PRECISION)]
+
+
+def fingerprint(optimizer, origin, stops, destination, departure_time=None):
+    """Return (key, canonical) for a stop set; the key ignores the order stops were given in."""
+    stop_keys = [(*_point(stop), str(stop.get("delivery_time") or "")) for stop in stops]
+    canonical = sorted(range(len(stops)), key=lambda index: stop_keys[index])
+
+    has_windows = any(key[2] for key in stop_keys)
+    if has_windows and not departure_time:
+        return None, canonical
+
+    payload = {
+        "optimizer": optimizer,
+        "origin": _point(origin),
+        "destination": _point(destination),
+        "stops": [stop_keys[index] for index in canonical],
+        "departure_time": str(departure_time) if has_windows else "",
+    }
+    key = hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode()).hexdigest()
+    return key, canonical
+
+
+def get_cached(key, canonical):
+    """Return the cached result remapped onto the caller's stop order, or None on a miss."""
+    memory_cache = _get_memory_cache()
+    entry = memory_cache.get(key)
+    if entry is not MISSING:
+        _record("memory_hits", entry["upstream_seconds"])
+    elif settings.ROUTE_CACHE_DB_ENABLED:
+        entry = (
+            RouteCacheEntry.objects.filter(fingerprint=key, expires_at__gt=timezone.now())
+            .values("waypoint_order", "legs", "upstream_seconds")
+            .first()
+        )
+        if entry is None:
+            _record("misses")
+            return None
+        RouteCacheEntry.objects.filter(fingerprint=key).update(hits=F("hits") + 1)
+        memory_cache.set(key, entry)
+        _record("db_hits", entry["upstream_seconds"])
+    else:
+        _record("misses")
+        return None
+
+    return {
+        "waypoint_order": [canonical[position] for position in entry["waypoint_order"]],
+        "legs": list(entry["legs"]),
+    }
+
+
+def store(key, canonical, optimizer, waypoint_order, legs, upstream_seconds):
+    """Cache a fresh result given in the caller's stop order."""
+    position = {caller_index: canonical_index for canonical_index, caller_index in enumerate(canonical)}
+    entry = {
+        "waypoint_order": [position[index] for index in waypoint_order],
+        "legs": list(legs),
+        "upstream_seconds": upstream_seconds,
+    }
+    _get_memory_cache().set(key, entry)
+
+    if settings.ROUTE_CACHE_DB_ENABLED:
+        RouteCacheEntry.objects.update_or_create(
+            fingerprint=key,
+            defaults={
+                "optimizer": optimizer,
+                "waypoint_order": entry["waypoint_order"],
+                "legs": entry["legs"],
+                "upstream_seconds": upstream_seconds,
+                "expires_at": timezone.now() + timedelta(seconds=settings.ROUTE_CACHE_TTL),
+            },
+        )
+
+
+def route_cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_ratio"] = (stats["memory_hits"] + stats["db_hits"]) / lookups if lookups else 0.0
+    stats["memory_size"] = len(_get_memory_cache())
+    return stats
+
+
+def clear_route_cache():
+    _get_memory_cache().clear()
+    with _stats_lock:
+        for counter in _stats:
+            _stats[counter] = 0
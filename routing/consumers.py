@@ -0,0 +1,56 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from . import jobs
+
+
+class RouteJobConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Runs route and plan optimizations in the background and streams their progress.
+
+    Connect to `/ws/routing/jobs/?token=<JWT>`, then send either a job to start:
+        {"type": "route", ...same body as POST /api/routing/create/}
+        {"type": "plan", ...same body as POST /api/routing/plans}
+    or an existing job to follow again after a reconnect:
+        {"type": "subscribe", "job_id": "..."}
+
+    Messages carry an `event` ("accepted", "started", "progress", "done", "failed") and the job
+    snapshot: route jobs report the best `waypoint_order`, `distance_km` and `iteration` so far,
+    plan jobs report `vehicles_done` of `vehicles`. The job keeps running if the socket closes.
+    """
+
+    async def connect(self):
+        if self.scope.get("user") is None:
+            await self.close(code=4401)
+            return
+        await self.accept()
+
+    async def receive_json(self, content, **kwargs):
+        user = self.scope["user"]
+        kind = content.get("type") if isinstance(content, dict) else None
+
+        if kind == "subscribe":
+            await self.follow(content.get("job_id"))
+            return
+
+        try:
+            job_id = await jobs.start_job(kind, content, user.user_id, getattr(user, "tenant_id", None))
+        except ValueError as exc:
+            await self.send_json({"event": "error", "error": str(exc)})
+            return
+        await self.follow(job_id, event="accepted")
+
+    async def follow(self, job_id, event="snapshot"):
+        """Join the job's group, then send its current state so nothing before the join is missed."""
+        job = jobs.get_job(job_id, self.scope["user"].user_id)
+        if job is None:
+            # Unknown, someone else's, or already pruned (ROUTE_JOB_RETENTION).
+            await self.send_json({"event": "error", "error": "Unknown job_id."})
+            return
+        group = jobs.group_name(job["job_id"])
+        if group not in self.groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups.append(group)
+        await self.send_json({"event": event, **job})
+
+    async def job_update(self, event):
+        await self.send_json(event["message"])
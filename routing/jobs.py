@@ -0,0 +1,195 @@
+"""
+Background Optimization Jobs Module
+
+This module runs long route and plan optimizations off the request path and streams their
+progress over WebSockets (see routing/consumers.py). A job is an asyncio task on the ASGI
+server's event loop. The CPU work runs in a thread pool; the optimizer reports each improvement
+back to the loop thread-safely, and the loop publishes it to the job's channel-layer group.
+The first message (the nearest-neighbour order) usually arrives within milliseconds, long
+before the search finishes. The finished route or plan is saved like the HTTP endpoints do.
+
+Job state lives in this process. Subscribers therefore have to reach the ASGI process that
+started the job, which they do when they submit the job over the same socket.
+
+Functions:
+- start_job(kind, payload, user_id, tenant_id=None): Validates a "route" or "plan" payload, starts
+  the job and returns its id. The saved route or plan is owned by `user_id`/`tenant_id`. Must be
+  awaited on the server's event loop. Raises ValueError on bad input.
+- get_job(job_id, user_id): Latest snapshot of a job owned by `user_id`, or None.
+- group_name(job_id): Channel-layer group that receives the job's updates.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections
+
+from .utils import get_local_optimized_route, plan_vehicle_routes, save_plan, save_route, validate_times
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("route", "plan")
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_tasks = set()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.ROUTE_JOB_WORKERS, thread_name_prefix="route-job")
+    return _executor
+
+
+def group_name(job_id):
+    return f"route-job-{job_id}"
+
+
+def _snapshot(job):
+    return {key: value for key, value in job.items() if key not in ("user_id", "finished_at")}
+
+
+def get_job(job_id, user_id):
+    with _jobs_lock:
+        job = _jobs.get(str(job_id))
+        if job is None or job["user_id"] != str(user_id):
+            return None
+        return _snapshot(job)
+
+
+def _prune():
+    cutoff = time.monotonic() - settings.ROUTE_JOB_RETENTION
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            del _jobs[job_id]
+
+
+def _validate(kind, payload):
+    if kind not in KINDS:
+        raise ValueError(f"type must be one of: {', '.join(KINDS)}.")
+    if not payload.get("origin") or not payload.get("destination") or not payload.get("stops"):
+        raise ValueError("Missing required fields.")
+    validate_times(payload["stops"], payload.get("departure_time"))
+    if kind == "plan":
+        try:
+            vehicles = int(payload.get("vehicles", 1))
+            capacity = float(payload["capacity"]) if payload.get("capacity") is not None else None
+        except (TypeError, ValueError):
+            raise ValueError("vehicles must be an integer and capacity a number.")
+        if vehicles < 1 or (capacity is not None and capacity <= 0):
+            raise ValueError("vehicles and capacity must be positive.")
+
+
+def _execute(kind, payload, owner, report):
+    """Runs in a worker thread: optimize, save (owned by `owner`), and return the final job fields."""
+    origin, stops, destination = payload["origin"], payload["stops"], payload["destination"]
+    name = payload.get("name", "")
+    try:
+        if kind == "route":
+            optimized_route = get_local_optimized_route(
+                origin,
+                stops,
+                destination,
+                payload.get("departure_time"),
+                progress=lambda order, distance, iteration: report(
+                    waypoint_order=order, distance_km=distance, iteration=iteration
+                ),
+            )
+            route = optimized_route["routes"][0]
+            saved = save_route(name, origin, destination, stops, route["waypoint_order"], **owner)
+            return {
+                "route_id": saved.id,
+                "waypoint_order": route["waypoint_order"],
+                "distance_km": sum(leg["distance"]["value"] for leg in route["legs"]) / 1000,
+            }
+
+        capacity = float(payload["capacity"]) if payload.get("capacity") is not None else None
+        plans = plan_vehicle_routes(
+            origin,
+            stops,
+            destination,
+            int(payload.get("vehicles", 1)),
+            capacity=capacity,
+            departure_time=payload.get("departure_time"),
+            progress=lambda done, total, distance: report(vehicles_done=done, vehicles=total, distance_km=distance),
+        )
+        plan, routes = save_plan(name, origin, destination, stops, plans, capacity, **owner)
+        return {
+            "plan_id": plan.id,
+            "distance_km": sum(vehicle_plan["distance_km"] for vehicle_plan in plans),
+            "routes": [
+                {"route_id": route.id, "vehicle": route.vehicle, "distance_km": vehicle_plan["distance_km"]}
+                for route, vehicle_plan in zip(routes, plans)
+            ],
+        }
+    finally:
+        close_old_connections()
+
+
+async def _publish(job_id, event, **changes):
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job.update(changes)
+        if job["status"] in (DONE, FAILED):
+            job["finished_at"] = time.monotonic()
+        message = {"event": event, **_snapshot(job)}
+    await get_channel_layer().group_send(group_name(job_id), {"type": "job.update", "message": message})
+
+
+async def _run(job_id, kind, payload, owner):
+    loop = asyncio.get_running_loop()
+    updates = asyncio.Queue()
+    last_sent = 0.0
+
+    def report(**progress):
+        # Called from the worker thread; throttled so large searches do not flood the socket.
+        nonlocal last_sent
+        now = time.monotonic()
+        if now - last_sent >= settings.ROUTE_JOB_PROGRESS_INTERVAL:
+            last_sent = now
+            loop.call_soon_threadsafe(updates.put_nowait, progress)
+
+    async def pump():
+        while (progress := await updates.get()) is not None:
+            await _publish(job_id, "progress", **progress)
+
+    pumping = asyncio.create_task(pump())
+    await _publish(job_id, "started", status=RUNNING)
+    try:
+        result = await loop.run_in_executor(_get_executor(), _execute, kind, payload, owner, report)
+    except Exception as exc:
+        logger.exception("Route job %s failed", job_id)
+        updates.put_nowait(None)
+        await pumping
+        await _publish(job_id, "failed", status=FAILED, error=str(exc))
+    else:
+        updates.put_nowait(None)
+        await pumping
+        await _publish(job_id, "done", status=DONE, **result)
+
+
+async def start_job(kind, payload, user_id, tenant_id=None):
+    """Validate and start a job on the running event loop; returns the job id."""
+    _validate(kind, payload)
+    _prune()
+    job_id = str(uuid.uuid4())
+    with _jobs_lock:
+        _jobs[job_id] = {"job_id": job_id, "type": kind, "status": QUEUED, "user_id": str(user_id), "finished_at": None}
+    owner = {"user_id": user_id, "tenant_id": tenant_id}
+    task = asyncio.get_running_loop().create_task(_run(job_id, kind, payload, owner))
+    # Keep a reference so the task is not garbage-collected while it runs.
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
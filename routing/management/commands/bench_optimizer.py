@@ -0,0 +1,52 @@
+import json
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from routing.optimizer import haversine_matrix, nearest_neighbour, optimize_order, tour_length
+
+
+class Command(BaseCommand):
+    help = "Benchmark the local route optimizer on random stop sets (no network or database needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Stop counts to run")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per size")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--spread", type=float, default=0.5, help="Degrees of lat/lng the stops spread over")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        origin = {"latitude": 39.7589, "longitude": -84.1916}
+
+        report = []
+        for size in options["sizes"]:
+            timings, baseline, optimized = [], [], []
+            for _ in range(options["repeat"]):
+                latitudes = origin["latitude"] + rng.uniform(-options["spread"], options["spread"], size)
+                longitudes = origin["longitude"] + rng.uniform(-options["spread"], options["spread"], size)
+                stops = [{"latitude": lat, "longitude": lng} for lat, lng in zip(latitudes, longitudes)]
+
+                points = [origin, *stops, origin]
+                dist = haversine_matrix([p["latitude"] for p in points], [p["longitude"] for p in points])
+                baseline.append(tour_length(nearest_neighbour(dist), dist))
+
+                started = time.perf_counter()
+                result = optimize_order(origin, stops, origin)
+                timings.append((time.perf_counter() - started) * 1000)
+                optimized.append(result["distance_km"])
+
+            report.append(
+                {
+                    "stops": size,
+                    "mean_ms": round(statistics.mean(timings), 2),
+                    "max_ms": round(max(timings), 2),
+                    "nearest_neighbour_km": round(statistics.mean(baseline), 2),
+                    "optimized_km": round(statistics.mean(optimized), 2),
+                    "improvement_pct": round(100 * (1 - sum(optimized) / sum(baseline)), 2),
+                }
+            )
+
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,66 @@
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from routing.planning import plan_routes, shutdown_pool
+
+
+class Command(BaseCommand):
+    help = "Benchmark multi-vehicle planning across worker counts against a single-process baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stops", type=int, default=5000)
+        parser.add_argument("--vehicles", type=int, default=20)
+        parser.add_argument(
+            "--workers", type=int, nargs="+", default=None, help="Worker counts to compare (default: 1 and all cores)"
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count")
+        parser.add_argument("--time-limit", type=float, default=None, help="Per-vehicle optimizer time limit (s)")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--spread", type=float, default=0.5, help="Degrees of lat/lng the stops spread over")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        origin = {"latitude": 39.7589, "longitude": -84.1916}
+        size = options["stops"]
+        latitudes = origin["latitude"] + rng.uniform(-options["spread"], options["spread"], size)
+        longitudes = origin["longitude"] + rng.uniform(-options["spread"], options["spread"], size)
+        stops = [{"latitude": lat, "longitude": lng} for lat, lng in zip(latitudes, longitudes)]
+
+        worker_counts = options["workers"] or sorted({1, os.cpu_count() or 1})
+        report = []
+        try:
+            for workers in worker_counts:
+                # Warm the pool up so process start-up is not counted.
+                plan_routes(origin, stops[:options["vehicles"]], origin, options["vehicles"], workers=workers)
+
+                timings, distances = [], []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    plans = plan_routes(
+                        origin, stops, origin, options["vehicles"], time_limit=options["time_limit"], workers=workers
+                    )
+                    timings.append(time.perf_counter() - started)
+                    distances.append(sum(plan["distance_km"] for plan in plans))
+
+                report.append(
+                    {
+                        "workers": workers,
+                        "stops": size,
+                        "vehicles": options["vehicles"],
+                        "mean_s": round(statistics.mean(timings), 3),
+                        "min_s": round(min(timings), 3),
+                        "total_km": round(statistics.mean(distances), 2),
+                    }
+                )
+        finally:
+            shutdown_pool()
+
+        baseline = report[0]["mean_s"]
+        for row in report:
+            row["speedup"] = round(baseline / row["mean_s"], 2) if row["mean_s"] else None
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,69 @@
+"""
+Distance Matrix Module
+
+This module computes many-to-many distances between N origins and M destinations with NumPy
+broadcasting. Large matrices are computed in row chunks so the temporaries stay within a fixed
+memory budget, and the result can be returned as JSON or as raw little-endian float32.
+
+Metrics:
+- "haversine": haversine formula (see `routing.optimizer.haversine_matrix`).
+- "great_circle": Vincenty's formula on the sphere; numerically stable for antipodal points.
+
+Functions:
+- distance_matrix(origins, destinations, metric="haversine", unit="km", dtype=np.float64): Returns an
+  N x M array. `origins` / `destinations` are sequences of (latitude, longitude).
+"""
+
+import numpy as np
+
+from .optimizer import EARTH_RADIUS_KM, haversine_matrix
+
+METRICS = ("haversine", "great_circle")
+UNITS = {"km": 1.0, "m": 1000.0, "mi": 0.621371192237334}
+
+# Upper bound for the float64 temporaries of one chunk.
+CHUNK_BYTES = 64 * 1024 * 1024
+TEMPORARIES_PER_CELL = 8
+
+
+def great_circle_matrix(latitudes, longitudes, other_latitudes, other_longitudes):
+    """Return the great-circle distance matrix in km using Vincenty's formula on the sphere."""
+    lat1 = np.radians(np.asarray(latitudes, dtype=np.float64))[:, None]
+    lng1 = np.radians(np.asarray(longitudes, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(other_latitudes, dtype=np.float64))[None, :]
+    lng2 = np.radians(np.asarray(other_longitudes, dtype=np.float64))[None, :]
+
+    dlng = lng2 - lng1
+    sin_lat1, cos_lat1 = np.sin(lat1), np.cos(lat1)
+    sin_lat2, cos_lat2 = np.sin(lat2), np.cos(lat2)
+    cos_dlng = np.cos(dlng)
+
+    numerator = np.hypot(cos_lat2 * np.sin(dlng), cos_lat1 * sin_lat2 - sin_lat1 * cos_lat2 * cos_dlng)
+    denominator = sin_lat1 * sin_lat2 + cos_lat1 * cos_lat2 * cos_dlng
+    return EARTH_RADIUS_KM * np.arctan2(numerator, denominator)
+
+
+def distance_matrix(origins, destinations, metric="haversine", unit="km", dtype=np.float64):
+    """Return the N x M distance matrix between `origins` and `destinations` ((lat, lng) pairs)."""
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(METRICS)}.")
+    if unit not in UNITS:
+        raise ValueError(f"unit must be one of: {', '.join(UNITS)}.")
+
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+    rows, cols = len(origins), len(destinations)
+    result = np.empty((rows, cols), dtype=dtype)
+    if rows == 0 or cols == 0:
+        return result
+
+    compute = haversine_matrix if metric == "haversine" else great_circle_matrix
+    scale = UNITS[unit]
+    chunk_rows = max(1, CHUNK_BYTES // (cols * 8 * TEMPORARIES_PER_CELL))
+    for start in range(0, rows, chunk_rows):
+        chunk = origins[start:start + chunk_rows]
+        distances = compute(chunk[:, 0], chunk[:, 1], destinations[:, 0], destinations[:, 1])
+        if scale != 1.0:
+            distances *= scale
+        result[start:start + chunk_rows] = distances
+    return result
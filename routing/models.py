@@ -1,7 +1,19 @@
 from django.db import models
 
 
+class RoutePlan(models.Model):
+    """A day's stops split across several vehicles; each vehicle's route is a `Route`."""
+    name = models.CharField(max_length=255, blank=True, null=True)
+    vehicle_count = models.PositiveIntegerField()
+    vehicle_capacity = models.FloatField(null=True, blank=True)
+    user_id = models.UUIDField(null=True, blank=True, help_text="UUID from user-api JWT")
+    tenant_id = models.UUIDField(null=True, blank=True, help_text="External Tenant ID")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
 class Route(models.Model):
+    plan = models.ForeignKey(RoutePlan, related_name="routes", null=True, blank=True, on_delete=models.CASCADE)
+    vehicle = models.PositiveIntegerField(null=True, blank=True, help_text="Vehicle number within the plan")
     name = models.CharField(max_length=255, blank=True, null=True)
     origin_address = models.CharField(max_length=255)
     origin_latitude = models.FloatField()
@@ -9,8 +21,16 @@ class Route(models.Model):
     destination_address = models.CharField(max_length=255)
     destination_latitude = models.FloatField()
     destination_longitude = models.FloatField()
+    user_id = models.UUIDField(null=True, blank=True, help_text="UUID from user-api JWT")
+    tenant_id = models.UUIDField(null=True, blank=True, help_text="External Tenant ID")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user_id", "-created_at", "-id"], name="route_user_keyset_idx"),
+            models.Index(fields=["tenant_id", "-created_at", "-id"], name="route_tenant_keyset_idx"),
+        ]
+
 
 class RouteStop(models.Model):
     route = models.ForeignKey(Route, related_name="stops", on_delete=models.CASCADE)
@@ -18,6 +38,19 @@ class RouteStop(models.Model):
     latitude = models.FloatField()
     longitude = models.FloatField()
     delivery_time = models.DateTimeField(null=True, blank=True)
+    sequence = models.PositiveIntegerField(default=0, help_text="Position of the stop in the optimized route")
 
     class Meta:
-        ordering = ["delivery_time"]
+        ordering = ["sequence", "delivery_time"]
+
+
+class RouteCacheEntry(models.Model):
+    """Shared cache of optimized stop orders keyed on a canonical stop-set fingerprint."""
+    fingerprint = models.CharField(max_length=64, unique=True)
+    optimizer = models.CharField(max_length=20)
+    waypoint_order = models.JSONField(help_text="Visit order as indices into the canonical stop order")
+    legs = models.JSONField(default=list, help_text="Leg distances in meters, in visiting order")
+    upstream_seconds = models.FloatField(default=0.0, help_text="Time the original optimization took")
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,345 @@
+"""
+Local Route Optimizer Module
+
+This module orders delivery stops in process, without calling the Directions API. It solves the
+open travelling-salesman path from a fixed origin, through every stop, to a fixed destination:
+
+1. A haversine distance matrix is built with NumPy broadcasting.
+2. A nearest-neighbour tour gives the starting solution.
+3. 2-opt (segment reversal) and Or-opt (moving chains of 1-3 stops) improve it. Each move scans
+   all candidate positions with one vectorized NumPy expression, so a pass over 1000 stops stays
+   in the tens of milliseconds.
+4. When stops carry `delivery_time` deadlines, a final pass relocates late stops to the position
+   that minimises distance plus a lateness penalty.
+
+Routes that are already optimized can be repaired instead of re-solved: new stops go in by
+cheapest insertion and a local search is run only around the inserted stops and the gaps left by
+removed ones, within a small time budget.
+
+Node numbering inside the solver: 0 is the origin, 1..n are the stops (in input order) and n + 1
+is the destination. Public results use stop indices (0..n-1), the same shape as Google's
+`waypoint_order`.
+
+Functions:
+- haversine_matrix(latitudes, longitudes, other_latitudes=None, other_longitudes=None): Distances in km.
+- optimize_order(origin, stops, destination, ...): Returns the optimized `waypoint_order` and leg distances.
+- reoptimize_order(origin, stops, destination, removed=(), added=(), ...): Repairs an existing order
+  after stops were removed or added.
+"""
+
+import time
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Lateness penalty, in km of extra driving per hour late.
+LATENESS_PENALTY_KM_PER_HOUR = 1000.0
+
+
+def haversine_matrix(latitudes, longitudes, other_latitudes=None, other_longitudes=None):
+    """Return the great-circle distance matrix in km between two point sets (or one set and itself)."""
+    lat1 = np.radians(np.asarray(latitudes, dtype=np.float64))[:, None]
+    lng1 = np.radians(np.asarray(longitudes, dtype=np.float64))[:, None]
+    if other_latitudes is None:
+        lat2, lng2 = lat1.T, lng1.T
+    else:
+        lat2 = np.radians(np.asarray(other_latitudes, dtype=np.float64))[None, :]
+        lng2 = np.radians(np.asarray(other_longitudes, dtype=np.float64))[None, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def tour_length(tour, dist):
+    tour = np.asarray(tour)
+    return float(dist[tour[:-1], tour[1:]].sum())
+
+
+def nearest_neighbour(dist):
+    """Greedy path from node 0 through every inner node to the last node."""
+    n = len(dist)
+    end = n - 1
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = visited[end] = True
+
+    tour = [0]
+    current = 0
+    for _ in range(n - 2):
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        tour.append(current)
+    tour.append(end)
+    return np.array(tour)
+
+
+def _positions(tour, nodes):
+    """Tour positions i (valid as 2-opt starts) where edge (i - 1, i) or (i, i + 1) touches `nodes`."""
+    touched = np.isin(tour, nodes)
+    touched[1:] |= touched[:-1]
+    return np.flatnonzero(touched[1:len(tour) - 2]) + 1
+
+
+def two_opt(tour, dist, deadline=None, nodes=None):
+    """
+    Reverse segments while that shortens the path; endpoints stay fixed.
+    With `nodes`, only reversals that start next to one of those nodes are tried.
+    """
+    tour = tour.copy()
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2) if nodes is None else _positions(tour, nodes):
+            if deadline and time.perf_counter() > deadline:
+                return tour
+            a, b = tour[i - 1], tour[i]
+            c = tour[i + 1:n - 1]
+            d = tour[i + 2:n]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i + 1
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                improved = True
+    return tour
+
+
+def or_opt(tour, dist, max_segment=3, deadline=None):
+    """Move chains of up to `max_segment` consecutive stops to a cheaper position (either direction)."""
+    tour = tour.copy()
+    improved = True
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length < len(tour):
+                if deadline and time.perf_counter() > deadline:
+                    return tour
+                first, last = tour[i], tour[i + length - 1]
+                prev, nxt = tour[i - 1], tour[i + length]
+                removal_gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+                rest = np.concatenate([tour[:i], tour[i + length:]])
+                u, v = rest[:-1], rest[1:]
+                forward = dist[u, first] + dist[last, v] - dist[u, v]
+                backward = dist[u, last] + dist[first, v] - dist[u, v]
+                costs = np.minimum(forward, backward)
+                costs[i - 1] = np.inf  # re-inserting where it came from
+
+                k = int(np.argmin(costs))
+                if costs[k] < removal_gain - 1e-9:
+                    segment = tour[i:i + length]
+                    if backward[k] < forward[k]:
+                        segment = segment[::-1]
+                    tour = np.concatenate([rest[:k + 1], segment, rest[k + 1:]])
+                    improved = True
+                else:
+                    i += 1
+    return tour
+
+
+def cheapest_insertion(tour, dist, nodes):
+    """Insert each of `nodes` into the edge where it adds the least distance; endpoints stay fixed."""
+    tour = np.asarray(tour)
+    for node in nodes:
+        u, v = tour[:-1], tour[1:]
+        k = int(np.argmin(dist[u, node] + dist[node, v] - dist[u, v]))
+        tour = np.concatenate([tour[:k + 1], [node], tour[k + 1:]])
+    return tour
+
+
+def relocate(tour, dist, nodes, deadline=None):
+    """Move single `nodes` to a cheaper position while that shortens the path."""
+    tour = tour.copy()
+    improved = True
+    while improved:
+        improved = False
+        for node in nodes:
+            if deadline and time.perf_counter() > deadline:
+                return tour
+            i = int(np.flatnonzero(tour == node)[0])
+            prev, nxt = tour[i - 1], tour[i + 1]
+            removal_gain = dist[prev, node] + dist[node, nxt] - dist[prev, nxt]
+
+            rest = np.concatenate([tour[:i], tour[i + 1:]])
+            u, v = rest[:-1], rest[1:]
+            costs = dist[u, node] + dist[node, v] - dist[u, v]
+            costs[i - 1] = np.inf  # re-inserting where it came from
+
+            k = int(np.argmin(costs))
+            if costs[k] < removal_gain - 1e-9:
+                tour = np.concatenate([rest[:k + 1], [node], rest[k + 1:]])
+                improved = True
+    return tour
+
+
+def _lateness_hours(tour, dist, deadlines, speed_kmh, service_hours):
+    """Total hours by which stops miss their deadline (deadlines are hours after departure)."""
+    legs = dist[tour[:-1], tour[1:]]
+    arrivals = np.cumsum(legs / speed_kmh + service_hours) - service_hours
+    node_deadlines = deadlines[tour[1:]]
+    return float(np.maximum(arrivals - node_deadlines, 0.0).sum())
+
+
+def _cost(tour, dist, deadlines, speed_kmh, service_hours):
+    lateness = _lateness_hours(tour, dist, deadlines, speed_kmh, service_hours)
+    return tour_length(tour, dist) + LATENESS_PENALTY_KM_PER_HOUR * lateness
+
+
+def repair_time_windows(tour, dist, deadlines, speed_kmh, service_hours, deadline=None):
+    """Relocate single stops while that lowers distance plus the lateness penalty."""
+    tour = tour.copy()
+    best = _cost(tour, dist, deadlines, speed_kmh, service_hours)
+    improved = True
+    while improved:
+        improved = False
+        for node in [node for node in tour[1:-1] if np.isfinite(deadlines[node])]:
+            if deadline and time.perf_counter() > deadline:
+                return tour
+            rest = tour[tour != node]
+            for k in range(1, len(rest)):
+                candidate = np.concatenate([rest[:k], [node], rest[k:]])
+                cost = _cost(candidate, dist, deadlines, speed_kmh, service_hours)
+                if cost < best - 1e-9:
+                    tour, best, improved = candidate, cost, True
+                    break
+    return tour
+
+
+def solve(dist, deadlines=None, speed_kmh=40.0, service_minutes=0.0, time_limit=None, progress=None):
+    """
+    Return the improved node tour for a distance matrix with fixed first and last nodes.
+    `progress(tour, length, iteration)` is called with the starting tour and after every round.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    tour = nearest_neighbour(dist)
+    if progress:
+        progress(tour, tour_length(tour, dist), 0)
+    if len(tour) <= 3:
+        return tour
+
+    previous = np.inf
+    length = tour_length(tour, dist)
+    iteration = 0
+    while length < previous - 1e-9:
+        previous = length
+        tour = two_opt(tour, dist, deadline)
+        tour = or_opt(tour, dist, deadline=deadline)
+        length = tour_length(tour, dist)
+        iteration += 1
+        if progress:
+            progress(tour, length, iteration)
+        if deadline and time.perf_counter() > deadline:
+            break
+
+    if deadlines is not None and np.isfinite(deadlines).any():
+        tour = repair_time_windows(tour, dist, deadlines, speed_kmh, service_minutes / 60.0, deadline)
+    return tour
+
+
+def repair(tour, dist, inserted=(), touched=(), deadlines=None, speed_kmh=40.0, service_minutes=0.0, time_limit=None):
+    """
+    Insert `inserted` nodes into an already optimized tour, then improve it locally: 2-opt and
+    relocation are only tried around the inserted nodes and the `touched` nodes (the neighbours of
+    removed stops), so the cost grows with the size of the change rather than the route.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit else None
+    tour = cheapest_insertion(tour, dist, inserted)
+    nodes = np.unique(np.asarray([*inserted, *touched], dtype=np.int64))
+    nodes = nodes[(nodes != tour[0]) & (nodes != tour[-1])]
+
+    if len(tour) > 3 and len(nodes):
+        previous = np.inf
+        length = tour_length(tour, dist)
+        while length < previous - 1e-9:
+            previous = length
+            tour = two_opt(tour, dist, deadline, nodes)
+            tour = relocate(tour, dist, nodes, deadline)
+            length = tour_length(tour, dist)
+            if deadline and time.perf_counter() > deadline:
+                break
+
+    if deadlines is not None and np.isfinite(deadlines).any():
+        tour = repair_time_windows(tour, dist, deadlines, speed_kmh, service_minutes / 60.0, deadline)
+    return tour
+
+
+def _deadlines(stops, departure):
+    """Deadlines in hours after `departure` per node (origin and destination have none), or None."""
+    if departure is None or not any(stop.get("delivery_time") for stop in stops):
+        return None
+    deadlines = np.full(len(stops) + 2, np.inf)
+    for index, stop in enumerate(stops, start=1):
+        if stop.get("delivery_time"):
+            deadlines[index] = (stop["delivery_time"] - departure).total_seconds() / 3600.0
+    return deadlines
+
+
+def _distances(origin, stops, destination):
+    points = [origin, *stops, destination]
+    latitudes = [float(point["latitude"]) for point in points]
+    longitudes = [float(point["longitude"]) for point in points]
+    return haversine_matrix(latitudes, longitudes)
+
+
+def _result(tour, dist, deadlines, speed_kmh, service_minutes):
+    legs = dist[tour[:-1], tour[1:]]
+    result = {
+        "waypoint_order": [int(node) - 1 for node in tour[1:-1]],
+        "legs": [float(leg) for leg in legs],
+        "distance_km": float(legs.sum()),
+    }
+    if deadlines is not None:
+        result["late_hours"] = _lateness_hours(tour, dist, deadlines, speed_kmh, service_minutes / 60.0)
+    return result
+
+
+def optimize_order(
+    origin, stops, destination, departure=None, speed_kmh=40.0, service_minutes=0.0, time_limit=None, progress=None
+):
+    """
+    Order `stops` between `origin` and `destination`.
+
+    Points are dicts with `latitude` and `longitude`; stops may also carry a `delivery_time`
+    (aware datetime) deadline, measured against `departure`. Returns a dict with
+    `waypoint_order` (indices into `stops`), `legs` (km per leg) and `distance_km`.
+    `progress(waypoint_order, distance_km, iteration)` receives the best order found so far.
+    """
+    dist = _distances(origin, stops, destination)
+    deadlines = _deadlines(stops, departure)
+
+    def report(tour, length, iteration):
+        progress([int(node) - 1 for node in tour[1:-1]], length, iteration)
+
+    tour = solve(dist, deadlines, speed_kmh, service_minutes, time_limit, report if progress else None)
+    return _result(tour, dist, deadlines, speed_kmh, service_minutes)
+
+
+def reoptimize_order(
+    origin, stops, destination, removed=(), added=(), departure=None, speed_kmh=40.0, service_minutes=0.0, time_limit=None
+):
+    """
+    Update an optimized order after a change instead of solving it again.
+
+    `stops` are the route's current stops in visiting order, `removed` are indices into `stops`
+    to drop and `added` are new stops. Returns the same dict as `optimize_order`, with
+    `waypoint_order` indexing into `stops + added`.
+    """
+    stops = [*stops, *added]
+    dist = _distances(origin, stops, destination)
+    deadlines = _deadlines(stops, departure)
+    current = len(stops) - len(added)
+    end = len(stops) + 1
+
+    removed = set(removed)
+    tour = np.array([0, *(index + 1 for index in range(current) if index not in removed), end])
+    # Stops whose neighbour was removed sit next to a new edge; a gap in the old numbering marks one.
+    old_numbering = np.where(tour == end, current + 1, tour)
+    gaps = np.flatnonzero(np.diff(old_numbering) > 1)
+    touched = np.concatenate([tour[gaps], tour[gaps + 1]])
+    inserted = np.arange(current + 1, end)
+
+    tour = repair(tour, dist, inserted, touched, deadlines, speed_kmh, service_minutes, time_limit)
+    return _result(tour, dist, deadlines, speed_kmh, service_minutes)
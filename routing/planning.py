@@ -0,0 +1,152 @@
+"""
+Multi-Vehicle Planning Module
+
+This module splits one day's stops across K vehicles and orders each vehicle's stops:
+
+1. Stops are clustered with a sweep around the depot. They are sorted by polar angle, starting
+   after the widest empty sector, and cut into K contiguous sectors of roughly equal demand,
+   never exceeding a vehicle's capacity.
+2. Each cluster is an independent single-vehicle problem, solved by `optimize_order` in a
+   `ProcessPoolExecutor`, so large plans use every core instead of one.
+
+The pool is created lazily and reused across requests; workers only import NumPy and the
+optimizer, never Django.
+
+Functions:
+- sweep_clusters(origin, stops, vehicles, capacity=None, demands=None): Returns a list of K lists
+  of stop indices. Raises ValueError when the total demand does not fit the fleet.
+- plan_routes(origin, stops, destination, vehicles, ...): Clusters and solves; returns one
+  `optimize_order` result per vehicle, with `waypoint_order` indexing into `stops`.
+- shutdown_pool(): Stops the worker processes.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .optimizer import optimize_order
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # "spawn" keeps workers independent of the server's threads and open DB connections.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool, _pool_workers = None, None
+
+
+def sweep_clusters(origin, stops, vehicles, capacity=None, demands=None):
+    """Split stop indices into `vehicles` angular sectors around `origin` with balanced demand."""
+    if vehicles < 1:
+        raise ValueError("vehicles must be at least 1.")
+    demands = np.ones(len(stops)) if demands is None else np.asarray(demands, dtype=np.float64)
+    total = float(demands.sum())
+    if capacity is not None and total > vehicles * capacity:
+        raise ValueError(f"Total demand {total:g} exceeds fleet capacity {vehicles * capacity:g}.")
+    if not stops:
+        return [[] for _ in range(vehicles)]
+
+    latitudes = np.radians([float(stop["latitude"]) for stop in stops])
+    longitudes = np.radians([float(stop["longitude"]) for stop in stops])
+    depot_lat, depot_lng = np.radians(float(origin["latitude"])), np.radians(float(origin["longitude"]))
+    # Bearing from the depot; good enough to order stops around it at city scale.
+    angles = np.arctan2((longitudes - depot_lng) * np.cos(depot_lat), latitudes - depot_lat)
+
+    order = np.argsort(angles)
+    sorted_angles = angles[order]
+    gaps = np.diff(np.concatenate([sorted_angles, [sorted_angles[0] + 2 * np.pi]]))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1))
+
+    clusters = [[] for _ in range(vehicles)]
+    vehicle, load, assigned = 0, 0.0, 0.0
+    for index in order:
+        demand = float(demands[index])
+        target = (total - assigned) / (vehicles - vehicle)
+        over_target = load > 0 and load + demand / 2 > target
+        over_capacity = capacity is not None and load + demand > capacity
+        if vehicle < vehicles - 1 and (over_target or over_capacity):
+            vehicle, assigned, load = vehicle + 1, assigned + load, 0.0
+        if capacity is not None and load + demand > capacity:
+            raise ValueError("Stops do not fit the fleet capacity when split into sectors.")
+        clusters[vehicle].append(int(index))
+        load += demand
+    return clusters
+
+
+def _solve_cluster(args):
+    origin, stops, destination, departure, speed_kmh, service_minutes, time_limit = args
+    return optimize_order(origin, stops, destination, departure, speed_kmh, service_minutes, time_limit)
+
+
+def plan_routes(
+    origin,
+    stops,
+    destination,
+    vehicles,
+    capacity=None,
+    demands=None,
+    departure=None,
+    speed_kmh=40.0,
+    service_minutes=0.0,
+    time_limit=None,
+    workers=None,
+    progress=None,
+):
+    """
+    Cluster `stops` into `vehicles` routes and optimize each one, in parallel when `workers` > 1.
+
+    Returns one dict per vehicle: the `optimize_order` result (with `waypoint_order` mapped back to
+    indices into `stops`) plus `load`, the vehicle's total demand. `progress(done, total,
+    distance_km)` is called as each vehicle's route is finished.
+    """
+    clusters = sweep_clusters(origin, stops, vehicles, capacity, demands)
+    jobs = [
+        (origin, [stops[index] for index in cluster], destination, departure, speed_kmh, service_minutes, time_limit)
+        for cluster in clusters
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    results = [None] * len(jobs)
+    distance = 0.0
+
+    def finished(vehicle, result):
+        nonlocal distance
+        results[vehicle] = result
+        distance += result["distance_km"]
+        if progress:
+            progress(sum(1 for done in results if done is not None), len(jobs), distance)
+
+    if workers > 1 and sum(1 for cluster in clusters if cluster) > 1:
+        pool = _get_pool(workers)
+        futures = {pool.submit(_solve_cluster, job): vehicle for vehicle, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            finished(futures[future], future.result())
+    else:
+        for vehicle, job in enumerate(jobs):
+            finished(vehicle, _solve_cluster(job))
+
+    plans = []
+    for cluster, result in zip(clusters, results):
+        result["waypoint_order"] = [cluster[position] for position in result["waypoint_order"]]
+        result["load"] = float(sum(demands[index] for index in cluster)) if demands is not None else len(cluster)
+        plans.append(result)
+    return plans
@@ -5,7 +5,7 @@ from .models import Route, RouteStop
 class RouteStopSerializer(serializers.ModelSerializer):
     class Meta:
         model = RouteStop
-        fields = ["address", "latitude", "longitude", "delivery_time"]
+        fields = ["id", "address", "latitude", "longitude", "delivery_time", "sequence"]
 
 
 class RouteSerializer(serializers.ModelSerializer):
@@ -15,6 +15,8 @@ class RouteSerializer(serializers.ModelSerializer):
         model = Route
         fields = [
             "id",
+            "plan",
+            "vehicle",
             "name",
             "origin_address",
             "origin_latitude",
@@ -22,5 +24,6 @@ class RouteSerializer(serializers.ModelSerializer):
             "destination_address",
             "destination_latitude",
             "destination_longitude",
+            "created_at",
             "stops",
         ]
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from location.models import ChangeEvent
+from location.utils.change_stream import record_changes
+
+from .models import Route, RouteStop
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_save, sender=RouteStop)
+def record_saved_route(sender, instance, created, update_fields=None, **kwargs):
+    record_changes(ChangeEvent.CREATE if created else ChangeEvent.UPDATE, [instance], fields=update_fields)
+
+
+@receiver(post_delete, sender=Route)
+@receiver(post_delete, sender=RouteStop)
+def record_deleted_route(sender, instance, **kwargs):
+    record_changes(ChangeEvent.DELETE, [instance])
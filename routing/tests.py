@@ -1,6 +1,23 @@
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
 from django.conf import settings
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 import requests
 
+from core.asgi import application
+
+from location.authentication import SimulatedUser
+from location.models import ChangeEvent
+from location.serializers import AddressSerializer
+from location.utils.hierarchy import clear_location_cache
+from .cache import clear_route_cache, route_cache_stats
+from .models import Route, RouteStop
+from .utils import optimize_route
+
 
 def extract_address_components(address_components):
     """Extract structured address fields from Google Maps API response."""
@@ -58,3 +75,285 @@ def validate_address(address):
         return structured_address
 
     return {"valid": False, "error": "Invalid Address"}
+
+
+def route_payload(stop_count):
+    return {
+        "name": f"{stop_count} stops",
+        "optimizer": "local",
+        "origin": {"address": "Depot", "latitude": 39.7589, "longitude": -84.1916},
+        "destination": {"address": "Depot", "latitude": 39.7589, "longitude": -84.1916},
+        "stops": [
+            {"address": f"Stop {i}", "latitude": 39.70 + i * 0.001, "longitude": -84.20 + (i % 7) * 0.002}
+            for i in range(stop_count)
+        ],
+    }
+
+
+class RoutePersistenceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(SimulatedUser("7c9e6679-7425-40de-944b-e07fc1f99a4a", "dispatcher", ""))
+
+    def create_route(self, stop_count):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/routing/create/", route_payload(stop_count), format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data["route_id"], len(queries)
+
+    def test_create_query_count_is_independent_of_stop_count(self):
+        _, few = self.create_route(3)
+        _, many = self.create_route(200)
+        self.assertEqual(few, many)
+
+    def test_stops_are_stored_in_optimized_order(self):
+        route_id, _ = self.create_route(20)
+        response = self.client.get(f"/api/routing/routes/{route_id}/")
+        self.assertEqual([stop["sequence"] for stop in response.data["stops"]], list(range(20)))
+
+    def test_read_query_count_is_independent_of_stop_count(self):
+        small, _ = self.create_route(3)
+        large, _ = self.create_route(200)
+
+        for route_id in (small, large):
+            with self.assertNumQueries(2):
+                response = self.client.get(f"/api/routing/routes/{route_id}/")
+            self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/routing/routes/")
+        self.assertEqual(len(response.data["results"]), Route.objects.count())
+
+
+    def test_routes_are_only_visible_to_their_owner(self):
+        route_id, _ = self.create_route(3)
+        other = APIClient()
+        other.force_authenticate(SimulatedUser("16fd2706-8baf-433b-82eb-8c7fada847da", "other", ""))
+
+        self.assertEqual(other.get(f"/api/routing/routes/{route_id}/").status_code, 404)
+        self.assertEqual(other.get("/api/routing/routes/").data["results"], [])
+        self.assertEqual(str(Route.objects.get(pk=route_id).user_id), "7c9e6679-7425-40de-944b-e07fc1f99a4a")
+
+    def test_malformed_times_are_rejected(self):
+        for departure_time, delivery_time in (("tomorrow", None), (None, "2026-02-30T09:00:00Z"), (None, 1700000000)):
+            payload = {**route_payload(3), "departure_time": departure_time}
+            payload["stops"][0]["delivery_time"] = delivery_time
+            response = self.client.post("/api/routing/create/", payload, format="json")
+            self.assertEqual(response.status_code, 400, (departure_time, delivery_time))
+        self.assertFalse(Route.objects.exists())
+
+
+class RouteStopUpdateTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(SimulatedUser("7c9e6679-7425-40de-944b-e07fc1f99a4a", "dispatcher", ""))
+        response = self.client.post("/api/routing/create/", route_payload(30), format="json")
+        self.route_id = response.data["route_id"]
+
+    def patch_stops(self, body):
+        return self.client.patch(f"/api/routing/routes/{self.route_id}/stops/", body, format="json")
+
+    def test_add_and_remove_keeps_a_contiguous_sequence(self):
+        stops = self.client.get(f"/api/routing/routes/{self.route_id}/").data["stops"]
+        removed = [stops[3]["id"], stops[10]["id"]]
+        added = [
+            {"address": "New 1", "latitude": 39.715, "longitude": -84.195},
+            {"address": "New 2", "latitude": 39.722, "longitude": -84.189},
+        ]
+
+        response = self.patch_stops({"add": added, "remove": removed})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([stop["sequence"] for stop in response.data["stops"]], list(range(30)))
+        addresses = {stop["address"] for stop in response.data["stops"]}
+        self.assertTrue({"New 1", "New 2"} <= addresses)
+        self.assertFalse({stops[3]["address"], stops[10]["address"]} & addresses)
+
+    def test_stop_changes_are_recorded_in_the_outbox(self):
+        stops = self.client.get(f"/api/routing/routes/{self.route_id}/").data["stops"]
+        ChangeEvent.objects.all().delete()
+
+        self.patch_stops({"add": [{"address": "New", "latitude": 39.7, "longitude": -84.2}], "remove": [stops[0]["id"]]})
+
+        events = ChangeEvent.objects.filter(entity="route_stop")
+        self.assertEqual(events.filter(op=ChangeEvent.DELETE).get().key, str(stops[0]["id"]))
+        self.assertEqual(events.filter(op=ChangeEvent.CREATE).get().data["address"], "New")
+        self.assertTrue(all(set(event.data) == {"sequence"} for event in events.filter(op=ChangeEvent.UPDATE)))
+
+    def test_stops_with_delivery_times_are_recorded(self):
+        payload = route_payload(3)
+        for stop in payload["stops"]:
+            stop["delivery_time"] = "2026-10-19T09:30:00Z"
+
+        response = self.client.post("/api/routing/create/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        route_stops = RouteStop.objects.filter(route_id=response.data["route_id"]).values_list("id", flat=True)
+        events = ChangeEvent.objects.filter(entity="route_stop", key__in=[str(pk) for pk in route_stops])
+        self.assertEqual(events.count(), 3)
+        self.assertTrue(all(event.data["delivery_time"].startswith("2026-10-19T09:30:00") for event in events))
+
+    def test_other_users_cannot_change_stops(self):
+        stops = self.client.get(f"/api/routing/routes/{self.route_id}/").data["stops"]
+        other = APIClient()
+        other.force_authenticate(SimulatedUser("16fd2706-8baf-433b-82eb-8c7fada847da", "other", ""))
+
+        response = other.patch(
+            f"/api/routing/routes/{self.route_id}/stops/", {"remove": [stops[0]["id"]]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(RouteStop.objects.filter(pk=stops[0]["id"]).exists())
+
+    def test_unknown_stop_id_is_rejected(self):
+        response = self.patch_stops({"remove": [0]})
+        self.assertEqual(response.status_code, 400)
+
+    def test_added_stop_with_malformed_delivery_time_is_rejected(self):
+        stop = {"address": "New", "latitude": 39.75, "longitude": -84.19, "delivery_time": "not a time"}
+        response = self.patch_stops({"add": [stop]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("add[0].delivery_time", response.data["error"])
+
+
+@override_settings(ROUTE_PLAN_WORKERS=1)
+class RoutePlanTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(SimulatedUser("7c9e6679-7425-40de-944b-e07fc1f99a4a", "dispatcher", ""))
+
+    def test_stops_are_split_across_vehicles_within_capacity(self):
+        payload = {**route_payload(40), "vehicles": 3, "capacity": 15}
+
+        response = self.client.post("/api/routing/plans", payload, format="json")
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data["routes"]), 3)
+        self.assertTrue(all(route["load"] <= 15 for route in response.data["routes"]))
+        self.assertEqual(RouteStop.objects.filter(route__plan_id=response.data["plan_id"]).count(), 40)
+
+    def test_plan_routes_are_only_visible_to_their_owner(self):
+        response = self.client.post("/api/routing/plans", {**route_payload(20), "vehicles": 2}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        route_ids = [route["route_id"] for route in response.data["routes"]]
+        other = APIClient()
+        other.force_authenticate(SimulatedUser("16fd2706-8baf-433b-82eb-8c7fada847da", "other", ""))
+
+        self.assertEqual(other.get(f"/api/routing/routes/{route_ids[0]}/").status_code, 404)
+        self.assertEqual(other.get("/api/routing/routes/").data["results"], [])
+        listed = {route["id"] for route in self.client.get("/api/routing/routes/").data["results"]}
+        self.assertTrue(set(route_ids) <= listed)
+
+    def test_demand_over_fleet_capacity_is_rejected(self):
+        payload = {**route_payload(40), "vehicles": 2, "capacity": 15}
+        response = self.client.post("/api/routing/plans", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class DistanceMatrixTests(TestCase):
+    def setUp(self):
+        clear_location_cache()
+        self.addCleanup(clear_location_cache)
+        self.user = SimulatedUser("7c9e6679-7425-40de-944b-e07fc1f99a4a", "dispatcher", "")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def matrix(self, origins, destinations):
+        body = {"origins": origins, "destinations": destinations}
+        return self.client.post("/api/routing/matrix", body, format="json")
+
+    def test_haversine_matrix(self):
+        point = {"latitude": 39.7589, "longitude": -84.1916}
+        response = self.matrix([point], [point, {"latitude": 39.9612, "longitude": -82.9988}])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["matrix"][0][0], 0.0)
+
+    def test_ungeocoded_addresses_are_rejected(self):
+        payload = {
+            "address_line_1": "100 Main St",
+            "address_line_2": "",
+            "postal_code": "45402",
+            "city": "Dayton",
+            "state": "Ohio",
+            "country": "US",
+        }
+        serializer = AddressSerializer(data=payload, context={"user": self.user})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        address = serializer.save()
+
+        response = self.matrix([{"address_id": str(address.id)}], [{"latitude": 39.7, "longitude": -84.2}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("not geocoded", response.data["error"])
+
+    def test_malformed_points_are_rejected(self):
+        point = {"latitude": 39.7, "longitude": -84.2}
+        self.assertEqual(self.matrix({"latitude": 39.7}, [point]).status_code, 400)
+        self.assertEqual(self.matrix([point], [{"latitude": 91, "longitude": 0}]).status_code, 400)
+        self.assertEqual(self.matrix([point], [{"latitude": 0, "longitude": -181}]).status_code, 400)
+
+
+class RouteCacheTests(TestCase):
+    def setUp(self):
+        clear_route_cache()
+
+    def test_resubmitted_stops_in_any_order_hit_the_cache(self):
+        payload = route_payload(12)
+        origin, destination, stops = payload["origin"], payload["destination"], payload["stops"]
+
+        first = optimize_route("local", origin, stops, destination)
+        shuffled = stops[5:] + stops[:5]
+        second = optimize_route("local", origin, shuffled, destination)
+
+        self.assertTrue(second.get("cached"))
+        first_visits = [stops[i]["address"] for i in first["routes"][0]["waypoint_order"]]
+        second_visits = [shuffled[i]["address"] for i in second["routes"][0]["waypoint_order"]]
+        self.assertEqual(first_visits, second_visits)
+        self.assertEqual(route_cache_stats()["memory_hits"], 1)
+
+
+class RouteJobConsumerTests(TransactionTestCase):
+    user_id = "7c9e6679-7425-40de-944b-e07fc1f99a4a"
+
+    def connect(self, query=""):
+        return WebsocketCommunicator(
+            application, f"/ws/routing/jobs/{query}", headers=[(b"origin", b"http://localhost")]
+        )
+
+    async def test_route_job_streams_progress_then_saves_the_route(self):
+        token = AccessToken()
+        token["user_id"] = self.user_id
+        communicator = self.connect(f"?token={token}")
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await communicator.send_json_to({"type": "route", **route_payload(60)})
+        events = []
+        while not events or events[-1]["event"] not in ("done", "failed"):
+            events.append(await communicator.receive_json_from(timeout=10))
+        await communicator.disconnect()
+
+        self.assertEqual(events[0]["event"], "accepted")
+        self.assertIn("progress", [message["event"] for message in events])
+        self.assertEqual(events[-1]["event"], "done", events[-1])
+        self.assertEqual(sorted(events[-1]["waypoint_order"]), list(range(60)))
+        route_exists = database_sync_to_async(
+            Route.objects.filter(id=events[-1]["route_id"], user_id=self.user_id).exists
+        )
+        self.assertTrue(await route_exists())
+
+    async def test_subscribing_to_an_unknown_job_returns_an_error(self):
+        token = AccessToken()
+        token["user_id"] = self.user_id
+        communicator = self.connect(f"?token={token}")
+        await communicator.connect()
+
+        await communicator.send_json_to({"type": "subscribe", "job_id": "8f14e45f-ceea-467f-a0e6-8a0b1f2c3d4e"})
+        message = await communicator.receive_json_from(timeout=5)
+        await communicator.disconnect()
+
+        self.assertEqual(message, {"event": "error", "error": "Unknown job_id."})
+
+    async def test_connection_without_token_is_rejected(self):
+        connected, _ = await self.connect().connect()
+        self.assertFalse(connected)
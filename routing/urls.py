@@ -1,7 +1,13 @@
-from django.urls import path
-from .views import RouteCreateView
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import DistanceMatrixView, RouteCreateView, RoutePlanView, RouteViewSet
 
+router = DefaultRouter()
+router.register(r"routes", RouteViewSet, basename="route")
 
 urlpatterns = [
     path("create/", RouteCreateView.as_view(), name="route-create"),
+    path("matrix", DistanceMatrixView.as_view(), name="route-matrix"),
+    path("plans", RoutePlanView.as_view(), name="route-plans"),
+    path("", include(router.urls)),
 ]
@@ -1,7 +1,20 @@
-import requests
+import time
+from datetime import datetime
+
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.http import get_client
+from location.models import ChangeEvent
+from location.utils.change_stream import record_changes
+from . import cache as route_cache
+from .models import Route, RoutePlan, RouteStop
+from .optimizer import optimize_order, reoptimize_order
+from .planning import plan_routes
 
-# GOOGLE_MAPS_API_KEY = "YOUR_GOOGLE_MAPS_API_KEY"
+STOP_FIELDS = ("address", "latitude", "longitude", "delivery_time")
 
 
 def get_optimized_route(origin, stops, destination):
@@ -10,14 +23,217 @@ def get_optimized_route(origin, stops, destination):
     """
     waypoints = "|".join([f"{stop['latitude']},{stop['longitude']}" for stop in stops])
 
-    url = f"https://maps.googleapis.com/maps/api/directions/json"
-
     params = {
         "origin": f"{origin['latitude']},{origin['longitude']}",
         "destination": f"{destination['latitude']},{destination['longitude']}",
         "waypoints": f"optimize:true|{waypoints}",
-        "key": GOOGLE_MAPS_API_KEY,
+        "key": settings.GOOGLE_MAPS_API_KEY,
+    }
+
+    return get_client("google_maps").get_json("/maps/api/directions/json", params=params)
+
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        # parse_datetime returns None for malformed strings and raises ValueError for impossible dates
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid datetime: {value}")
+    else:
+        raise ValueError(f"Invalid datetime: {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def validate_times(stops, departure_time=None, stops_field="stops"):
+    """
+    Raises ValueError naming the first `departure_time` or stop `delivery_time` that isn't an
+    ISO 8601 datetime, so views can answer 400 before any optimization work starts.
+    """
+    values = [("departure_time", departure_time)]
+    values += [(f"{stops_field}[{index}].delivery_time", stop.get("delivery_time")) for index, stop in enumerate(stops)]
+    for field, value in values:
+        try:
+            _parse_datetime(value)
+        except ValueError:
+            raise ValueError(f"{field} must be an ISO 8601 datetime.")
+
+
+def get_local_optimized_route(origin, stops, destination, departure_time=None, progress=None):
+    """
+    Optimizes the route in process (see routing/optimizer.py) and returns it in the same
+    shape as the Directions API response, so callers can read `waypoint_order` either way.
+    `progress(waypoint_order, distance_km, iteration)` receives each improvement.
+    """
+    departure = _parse_datetime(departure_time) or timezone.now()
+    timed_stops = [{**stop, "delivery_time": _parse_datetime(stop.get("delivery_time"))} for stop in stops]
+
+    result = optimize_order(
+        origin,
+        timed_stops,
+        destination,
+        departure=departure,
+        speed_kmh=settings.ROUTE_OPTIMIZER_SPEED_KMH,
+        time_limit=settings.ROUTE_OPTIMIZER_TIME_LIMIT,
+        progress=progress,
+    )
+    route = {
+        "waypoint_order": result["waypoint_order"],
+        "legs": [{"distance": {"value": round(leg * 1000)}} for leg in result["legs"]],
     }
+    if "late_hours" in result:
+        route["late_hours"] = result["late_hours"]
+    return {"status": "OK", "optimizer": "local", "routes": [route]}
+
+
+def reoptimize_stops(origin, stops, destination, removed=(), added=(), departure_time=None):
+    """
+    Repairs a stored stop order after `removed` (indices into `stops`) are dropped and `added`
+    stops are appended, without re-solving the whole route. `stops` must be in visiting order.
+    Returns `waypoint_order` as indices into `stops + added`.
+    """
+    departure = _parse_datetime(departure_time) or timezone.now()
+    timed = [{**stop, "delivery_time": _parse_datetime(stop.get("delivery_time"))} for stop in (*stops, *added)]
+
+    return reoptimize_order(
+        origin,
+        timed[:len(stops)],
+        destination,
+        removed=removed,
+        added=timed[len(stops):],
+        departure=departure,
+        speed_kmh=settings.ROUTE_OPTIMIZER_SPEED_KMH,
+        time_limit=settings.ROUTE_REOPTIMIZE_TIME_LIMIT,
+    )
+
+
+def plan_vehicle_routes(origin, stops, destination, vehicles, capacity=None, departure_time=None, progress=None):
+    """
+    Splits `stops` across `vehicles` and optimizes each vehicle's route on the worker pool
+    (see routing/planning.py). Stops may carry a numeric `demand` (default 1) counted against
+    `capacity`. Raises ValueError when the stops do not fit the fleet.
+    `progress(done, total, distance_km)` is called as vehicles finish.
+    """
+    departure = _parse_datetime(departure_time) or timezone.now()
+    timed_stops = [{**stop, "delivery_time": _parse_datetime(stop.get("delivery_time"))} for stop in stops]
+
+    return plan_routes(
+        origin,
+        timed_stops,
+        destination,
+        vehicles,
+        capacity=capacity,
+        demands=[float(stop.get("demand", 1)) for stop in stops],
+        departure=departure,
+        speed_kmh=settings.ROUTE_OPTIMIZER_SPEED_KMH,
+        time_limit=settings.ROUTE_OPTIMIZER_TIME_LIMIT,
+        workers=settings.ROUTE_PLAN_WORKERS,
+        progress=progress,
+    )
+
+
+def owned_by(queryset, user):
+    """Rows of `queryset` visible to `user`: their tenant's when the token carries a tenant_id, else their own."""
+    tenant_id = getattr(user, "tenant_id", None)
+    if tenant_id:
+        return queryset.filter(tenant_id=tenant_id)
+    return queryset.filter(user_id=user.user_id)
+
+
+def save_route(name, origin, destination, stops, waypoint_order, user_id=None, tenant_id=None):
+    """Saves a route owned by `user_id`/`tenant_id` and its stops, in `waypoint_order`, in one transaction."""
+    with transaction.atomic():
+        route = Route.objects.create(
+            name=name,
+            user_id=user_id,
+            tenant_id=tenant_id,
+            origin_address=origin["address"],
+            origin_latitude=origin["latitude"],
+            origin_longitude=origin["longitude"],
+            destination_address=destination["address"],
+            destination_latitude=destination["latitude"],
+            destination_longitude=destination["longitude"],
+        )
+        route_stops = RouteStop.objects.bulk_create(
+            [
+                RouteStop(route=route, sequence=sequence, **{field: stops[index].get(field) for field in STOP_FIELDS})
+                for sequence, index in enumerate(waypoint_order)
+            ]
+        )
+        record_changes(ChangeEvent.CREATE, route_stops)
+    return route
+
+
+def save_plan(name, origin, destination, stops, plans, capacity=None, user_id=None, tenant_id=None):
+    """
+    Saves a plan owned by `user_id`/`tenant_id`, one route per vehicle (see `plan_vehicle_routes`)
+    and all stops in one transaction.
+    """
+    with transaction.atomic():
+        plan = RoutePlan.objects.create(
+            name=name, vehicle_count=len(plans), vehicle_capacity=capacity, user_id=user_id, tenant_id=tenant_id
+        )
+        routes = Route.objects.bulk_create(
+            [
+                Route(
+                    plan=plan,
+                    vehicle=vehicle,
+                    name=f"{name} #{vehicle + 1}".strip(),
+                    origin_address=origin["address"],
+                    origin_latitude=origin["latitude"],
+                    origin_longitude=origin["longitude"],
+                    destination_address=destination["address"],
+                    destination_latitude=destination["latitude"],
+                    destination_longitude=destination["longitude"],
+                    user_id=user_id,
+                    tenant_id=tenant_id,
+                )
+                for vehicle in range(len(plans))
+            ]
+        )
+        route_stops = RouteStop.objects.bulk_create(
+            [
+                RouteStop(route=route, sequence=sequence, **{field: stops[index].get(field) for field in STOP_FIELDS})
+                for route, vehicle_plan in zip(routes, plans)
+                for sequence, index in enumerate(vehicle_plan["waypoint_order"])
+            ]
+        )
+        # bulk_create skips post_save, so the change stream is fed here.
+        record_changes(ChangeEvent.CREATE, routes)
+        record_changes(ChangeEvent.CREATE, route_stops)
+    return plan, routes
+
+
+def optimize_route(optimizer, origin, stops, destination, departure_time=None):
+    """
+    Optimizes with the chosen engine ("google" or "local"), consulting the route cache first.
+    Returns a Directions-shaped response; cache hits carry `"cached": True` and only include
+    the waypoint order and leg distances.
+    """
+    key, canonical = route_cache.fingerprint(optimizer, origin, stops, destination, departure_time)
+    if key:
+        cached = route_cache.get_cached(key, canonical)
+        if cached:
+            route = {
+                "waypoint_order": cached["waypoint_order"],
+                "legs": [{"distance": {"value": meters}} for meters in cached["legs"]],
+            }
+            return {"status": "OK", "optimizer": optimizer, "cached": True, "routes": [route]}
+
+    started = time.perf_counter()
+    if optimizer == "local":
+        optimized_route = get_local_optimized_route(origin, stops, destination, departure_time)
+    else:
+        optimized_route = get_optimized_route(origin, stops, destination)
+    elapsed = time.perf_counter() - started
 
-    response = requests.get(url, params=params)
-    return response.json()
+    routes = optimized_route.get("routes") or []
+    if key and optimized_route.get("status") == "OK" and routes:
+        legs = [leg.get("distance", {}).get("value", 0) for leg in routes[0].get("legs", [])]
+        route_cache.store(key, canonical, optimizer, routes[0].get("waypoint_order", []), legs, elapsed)
+    return optimized_route
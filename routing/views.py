@@ -1,14 +1,39 @@
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from core.http import ProviderError
+from location.models import Address, ChangeEvent
+from location.pagination import KeysetPagination
+from location.utils.change_stream import record_changes
+from .matrix import METRICS, UNITS, distance_matrix
 from .models import Route, RouteStop
 from .serializers import RouteSerializer
-from .utils import get_optimized_route
+from .utils import (
+    STOP_FIELDS,
+    optimize_route,
+    owned_by,
+    plan_vehicle_routes,
+    reoptimize_stops,
+    save_plan,
+    save_route,
+    validate_times,
+)
+
+OPTIMIZERS = ("google", "local")
 
 
 class RouteCreateView(APIView):
     """
     Creates and optimizes a delivery route.
+    Pass `optimizer` ("google" or "local") in the body or query string to pick the engine.
     """
 
     def post(self, request):
@@ -17,34 +42,289 @@ class RouteCreateView(APIView):
         stops = data.get("stops", [])
         destination = data.get("destination")
 
+        optimizer = data.get("optimizer") or request.query_params.get("optimizer") or settings.ROUTE_OPTIMIZER
+
         # Validate input
         if not origin or not destination or not stops:
             return Response({"error": "Missing required fields."}, status=400)
+        if optimizer not in OPTIMIZERS:
+            return Response({"error": f"optimizer must be one of: {', '.join(OPTIMIZERS)}."}, status=400)
+        try:
+            validate_times(stops, data.get("departure_time"))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
 
-        # Optimize the route
-        optimized_route = get_optimized_route(origin, stops, destination)
+        # Optimize the route (served from the route cache when the same stop set was seen before)
+        try:
+            optimized_route = optimize_route(optimizer, origin, stops, destination, data.get("departure_time"))
+        except ProviderError as exc:
+            return Response({"error": f"Route optimization failed: {exc}"}, status=502)
+        if not optimized_route.get("routes"):
+            return Response(
+                {"error": f"Route optimization failed: {optimized_route.get('status', 'no route found')}"}, status=502
+            )
 
         # Extract optimized waypoint order
         waypoint_order = optimized_route["routes"][0].get("waypoint_order", [])
 
-        # Reorder stops based on Google’s optimization
-        sorted_stops = [stops[i] for i in waypoint_order]
-
-        # Save Route to database
-        route = Route.objects.create(
-            name=data.get("name", ""),
-            origin_address=origin["address"],
-            origin_latitude=origin["latitude"],
-            origin_longitude=origin["longitude"],
-            destination_address=destination["address"],
-            destination_latitude=destination["latitude"],
-            destination_longitude=destination["longitude"],
+        # Save the route and all of its stops, in order, in one transaction
+        user = request.user
+        route = save_route(
+            data.get("name", ""),
+            origin,
+            destination,
+            stops,
+            waypoint_order,
+            user_id=user.user_id,
+            tenant_id=getattr(user, "tenant_id", None),
         )
 
-        # Save each stop in order
-        for stop in sorted_stops:
-            RouteStop.objects.create(route=route, **stop)
-
         return Response(
             {"route_id": route.id, "optimized_route": optimized_route}, status=201
         )
+
+
+class RoutePlanView(APIView):
+    """
+    Splits a day's stops across several vehicles and saves one optimized route per vehicle.
+    Body: origin, destination, stops (each may carry a numeric `demand`, default 1), `vehicles`
+    and an optional per-vehicle `capacity`.
+    """
+
+    def post(self, request):
+        data = request.data
+        origin = data.get("origin")
+        stops = data.get("stops", [])
+        destination = data.get("destination")
+
+        if not origin or not destination or not stops:
+            return Response({"error": "Missing required fields."}, status=400)
+        try:
+            vehicles = int(data.get("vehicles", 1))
+            capacity = float(data["capacity"]) if data.get("capacity") is not None else None
+        except (TypeError, ValueError):
+            return Response({"error": "vehicles must be an integer and capacity a number."}, status=400)
+        if vehicles < 1 or (capacity is not None and capacity <= 0):
+            return Response({"error": "vehicles and capacity must be positive."}, status=400)
+        try:
+            validate_times(stops, data.get("departure_time"))
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        try:
+            plans = plan_vehicle_routes(
+                origin, stops, destination, vehicles, capacity=capacity, departure_time=data.get("departure_time")
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            return Response({"error": f"Route planning failed: {exc}"}, status=400)
+
+        # Save the plan, its routes and all of their stops in one transaction
+        user = request.user
+        plan, routes = save_plan(
+            data.get("name", ""),
+            origin,
+            destination,
+            stops,
+            plans,
+            capacity,
+            user_id=user.user_id,
+            tenant_id=getattr(user, "tenant_id", None),
+        )
+
+        return Response(
+            {
+                "plan_id": plan.id,
+                "distance_km": sum(vehicle_plan["distance_km"] for vehicle_plan in plans),
+                "routes": [
+                    {
+                        "route_id": route.id,
+                        "vehicle": route.vehicle,
+                        "load": vehicle_plan["load"],
+                        "distance_km": vehicle_plan["distance_km"],
+                        "waypoint_order": vehicle_plan["waypoint_order"],
+                    }
+                    for route, vehicle_plan in zip(routes, plans)
+                ],
+            },
+            status=201,
+        )
+
+
+class RouteViewSet(viewsets.ViewSet):
+    """
+    List and retrieve the caller's routes (their tenant's, when the token carries a tenant_id) with
+    their stops; stops are loaded with one extra query per page.
+    """
+
+    def get_queryset(self):
+        return owned_by(Route.objects.prefetch_related("stops"), self.request.user)
+
+    def list(self, request):
+        paginator = KeysetPagination(request)
+        routes = paginator.paginate_queryset(self.get_queryset())
+        return paginator.get_paginated_response(RouteSerializer(routes, many=True).data)
+
+    def retrieve(self, request, pk=None):
+        route = get_object_or_404(self.get_queryset(), pk=pk)
+        return Response(RouteSerializer(route).data)
+
+    @action(detail=True, methods=["patch"], url_path="stops")
+    def update_stops(self, request, pk=None):
+        """
+        Adds and/or removes stops on a stored route without re-optimizing it from scratch.
+        Body: {"add": [stop, ...], "remove": [stop_id, ...], "departure_time": optional}.
+        New stops are placed by cheapest insertion followed by a local search around the change,
+        and only stops whose position changed are written back.
+        """
+        added = request.data.get("add") or []
+        remove = request.data.get("remove") or []
+        if not added and not remove:
+            return Response({"error": "Provide stops to add or stop IDs to remove."}, status=400)
+        try:
+            remove_ids = {int(stop_id) for stop_id in remove}
+            for stop in added:
+                if not stop.get("address"):
+                    raise ValueError
+                float(stop["latitude"])
+                float(stop["longitude"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return Response(
+                {"error": "remove must be stop IDs; added stops need address, latitude and longitude."}, status=400
+            )
+        try:
+            validate_times(added, request.data.get("departure_time"), stops_field="add")
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        with transaction.atomic():
+            route = get_object_or_404(owned_by(Route.objects.select_for_update(), request.user), pk=pk)
+            stops = list(route.stops.order_by("sequence", "id"))
+            unknown = remove_ids - {stop.id for stop in stops}
+            if unknown:
+                return Response({"error": f"Unknown stop ID: {', '.join(map(str, sorted(unknown)))}"}, status=400)
+
+            result = reoptimize_stops(
+                {"latitude": route.origin_latitude, "longitude": route.origin_longitude},
+                [{field: getattr(stop, field) for field in STOP_FIELDS} for stop in stops],
+                {"latitude": route.destination_latitude, "longitude": route.destination_longitude},
+                removed=[index for index, stop in enumerate(stops) if stop.id in remove_ids],
+                added=added,
+                departure_time=request.data.get("departure_time"),
+            )
+
+            moved, created = [], []
+            for sequence, index in enumerate(result["waypoint_order"]):
+                if index >= len(stops):
+                    stop = added[index - len(stops)]
+                    created.append(
+                        RouteStop(route=route, sequence=sequence, **{field: stop.get(field) for field in STOP_FIELDS})
+                    )
+                elif stops[index].sequence != sequence:
+                    stops[index].sequence = sequence
+                    moved.append(stops[index])
+
+            if remove_ids:
+                RouteStop.objects.filter(route=route, id__in=remove_ids).delete()
+            RouteStop.objects.bulk_update(moved, ["sequence"])
+            RouteStop.objects.bulk_create(created)
+            record_changes(ChangeEvent.UPDATE, moved, fields=["sequence"])
+            record_changes(ChangeEvent.CREATE, created)
+
+        route = self.get_queryset().get(pk=route.pk)
+        return Response(
+            {
+                **RouteSerializer(route).data,
+                "distance_km": result["distance_km"],
+                "rewritten_stops": len(moved) + len(created),
+            }
+        )
+
+
+class DistanceMatrixView(APIView):
+    """
+    Computes an origins x destinations distance matrix.
+    Points are {"latitude", "longitude"} objects or {"address_id"} references to the
+    caller's saved addresses. Set `encoding` to "float32" for a little-endian float32 body.
+    """
+
+    def post(self, request):
+        data = request.data
+        origins = data.get("origins") or []
+        destinations = data.get("destinations") or []
+        metric = data.get("metric", "haversine")
+        unit = data.get("unit", "km")
+        encoding = data.get("encoding", "json")
+
+        if not origins or not destinations:
+            return Response({"error": "origins and destinations are required."}, status=400)
+        if not isinstance(origins, list) or not isinstance(destinations, list):
+            return Response({"error": "origins and destinations must be lists of points."}, status=400)
+        if len(origins) * len(destinations) > settings.ROUTE_MATRIX_MAX_CELLS:
+            return Response({"error": f"At most {settings.ROUTE_MATRIX_MAX_CELLS} cells per matrix."}, status=400)
+        if metric not in METRICS:
+            return Response({"error": f"metric must be one of: {', '.join(METRICS)}."}, status=400)
+        if unit not in UNITS:
+            return Response({"error": f"unit must be one of: {', '.join(UNITS)}."}, status=400)
+        if encoding not in ("json", "float32"):
+            return Response({"error": "encoding must be 'json' or 'float32'."}, status=400)
+
+        try:
+            origin_points, destination_points = self.resolve_points([origins, destinations])
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if encoding == "float32":
+            matrix = distance_matrix(origin_points, destination_points, metric, unit, dtype="<f4")
+            response = HttpResponse(matrix.tobytes(), content_type="application/octet-stream")
+            response["X-Matrix-Shape"] = f"{matrix.shape[0]},{matrix.shape[1]}"
+            response["X-Matrix-Unit"] = unit
+            return response
+
+        matrix = distance_matrix(origin_points, destination_points, metric, unit)
+        return Response({"unit": unit, "metric": metric, "matrix": np.round(matrix, 4).tolist()})
+
+    def resolve_points(self, point_lists):
+        """Turn each list of point specs into (lat, lng) pairs, loading all address IDs in one query."""
+        address_ids = set()
+        for points in point_lists:
+            for point in points:
+                if isinstance(point, dict) and "address_id" in point:
+                    try:
+                        address_ids.add(uuid.UUID(str(point["address_id"])))
+                    except ValueError:
+                        raise ValueError(f"Invalid address_id: {point['address_id']}")
+
+        locations = {}
+        if address_ids:
+            queryset = Address.objects.filter(id__in=address_ids, user_id=self.request.user.user_id)
+            locations, ungeocoded = {}, set()
+            for address_id, location, is_valid in queryset.values_list("id", "location", "is_valid"):
+                if is_valid:
+                    locations[address_id] = (location.y, location.x)
+                else:
+                    # Not geocoded yet: `location` is the POINT(0 0) default.
+                    ungeocoded.add(address_id)
+            missing = address_ids - set(locations) - ungeocoded
+            if missing:
+                raise ValueError(f"Unknown address_id: {', '.join(sorted(str(m) for m in missing))}")
+            if ungeocoded:
+                raise ValueError(f"Address not geocoded yet: {', '.join(sorted(str(a) for a in ungeocoded))}")
+
+        resolved = []
+        for points in point_lists:
+            pairs = []
+            for point in points:
+                if not isinstance(point, dict):
+                    raise ValueError("Each point must be an object.")
+                if "address_id" in point:
+                    pairs.append(locations[uuid.UUID(str(point["address_id"]))])
+                    continue
+                try:
+                    latitude, longitude = float(point["latitude"]), float(point["longitude"])
+                except (KeyError, TypeError, ValueError):
+                    raise ValueError("Each point needs numeric latitude and longitude, or an address_id.")
+                if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                    raise ValueError("latitude/longitude out of range.")
+                pairs.append((latitude, longitude))
+            resolved.append(pairs)
+        return resolved
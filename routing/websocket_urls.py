@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .consumers import RouteJobConsumer
+
+websocket_urlpatterns = [
+    path("ws/routing/jobs/", RouteJobConsumer.as_asgi()),
+]